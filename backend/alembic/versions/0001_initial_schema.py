@@ -0,0 +1,66 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 23:13:03.315265
+
+The ``hcps`` and ``interactions`` tables as the API used to create them with
+``Base.metadata.create_all`` on startup. A database created that way is at this
+revision: run ``alembic stamp 0001`` once, then ``alembic upgrade head``.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "hcps",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("specialty", sa.String(length=255), nullable=True),
+        sa.Column("organization", sa.String(length=255), nullable=True),
+        sa.Column("city", sa.String(length=255), nullable=True),
+        sa.Column("state", sa.String(length=255), nullable=True),
+        sa.Column("tier", sa.String(length=50), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_hcps_id", "hcps", ["id"])
+
+    op.create_table(
+        "interactions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("hcp_id", sa.Integer(), nullable=False),
+        sa.Column("interaction_type", sa.String(length=100), nullable=True),
+        sa.Column("channel", sa.String(length=100), nullable=True),
+        sa.Column("interaction_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("attendees", sa.Text(), nullable=True),
+        sa.Column("outcomes", sa.Text(), nullable=True),
+        sa.Column("next_steps", sa.Text(), nullable=True),
+        sa.Column("products_discussed", sa.JSON(), nullable=True),
+        sa.Column("sentiment", sa.String(length=50), nullable=True),
+        sa.Column("extracted_entities", sa.JSON(), nullable=True),
+        sa.Column("source", sa.String(length=50), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["hcp_id"], ["hcps.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_interactions_id", "interactions", ["id"])
+    op.create_index("ix_interactions_hcp_id", "interactions", ["hcp_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("interactions")
+    op.drop_table("hcps")
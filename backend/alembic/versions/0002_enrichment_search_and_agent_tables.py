@@ -0,0 +1,198 @@
+"""enrichment, search and agent tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 23:41:19.508231
+
+Raw notes and the enrichment queue columns, the keyset, export and full-text
+indexes on ``interactions``, and the rollup, extraction cache, embedding,
+idempotency and agent checkpoint tables. Existing rows are indexed for search
+here; run ``python -m app.services.activity_stats`` afterwards to fill the rollups.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import mysql
+
+from app.db.models import search_vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+Blob = sa.LargeBinary().with_variant(mysql.LONGBLOB(), "mysql")
+
+SQLITE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5("
+    "summary, notes, outcomes, content='interactions', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS interactions_fts_ai AFTER INSERT ON interactions BEGIN "
+    "INSERT INTO interactions_fts(rowid, summary, notes, outcomes) "
+    "VALUES (new.id, new.summary, new.notes, new.outcomes); END",
+    "CREATE TRIGGER IF NOT EXISTS interactions_fts_ad AFTER DELETE ON interactions BEGIN "
+    "INSERT INTO interactions_fts(interactions_fts, rowid, summary, notes, outcomes) "
+    "VALUES ('delete', old.id, old.summary, old.notes, old.outcomes); END",
+    "CREATE TRIGGER IF NOT EXISTS interactions_fts_au AFTER UPDATE ON interactions BEGIN "
+    "INSERT INTO interactions_fts(interactions_fts, rowid, summary, notes, outcomes) "
+    "VALUES ('delete', old.id, old.summary, old.notes, old.outcomes); "
+    "INSERT INTO interactions_fts(rowid, summary, notes, outcomes) "
+    "VALUES (new.id, new.summary, new.notes, new.outcomes); END",
+    # Index the rows that existed before the table did.
+    "INSERT INTO interactions_fts(interactions_fts) VALUES ('rebuild')",
+)
+INTERACTION_COLUMNS = (
+    "raw_notes",
+    "enrichment_status",
+    "enrichment_attempts",
+    "enrichment_error",
+    "enrichment_next_attempt_at",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    op.create_index("ix_hcps_name_id", "hcps", ["name", "id"])
+
+    op.add_column("interactions", sa.Column("raw_notes", sa.Text(), nullable=True))
+    op.add_column("interactions", sa.Column("enrichment_status", sa.String(length=20), nullable=True))
+    op.add_column(
+        "interactions", sa.Column("enrichment_attempts", sa.Integer(), server_default="0", nullable=False)
+    )
+    op.add_column("interactions", sa.Column("enrichment_error", sa.Text(), nullable=True))
+    op.add_column("interactions", sa.Column("enrichment_next_attempt_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_interactions_hcp_id_interaction_date",
+        "interactions",
+        ["hcp_id", sa.text("interaction_date DESC"), sa.text("id DESC")],
+    )
+    op.create_index("ix_interactions_enrichment_queue", "interactions", ["enrichment_status", "enrichment_next_attempt_at"])
+    op.create_index("ix_interactions_updated_at", "interactions", ["updated_at", "id"])
+    # Full-text search, one native index per backend (see app.db.models).
+    if dialect == "postgresql":
+        op.create_index(
+            "ix_interactions_search_tsv",
+            "interactions",
+            [search_vector(sa.column("summary"), sa.column("notes"), sa.column("outcomes"))],
+            postgresql_using="gin",
+        )
+    elif dialect == "mysql":
+        op.create_index("ix_interactions_fulltext", "interactions", ["summary", "notes", "outcomes"], mysql_prefix="FULLTEXT")
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS:
+            op.execute(statement)
+
+    op.create_table(
+        "hcp_activity_stats",
+        sa.Column("hcp_id", sa.Integer(), nullable=False),
+        sa.Column("interaction_count", sa.Integer(), nullable=False),
+        sa.Column("first_interaction_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_interaction_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("avg_days_between_interactions", sa.Float(), nullable=True),
+        sa.Column("sentiment_counts", sa.JSON(), nullable=False),
+        sa.Column("recent_sentiments", sa.JSON(), nullable=False),
+        sa.Column("sentiment_trend", sa.String(length=20), nullable=True),
+        sa.Column("product_counts", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["hcp_id"], ["hcps.id"]),
+        sa.PrimaryKeyConstraint("hcp_id"),
+    )
+
+    op.create_table(
+        "extraction_cache",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_extraction_cache_expires_at", "extraction_cache", ["expires_at"])
+
+    op.create_table(
+        "interaction_embeddings",
+        sa.Column("interaction_id", sa.Integer(), nullable=False),
+        sa.Column("hcp_id", sa.Integer(), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["hcp_id"], ["hcps.id"]),
+        sa.ForeignKeyConstraint(["interaction_id"], ["interactions.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("interaction_id"),
+    )
+    op.create_index("ix_interaction_embeddings_hcp_id", "interaction_embeddings", ["hcp_id"])
+
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("scope", sa.String(length=32), nullable=False),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("response", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("scope", "key"),
+    )
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+    op.create_table(
+        "agent_checkpoints",
+        sa.Column("thread_id", sa.String(length=255), nullable=False),
+        sa.Column("checkpoint_ns", sa.String(length=255), nullable=False),
+        sa.Column("checkpoint_id", sa.String(length=64), nullable=False),
+        sa.Column("parent_checkpoint_id", sa.String(length=64), nullable=True),
+        sa.Column("type", sa.String(length=50), nullable=True),
+        sa.Column("checkpoint", Blob, nullable=False),
+        sa.Column("metadata_type", sa.String(length=50), nullable=True),
+        sa.Column("metadata", Blob, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("thread_id", "checkpoint_ns", "checkpoint_id"),
+    )
+    op.create_table(
+        "agent_checkpoint_writes",
+        sa.Column("thread_id", sa.String(length=255), nullable=False),
+        sa.Column("checkpoint_ns", sa.String(length=255), nullable=False),
+        sa.Column("checkpoint_id", sa.String(length=64), nullable=False),
+        sa.Column("task_id", sa.String(length=64), nullable=False),
+        sa.Column("idx", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("channel", sa.String(length=255), nullable=False),
+        sa.Column("type", sa.String(length=50), nullable=True),
+        sa.Column("value", Blob, nullable=True),
+        sa.PrimaryKeyConstraint("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"),
+    )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table in (
+        "agent_checkpoint_writes",
+        "agent_checkpoints",
+        "idempotency_keys",
+        "interaction_embeddings",
+        "extraction_cache",
+        "hcp_activity_stats",
+    ):
+        op.drop_table(table)
+
+    if dialect == "postgresql":
+        op.drop_index("ix_interactions_search_tsv", table_name="interactions")
+    elif dialect == "mysql":
+        op.drop_index("ix_interactions_fulltext", table_name="interactions")
+    elif dialect == "sqlite":
+        for trigger in ("interactions_fts_ai", "interactions_fts_ad", "interactions_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS interactions_fts")
+    for index in (
+        "ix_interactions_updated_at",
+        "ix_interactions_enrichment_queue",
+        "ix_interactions_hcp_id_interaction_date",
+    ):
+        op.drop_index(index, table_name="interactions")
+    with op.batch_alter_table("interactions") as batch:
+        for column in INTERACTION_COLUMNS:
+            batch.drop_column(column)
+    op.drop_index("ix_hcps_name_id", table_name="hcps")
@@ -0,0 +1,40 @@
+"""compliance reviews
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 23:58:41.102937
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "compliance_reviews",
+        sa.Column("interaction_id", sa.Integer(), nullable=False),
+        sa.Column("prompt_hash", sa.String(length=64), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("reviewed_by", sa.String(length=20), nullable=False),
+        sa.Column("risk_level", sa.String(length=10), nullable=False),
+        sa.Column("issues", sa.JSON(), nullable=False),
+        sa.Column("suggested_remediation", sa.Text(), nullable=True),
+        sa.Column("prefilter_flags", sa.JSON(), nullable=False),
+        sa.Column("reviewed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["interaction_id"], ["interactions.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("interaction_id", "prompt_hash"),
+    )
+    op.create_index("ix_compliance_reviews_prompt_hash_risk_level", "compliance_reviews", ["prompt_hash", "risk_level"])
+
+
+def downgrade() -> None:
+    op.drop_table("compliance_reviews")
@@ -0,0 +1,271 @@
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from sqlalchemy import and_, select
+
+from app.db import models
+from app.db.session import AsyncSessionLocal, SessionLocal
+
+
+class SQLAlchemyCheckpointSaver(BaseCheckpointSaver):
+    """LangGraph checkpointer stored in the application database.
+
+    Uses the ``agent_checkpoints`` / ``agent_checkpoint_writes`` tables, so it
+    works on any backend the app already supports (Postgres, MySQL, SQLite).
+    """
+
+    def __init__(self, session_factory=SessionLocal, async_session_factory=AsyncSessionLocal):
+        super().__init__()
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+
+    @staticmethod
+    def _keys(config: RunnableConfig) -> tuple[str, str]:
+        configurable = config["configurable"]
+        return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+    def _checkpoint_query(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ):
+        Checkpoints = models.AgentCheckpoint
+        query = select(Checkpoints)
+        if config:
+            thread_id = config["configurable"]["thread_id"]
+            query = query.where(Checkpoints.thread_id == thread_id)
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query = query.where(Checkpoints.checkpoint_ns == checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query = query.where(Checkpoints.checkpoint_id == checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query = query.where(Checkpoints.checkpoint_id < before_id)
+        query = query.order_by(Checkpoints.checkpoint_id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @staticmethod
+    def _writes_query(row: models.AgentCheckpoint):
+        Writes = models.AgentCheckpointWrite
+        return (
+            select(Writes)
+            .where(
+                and_(
+                    Writes.thread_id == row.thread_id,
+                    Writes.checkpoint_ns == row.checkpoint_ns,
+                    Writes.checkpoint_id == row.checkpoint_id,
+                )
+            )
+            .order_by(Writes.task_id, Writes.idx)
+        )
+
+    def _to_tuple(self, row: models.AgentCheckpoint, writes: Sequence[models.AgentCheckpointWrite]) -> CheckpointTuple:
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": row.checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((row.type, row.checkpoint)),
+            metadata=self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": row.thread_id,
+                        "checkpoint_ns": row.checkpoint_ns,
+                        "checkpoint_id": row.parent_checkpoint_id,
+                    }
+                }
+                if row.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (write.task_id, write.channel, self.serde.loads_typed((write.type, write.value)))
+                for write in writes
+            ],
+        )
+
+    @staticmethod
+    def _matches(metadata: CheckpointMetadata, filter: Optional[dict[str, Any]]) -> bool:
+        return not filter or all(metadata.get(key) == value for key, value in filter.items())
+
+    def _checkpoint_row(
+        self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata
+    ) -> models.AgentCheckpoint:
+        thread_id, checkpoint_ns = self._keys(config)
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(metadata)
+        return models.AgentCheckpoint(
+            thread_id=thread_id,
+            checkpoint_ns=checkpoint_ns,
+            checkpoint_id=checkpoint["id"],
+            parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+            type=checkpoint_type,
+            checkpoint=checkpoint_blob,
+            metadata_type=metadata_type,
+            checkpoint_metadata=metadata_blob,
+        )
+
+    def _write_rows(
+        self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str
+    ) -> list[tuple[bool, models.AgentCheckpointWrite]]:
+        """Rows for ``put_writes``, each flagged with whether it replaces an existing row."""
+        thread_id, checkpoint_ns = self._keys(config)
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            rows.append(
+                (
+                    write_idx < 0,
+                    models.AgentCheckpointWrite(
+                        thread_id=thread_id,
+                        checkpoint_ns=checkpoint_ns,
+                        checkpoint_id=config["configurable"]["checkpoint_id"],
+                        task_id=task_id,
+                        idx=write_idx,
+                        channel=channel,
+                        type=value_type,
+                        value=value_blob,
+                    ),
+                )
+            )
+        return rows
+
+    @staticmethod
+    def _write_key(row: models.AgentCheckpointWrite) -> tuple:
+        return (row.thread_id, row.checkpoint_ns, row.checkpoint_id, row.task_id, row.idx)
+
+    @staticmethod
+    def _saved_config(config: RunnableConfig, checkpoint: Checkpoint) -> RunnableConfig:
+        thread_id, checkpoint_ns = SQLAlchemyCheckpointSaver._keys(config)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with self.session_factory() as session:
+            row = session.scalars(self._checkpoint_query(config, limit=1)).first()
+            if row is None:
+                return None
+            return self._to_tuple(row, session.scalars(self._writes_query(row)).all())
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self.session_factory() as session:
+            rows = session.scalars(self._checkpoint_query(config, before=before)).all()
+            for row in rows:
+                item = self._to_tuple(row, session.scalars(self._writes_query(row)).all())
+                if not self._matches(item.metadata, filter):
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with self.session_factory() as session:
+            session.merge(self._checkpoint_row(config, checkpoint, metadata))
+            session.commit()
+        return self._saved_config(config, checkpoint)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with self.session_factory() as session:
+            for replace, row in self._write_rows(config, writes, task_id):
+                if replace:
+                    session.merge(row)
+                elif session.get(models.AgentCheckpointWrite, self._write_key(row)) is None:
+                    session.add(row)
+            session.commit()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        async with self.async_session_factory() as session:
+            row = (await session.scalars(self._checkpoint_query(config, limit=1))).first()
+            if row is None:
+                return None
+            return self._to_tuple(row, (await session.scalars(self._writes_query(row))).all())
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        async with self.async_session_factory() as session:
+            rows = (await session.scalars(self._checkpoint_query(config, before=before))).all()
+            for row in rows:
+                item = self._to_tuple(row, (await session.scalars(self._writes_query(row))).all())
+                if not self._matches(item.metadata, filter):
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        async with self.async_session_factory() as session:
+            await session.merge(self._checkpoint_row(config, checkpoint, metadata))
+            await session.commit()
+        return self._saved_config(config, checkpoint)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        async with self.async_session_factory() as session:
+            for replace, row in self._write_rows(config, writes, task_id):
+                if replace:
+                    await session.merge(row)
+                elif await session.get(models.AgentCheckpointWrite, self._write_key(row)) is None:
+                    session.add(row)
+            await session.commit()
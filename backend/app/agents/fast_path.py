@@ -0,0 +1,183 @@
+import json
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models
+from app.services.metrics import FAST_PATH_DECISIONS, LLM_CALLS_SAVED, increment, track_stage
+
+
+# A handled turn skips the tool-selection call and the call that phrases the tool result.
+LLM_CALLS_PER_TURN = 2
+
+_NAME = r"(?P<name>(?:dr\.?\s+)?[a-z][\w.'-]*(?:\s+[a-z][\w.'-]*)?)"
+
+LOG_PATTERN = re.compile(
+    r"^\s*(?:please\s+)?(?:log|record)\s+(?:an?\s+|the\s+|my\s+)?(?P<kind>[\w\s-]*?)\s*(?:with|for)\s+"
+    + _NAME
+    + r"\s+(?:about|regarding|re:?|to discuss)\s+(?P<notes>.+?)\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+PROFILE_PATTERNS = [
+    re.compile(
+        r"^\s*(?:please\s+)?(?:show|get|fetch|open|view|display|pull up)\s+(?:me\s+)?"
+        + _NAME
+        + r"(?:'s|’s)\s+profile\s*[.!]?\s*$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"^\s*(?:please\s+)?(?:show|get|fetch|open|view|display|pull up)\s+(?:me\s+)?(?:the\s+)?profile\s+(?:of|for)\s+"
+        + _NAME
+        + r"\s*[.!]?\s*$",
+        re.IGNORECASE,
+    ),
+]
+# Extra asks in the same message need the planner.
+AMBIGUOUS_PATTERN = re.compile(
+    r"\?|\b(?:and|then|also)\s+(?:then\s+|also\s+)?(?:check|edit|update|suggest|review|show|search|fetch)\b"
+    r"|\bcompliance\b|\bnext best\b",
+    re.IGNORECASE,
+)
+INTERACTION_TYPES = {
+    "call": "Call",
+    "visit": "Visit",
+    "meeting": "Meeting",
+    "follow-up": "Follow-up",
+    "followup": "Follow-up",
+    "email": "Email",
+}
+NAME_TITLES = {"dr", "doctor"}
+
+
+@dataclass
+class FastPathIntent:
+    tool: str
+    hcp_name: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+def classify(text: str) -> Optional[FastPathIntent]:
+    """Match unambiguous log/profile requests; anything else goes to the full agent."""
+    match = LOG_PATTERN.match(text)
+    if match:
+        notes = match["notes"].strip()
+        if AMBIGUOUS_PATTERN.search(notes):
+            return None
+        kind = match["kind"].strip().lower().split()
+        arguments = {"raw_notes": notes}
+        if kind and kind[-1] in INTERACTION_TYPES:
+            arguments["interaction_type"] = INTERACTION_TYPES[kind[-1]]
+        return FastPathIntent("log_interaction", match["name"], arguments)
+    for pattern in PROFILE_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            return FastPathIntent("fetch_hcp_profile", match["name"])
+    return None
+
+
+async def resolve_hcp(session: AsyncSession, name: str) -> Optional[models.HCP]:
+    """The single HCP whose name contains every part of ``name``; None if none or several match."""
+    parts = [part for part in re.split(r"[\s.]+", name) if part and part.lower() not in NAME_TITLES]
+    if not parts:
+        return None
+    matches = (
+        await session.scalars(
+            select(models.HCP).where(and_(*(models.HCP.name.ilike(f"%{part}%") for part in parts))).limit(2)
+        )
+    ).all()
+    return matches[0] if len(matches) == 1 else None
+
+
+def _log_reply(hcp: models.HCP, result: dict[str, Any]) -> str:
+    if "error" in result:
+        return f"I couldn't log that interaction with {hcp.name}: {result['error']}."
+    reply = f"Logged interaction #{result['interaction_id']} with {hcp.name}."
+    if result.get("summary"):
+        reply = f"{reply} Summary: {result['summary']}"
+    return reply
+
+
+def _profile_reply(hcp: models.HCP, result: dict[str, Any]) -> str:
+    if "error" in result:
+        return f"I couldn't load the profile for {hcp.name}: {result['error']}."
+    profile = result["hcp"]
+    details = ", ".join(value for value in (profile.get("specialty"), profile.get("organization")) if value)
+    location = ", ".join(value for value in (profile.get("city"), profile.get("state")) if value)
+    lines = [profile["name"] + (f" - {details}" if details else "") + (f" ({location})" if location else "")]
+    if profile.get("tier"):
+        lines[0] += f", tier {profile['tier']}"
+    activity = result.get("activity")
+    if activity:
+        cadence = f", about every {activity['avg_days_between']:g} days" if activity.get("avg_days_between") else ""
+        last = f", last {activity['days_since_last']} days ago" if activity.get("days_since_last") is not None else ""
+        lines.append(f"{activity['interactions']} interactions{cadence}{last}.")
+    recent = result.get("recent_interactions") or []
+    if not recent:
+        lines.append("No interactions logged yet.")
+    else:
+        lines.append("Recent interactions:")
+        for interaction in recent:
+            date = (interaction.get("interaction_date") or "undated")[:10]
+            sentiment = f" ({interaction['sentiment']})" if interaction.get("sentiment") else ""
+            lines.append(f"- {date}: {interaction.get('summary') or 'No summary'}{sentiment}")
+    return "\n".join(lines)
+
+
+REPLIES = {"log_interaction": _log_reply, "fetch_hcp_profile": _profile_reply}
+
+
+def build_fast_path(tools: list[BaseTool]):
+    """Graph node that answers obvious intents by calling the tool directly with a templated reply.
+
+    Returns no messages when the turn should go to the LLM agent instead.
+    """
+    tools_by_name = {tool.name: tool for tool in tools}
+
+    async def fast_path(state: dict, config: RunnableConfig):
+        message = state["messages"][-1]
+        intent = None
+        if isinstance(message, HumanMessage) and isinstance(message.content, str):
+            intent = classify(message.content)
+        if intent is None:
+            FAST_PATH_DECISIONS.labels("none", "agent").inc()
+            return {"messages": []}
+
+        with track_stage("fast_path"):
+            configurable = config["configurable"]
+            async with configurable.get("read_session_factory", configurable["session_factory"])() as session:
+                hcp = await resolve_hcp(session, intent.hcp_name)
+            if hcp is None:
+                FAST_PATH_DECISIONS.labels(intent.tool, "fallback").inc()
+                return {"messages": []}
+
+            tool_call = {
+                "name": intent.tool,
+                "args": {**intent.arguments, "hcp_id": hcp.id},
+                "id": f"fast_path_{uuid.uuid4().hex}",
+                "type": "tool_call",
+            }
+            tool_message = await tools_by_name[intent.tool].ainvoke(tool_call, config)
+            try:
+                result = json.loads(tool_message.content)
+            except (json.JSONDecodeError, TypeError):
+                result = {"error": str(tool_message.content)}
+
+        FAST_PATH_DECISIONS.labels(intent.tool, "handled").inc()
+        LLM_CALLS_SAVED.inc(LLM_CALLS_PER_TURN)
+        increment("llm_calls_saved", LLM_CALLS_PER_TURN)
+        return {
+            "messages": [
+                AIMessage(content="", tool_calls=[tool_call]),
+                tool_message,
+                AIMessage(content=REPLIES[intent.tool](hcp, result)),
+            ]
+        }
+
+    return fast_path
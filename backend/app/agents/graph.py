@@ -1,53 +1,265 @@
 import json
-from typing import Annotated, TypedDict
+from functools import lru_cache
+from typing import Annotated, Any, NotRequired, TypedDict
 
-from langchain_core.messages import SystemMessage
-from langgraph.graph import StateGraph
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+    trim_messages,
+)
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_groq import ChatGroq
+from langgraph.prebuilt.tool_node import TOOL_CALL_ERROR_TEMPLATE
 
+from app.agents.checkpoint import SQLAlchemyCheckpointSaver
+from app.agents.fast_path import build_fast_path
+from app.agents.tool_selection import select_tools
 from app.agents.tools import build_tools
 from app.config import settings
+from app.services.llm import get_chat_model
+from app.services.llm_gateway import LLMGatewayBusy
+from app.services.metrics import increment, record_tool_calls, track_stage
+from app.services.token_budget import (
+    approx_tokens,
+    compact,
+    compact_json,
+    count_tokens,
+    fit_messages,
+    record_savings,
+    tool_schema_tokens,
+    truncate_text,
+)
 
 
 BASE_SYSTEM_PROMPT = (
     "You are an AI-first CRM assistant for life sciences field reps. "
     "Prefer tool usage when logging, editing, or reviewing HCP interactions. "
+    "Use log_interaction_with_compliance when a new interaction also needs a compliance review, "
+    "and request independent tools in the same turn so they run in parallel. "
     "Ask clarifying questions when required fields are missing."
 )
 
 
+HISTORY_SUMMARY_PROMPT = (
+    "Summarize this CRM assistant conversation for your own future reference. Keep HCP names and ids, "
+    "interaction ids, products, dates and any open questions. Extend the existing summary if one is given. "
+    "Respond with the summary only."
+)
+
+checkpointer = SQLAlchemyCheckpointSaver()
+
+
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    summary: NotRequired[str]
 
 
-def build_agent(
-    session,
-    model_override: str | None = None,
-    default_hcp_id: int | None = None,
-    hcp_context: dict | None = None,
-):
-    model_name = model_override or settings.groq_model
-    llm = ChatGroq(api_key=settings.groq_api_key, model_name=model_name)
-    tools = build_tools(session, llm, default_hcp_id=default_hcp_id)
-    llm_with_tools = llm.bind_tools(tools)
+def _system_message(hcp_context: dict | None, summary: str | None = None, compacted: bool = True) -> SystemMessage:
+    """``compacted=False`` renders the pre-budgeting prompt, only to report tokens saved."""
     system_content = BASE_SYSTEM_PROMPT
+    if compacted:
+        hcp_context = compact(hcp_context)
     if hcp_context:
+        context = compact_json(hcp_context) if compacted else json.dumps(hcp_context)
         system_content = (
-            f"{system_content} Active HCP context: {json.dumps(hcp_context)}. "
+            f"{system_content} Active HCP context: {context}. "
             "Use this HCP by default unless the user specifies a different one."
         )
-    system_message = SystemMessage(content=system_content)
+    if summary:
+        system_content = f"{system_content} Summary of earlier conversation: {summary}"
+    return SystemMessage(content=system_content)
+
+
+def _history_window(messages: list[BaseMessage], max_tokens: int) -> list[BaseMessage]:
+    """Most recent whole turns that fit ``max_tokens``; always keeps the current turn."""
+    window = trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        token_counter=approx_tokens,
+        strategy="last",
+        start_on="human",
+        allow_partial=False,
+    )
+    if window:
+        return window
+    last_human = max(index for index, message in enumerate(messages) if isinstance(message, HumanMessage))
+    return messages[last_human:]
+
+
+def _compact_tool_results(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Tool results re-serialized without null/empty fields; the stored messages keep the full output."""
+    compacted = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and isinstance(message.content, str):
+            try:
+                content = compact_json(json.loads(message.content))
+            except json.JSONDecodeError:
+                content = message.content
+            if len(content) < len(message.content):
+                message = message.model_copy(update={"content": content})
+        compacted.append(message)
+    return compacted
+
+
+def _summary_cutoff(messages: list[BaseMessage]) -> int:
+    """Index where the kept tail starts, moved back to a user turn so tool calls stay paired."""
+    cutoff = max(len(messages) - settings.agent_history_keep_messages, 0)
+    while cutoff > 0 and not isinstance(messages[cutoff], HumanMessage):
+        cutoff -= 1
+    return cutoff
+
+
+def agent_config(
+    session_factory,
+    read_session_factory=None,
+    default_hcp_id: int | None = None,
+    hcp_context: dict | None = None,
+    conversation_id: str | None = None,
+) -> dict[str, Any]:
+    """Per-request values the cached graph and its tools read from ``configurable``.
+
+    ``conversation_id`` is the checkpoint thread, so earlier turns are restored from the database.
+    Read-only tools use ``read_session_factory`` (a replica, if configured).
+    """
+    return {
+        "configurable": {
+            "thread_id": conversation_id,
+            "session_factory": session_factory,
+            "read_session_factory": read_session_factory or session_factory,
+            "default_hcp_id": default_hcp_id,
+            "hcp_context": hcp_context,
+        }
+    }
+
+
+class GatewayAwareToolNode(ToolNode):
+    """ToolNode that reports tool errors back to the model, except a busy LLM gateway.
 
-    def assistant(state: AgentState):
-        response = llm_with_tools.invoke([system_message] + state["messages"])
+    ``LLMGatewayBusy`` propagates out of the graph so the API answers 429 with
+    ``Retry-After`` instead of the model apologising for a failed tool.
+    """
+
+    def __init__(self, tools):
+        super().__init__(tools, handle_tool_errors=False)
+
+    @staticmethod
+    def _error_message(call, exc: Exception) -> ToolMessage:
+        return ToolMessage(TOOL_CALL_ERROR_TEMPLATE.format(error=repr(exc)), name=call["name"], tool_call_id=call["id"])
+
+    def _run_one(self, call, config):
+        try:
+            return super()._run_one(call, config)
+        except LLMGatewayBusy:
+            raise
+        except Exception as exc:
+            return self._error_message(call, exc)
+
+    async def _arun_one(self, call, config):
+        try:
+            return await super()._arun_one(call, config)
+        except LLMGatewayBusy:
+            raise
+        except Exception as exc:
+            return self._error_message(call, exc)
+
+
+def build_agent(model_name: str):
+    llm = get_chat_model(model_name)
+    tools = build_tools(llm)
+    tool_node = GatewayAwareToolNode(tools)
+    schema_tokens = {tool.name: tool_schema_tokens(tool) for tool in tools}
+    all_schema_tokens = sum(schema_tokens.values())
+    bound_llms: dict[tuple[str, ...], Any] = {}
+
+    def llm_for(tool_names: tuple[str, ...]):
+        if tool_names not in bound_llms:
+            bound_llms[tool_names] = llm.bind_tools([tool for tool in tools if tool.name in tool_names])
+        return bound_llms[tool_names]
+
+    async def assistant(state: AgentState, config: RunnableConfig):
+        hcp_context = config.get("configurable", {}).get("hcp_context")
+        messages = state["messages"]
+        selected = select_tools(messages) if settings.agent_tool_selection_enabled else None
+        tool_names = tuple(sorted(schema_tokens if selected is None else selected & schema_tokens.keys()))
+        system_message = _system_message(hcp_context, state.get("summary"))
+
+        fixed_tokens = approx_tokens([system_message]) + sum(schema_tokens[name] for name in tool_names)
+        history_budget = max(settings.llm_max_input_tokens - fixed_tokens, 0)
+        history = fit_messages(
+            _compact_tool_results(_history_window(messages, min(settings.agent_history_max_tokens, history_budget))),
+            history_budget,
+        )
+        unbudgeted = [_system_message(hcp_context, state.get("summary"), compacted=False)]
+        record_savings(
+            "agent",
+            approx_tokens(unbudgeted + _history_window(messages, settings.agent_history_max_tokens)) + all_schema_tokens,
+            fixed_tokens + approx_tokens(history),
+        )
+
+        increment("iterations")
+        with track_stage("assistant"):
+            response = await llm_for(tool_names).ainvoke([system_message] + history)
         return {"messages": [response]}
 
+    async def run_tools(state: AgentState, config: RunnableConfig):
+        record_tool_calls(state["messages"][-1].tool_calls)
+        with track_stage("tools"):
+            return await tool_node.ainvoke(state, config)
+
+    async def summarize_history(state: AgentState):
+        messages = state["messages"]
+        old_messages = messages[:_summary_cutoff(messages)]
+        transcript = "\n".join(f"{message.type}: {message.content}" for message in old_messages if message.content)
+        previous = state.get("summary")
+        if previous:
+            transcript = f"Existing summary: {previous}\n\n{transcript}"
+        budgeted = truncate_text(transcript, settings.llm_max_input_tokens - count_tokens(HISTORY_SUMMARY_PROMPT))
+        record_savings("summarize_history", count_tokens(transcript), count_tokens(budgeted))
+        with track_stage("summarize_history"):
+            response = await llm.ainvoke([SystemMessage(content=HISTORY_SUMMARY_PROMPT), HumanMessage(content=budgeted)])
+        return {
+            "summary": response.content,
+            "messages": [RemoveMessage(id=message.id) for message in old_messages],
+        }
+
+    def route_history(state: AgentState) -> str:
+        messages = state["messages"]
+        if len(messages) > settings.agent_history_max_messages and _summary_cutoff(messages) > 0:
+            return "summarize_history"
+        return "assistant"
+
+    def route_fast_path(state: AgentState) -> str:
+        if isinstance(state["messages"][-1], AIMessage):
+            return END
+        return route_history(state)
+
     graph = StateGraph(AgentState)
+    graph.add_node("summarize_history", summarize_history)
     graph.add_node("assistant", assistant)
-    graph.add_node("tools", ToolNode(tools))
+    graph.add_node("tools", run_tools)
+    if settings.agent_fast_path_enabled:
+        graph.add_node("fast_path", build_fast_path(tools))
+        graph.add_edge(START, "fast_path")
+        graph.add_conditional_edges("fast_path", route_fast_path, ["summarize_history", "assistant", END])
+    else:
+        graph.add_conditional_edges(START, route_history, ["summarize_history", "assistant"])
+    graph.add_edge("summarize_history", "assistant")
     graph.add_conditional_edges("assistant", tools_condition)
     graph.add_edge("tools", "assistant")
-    graph.set_entry_point("assistant")
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
+
+
+@lru_cache(maxsize=8)
+def _compiled_agent(model_name: str):
+    return build_agent(model_name)
+
+
+def get_agent(model_override: str | None = None):
+    """Return the compiled agent for a model, building it on first use."""
+    return _compiled_agent(model_override or settings.groq_model)
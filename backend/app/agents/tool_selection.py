@@ -0,0 +1,53 @@
+import re
+from typing import Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+
+# Keyword -> tools the request plausibly needs. A message matching nothing gets every tool.
+TOOL_INTENTS = [
+    (
+        re.compile(r"\b(?:log|record|met|meet|visit(?:ed)?|call(?:ed)?|meeting|spoke|discussed)\b", re.IGNORECASE),
+        ("log_interaction", "log_interaction_with_compliance"),
+    ),
+    (
+        re.compile(r"\b(?:edit|update|change|correct|fix|amend)\b", re.IGNORECASE),
+        ("edit_interaction", "search_interactions"),
+    ),
+    (
+        re.compile(r"\b(?:complian\w*|off-label|risk\w*|safety)\b", re.IGNORECASE),
+        ("check_compliance", "log_interaction_with_compliance"),
+    ),
+    (
+        re.compile(r"\b(?:suggest\w*|recommend\w*|next (?:best )?(?:action|step)s?|what should)\b", re.IGNORECASE),
+        ("suggest_next_best_action",),
+    ),
+    (
+        re.compile(r"\b(?:search|find|history|past|previous|last|when did|which)\b", re.IGNORECASE),
+        ("search_interactions",),
+    ),
+]
+# Cheap to describe and useful for resolving "this doctor" in almost any request.
+ALWAYS_AVAILABLE = ("fetch_hcp_profile",)
+
+
+def select_tools(messages: list[BaseMessage]) -> Optional[set[str]]:
+    """Tool names to expose for the current turn, or None for all of them."""
+    turn_start = next(
+        (index for index in range(len(messages) - 1, -1, -1) if isinstance(messages[index], HumanMessage)), None
+    )
+    if turn_start is None or not isinstance(messages[turn_start].content, str):
+        return None
+
+    selected = set()
+    for pattern, tool_names in TOOL_INTENTS:
+        if pattern.search(messages[turn_start].content):
+            selected.update(tool_names)
+    if not selected:
+        return None
+    selected.update(ALWAYS_AVAILABLE)
+    # Anything the model already called this turn stays callable.
+    for message in messages[turn_start:]:
+        if isinstance(message, AIMessage):
+            selected.update(tool_call["name"] for tool_call in message.tool_calls)
+    return selected
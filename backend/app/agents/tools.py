@@ -1,32 +1,32 @@
+import asyncio
 import json
 from datetime import datetime
 from typing import Any, Optional
 
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.db import models
+from app.services.activity_stats import (
+    fold_new_interactions,
+    hcp_stats,
+    interactions_created,
+    interactions_written,
+    llm_context,
+)
+from app.services.compliance import review_compliance
+from app.services.embeddings import aretrieve_context, embed_interactions
+from app.services.extraction import extraction_service
+from app.services.hcp_cache import hcp_profile_cache
+from app.services.model_router import model_router
+from app.services.search import search_interactions_query
+from app.services.token_budget import compact_json, count_tokens, record_savings
 
 
-SUMMARY_PROMPT = SystemMessage(
-    content=(
-        "You are a life sciences CRM assistant. Extract a concise summary and key entities "
-        "from HCP interaction notes. Return strict JSON with keys: summary, products_discussed, "
-        "sentiment, outcomes, next_steps, attendees. Use arrays for products_discussed."))
-
-COMPLIANCE_PROMPT = SystemMessage(
-    content=(
-        "You are a medical compliance reviewer for field interactions. Identify potential risks "
-        "(off-label claims, safety omissions, or unbalanced benefit statements). Return strict JSON "
-        "with keys: risk_level (low|medium|high), issues (array), suggested_remediation."))
-
-
-def _safe_json_loads(text: str) -> dict[str, Any]:
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        return {}
+ENTITY_FIELDS = ("summary", "products_discussed", "sentiment", "outcomes", "next_steps", "attendees")
 
 
 def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
@@ -38,53 +38,143 @@ def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
         return None
 
 
-def build_tools(session: Session, llm, default_hcp_id: Optional[int] = None):
-    def _resolve_hcp_id(hcp_id: Optional[int]) -> Optional[int]:
-        return hcp_id if hcp_id is not None else default_hcp_id
+def _session(config: RunnableConfig) -> AsyncSession:
+    # Each tool call gets its own session: the ToolNode runs async tool calls
+    # concurrently and an AsyncSession must not be shared between tasks.
+    return config["configurable"]["session_factory"]()
+
+
+def _read_session(config: RunnableConfig) -> AsyncSession:
+    return config["configurable"].get("read_session_factory", config["configurable"]["session_factory"])()
+
+
+def _resolve_hcp_id(hcp_id: Optional[int], config: RunnableConfig) -> Optional[int]:
+    return hcp_id if hcp_id is not None else config["configurable"].get("default_hcp_id")
+
+
+def _needs_extraction(raw_notes: str, fields: dict[str, Any]) -> bool:
+    return bool(raw_notes) and any(fields[field] is None for field in ("summary", "products_discussed", "sentiment"))
+
+
+async def _save_interaction(
+    config: RunnableConfig,
+    hcp_id: int,
+    raw_notes: str,
+    fields: dict[str, Any],
+    extracted_entities: Optional[dict[str, Any]],
+) -> models.Interaction:
+    """Insert a chat-logged interaction; values the rep gave win over extracted ones."""
+    if extracted_entities:
+        for field in ENTITY_FIELDS:
+            fields[field] = fields[field] or extracted_entities.get(field)
+    values = dict(
+        hcp_id=hcp_id,
+        interaction_type=fields["interaction_type"],
+        channel=fields["channel"],
+        interaction_date=_parse_datetime(fields["interaction_date"]),
+        summary=fields["summary"],
+        notes=raw_notes,
+        attendees=fields["attendees"],
+        outcomes=fields["outcomes"],
+        next_steps=fields["next_steps"],
+        products_discussed=fields["products_discussed"],
+        sentiment=fields["sentiment"],
+        extracted_entities=extracted_entities,
+        source="chat",
+    )
+    interaction = models.Interaction(**values)
+    async with _session(config) as session:
+        session.add(interaction)
+        unfolded = await session.run_sync(fold_new_interactions, [values])
+        await session.commit()
+        await session.refresh(interaction)
+    await interactions_created(config["configurable"]["session_factory"], [hcp_id], unfolded)
+    await embed_interactions(config["configurable"]["session_factory"], interaction.id)
+    return interaction
+
+
+def build_tools(llm):
+    """Tools for the agent. Extraction and compliance review go through the model router;
+    ``llm`` (the agent's model) only phrases next-best-action suggestions."""
+    extraction_llm = model_router.for_task("extraction")
+    compliance_llm = model_router.for_task("compliance")
 
     @tool("fetch_hcp_profile")
-    def fetch_hcp_profile(hcp_id: Optional[int] = None) -> dict[str, Any]:
+    async def fetch_hcp_profile(config: RunnableConfig, hcp_id: Optional[int] = None) -> dict[str, Any]:
         """Fetch HCP profile details with recent interactions."""
-        resolved_hcp_id = _resolve_hcp_id(hcp_id)
+        resolved_hcp_id = _resolve_hcp_id(hcp_id, config)
         if resolved_hcp_id is None:
             return {"error": "HCP id is required"}
 
-        hcp = session.query(models.HCP).filter(models.HCP.id == resolved_hcp_id).first()
-        if not hcp:
-            return {"error": "HCP not found"}
-
-        interactions = (
-            session.query(models.Interaction)
-            .filter(models.Interaction.hcp_id == resolved_hcp_id)
-            .order_by(models.Interaction.interaction_date.desc().nullslast())
-            .limit(3)
-            .all()
-        )
+        async with _read_session(config) as session:
+            profile = await hcp_profile_cache.get_profile(session, resolved_hcp_id)
+            if not profile:
+                return {"error": "HCP not found"}
+            activity = llm_context(await session.run_sync(hcp_stats, resolved_hcp_id))
 
         return {
-            "hcp": {
-                "id": hcp.id,
-                "name": hcp.name,
-                "specialty": hcp.specialty,
-                "organization": hcp.organization,
-                "city": hcp.city,
-                "state": hcp.state,
-                "tier": hcp.tier,
-            },
+            "hcp": profile["hcp"],
+            "activity": activity,
             "recent_interactions": [
+                {
+                    "id": interaction["id"],
+                    "summary": interaction["summary"],
+                    "interaction_date": interaction["interaction_date"],
+                    "sentiment": interaction["sentiment"],
+                }
+                for interaction in profile["recent_interactions"][:3]
+            ],
+        }
+
+    @tool("search_interactions")
+    async def search_interactions(
+        config: RunnableConfig,
+        query: Optional[str] = None,
+        products: Optional[list[str]] = None,
+        sentiment: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        specialty: Optional[str] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        hcp_id: Optional[int] = None,
+        limit: int = 10,
+    ) -> dict[str, Any]:
+        """Search past interactions by keywords in summary/notes/outcomes, products discussed,
+        sentiment, date range (ISO dates), or HCP specialty/city/state."""
+        async with _read_session(config) as session:
+            statement = search_interactions_query(
+                session.bind.dialect.name,
+                query=query,
+                products=products,
+                sentiment=sentiment,
+                date_from=_parse_datetime(date_from),
+                date_to=_parse_datetime(date_to),
+                specialty=specialty,
+                city=city,
+                state=state,
+                hcp_id=hcp_id,
+                limit=max(1, min(limit, 25)),
+            )
+            interactions = (await session.scalars(statement)).all()
+        return {
+            "results": [
                 {
                     "id": interaction.id,
-                    "summary": interaction.summary,
+                    "hcp_id": interaction.hcp_id,
                     "interaction_date": interaction.interaction_date.isoformat() if interaction.interaction_date else None,
+                    "summary": interaction.summary,
+                    "products_discussed": interaction.products_discussed,
                     "sentiment": interaction.sentiment,
                 }
                 for interaction in interactions
-            ],
+            ]
         }
 
     @tool("log_interaction")
-    def log_interaction(
+    async def log_interaction(
         raw_notes: str,
+        config: RunnableConfig,
         hcp_id: Optional[int] = None,
         interaction_type: Optional[str] = None,
         channel: Optional[str] = None,
@@ -97,44 +187,81 @@ def build_tools(session: Session, llm, default_hcp_id: Optional[int] = None):
         summary: Optional[str] = None,
     ) -> dict[str, Any]:
         """Log an HCP interaction. If summary or entities are missing, auto-extract them."""
-        resolved_hcp_id = _resolve_hcp_id(hcp_id)
+        resolved_hcp_id = _resolve_hcp_id(hcp_id, config)
         if resolved_hcp_id is None:
             return {"error": "HCP id is required"}
 
+        fields = {
+            "interaction_type": interaction_type,
+            "channel": channel,
+            "interaction_date": interaction_date,
+            "attendees": attendees,
+            "outcomes": outcomes,
+            "next_steps": next_steps,
+            "products_discussed": products_discussed,
+            "sentiment": sentiment,
+            "summary": summary,
+        }
         extracted_entities = None
-        if raw_notes and (summary is None or products_discussed is None or sentiment is None):
-            response = llm.invoke([SUMMARY_PROMPT, HumanMessage(content=raw_notes)])
-            extracted_entities = _safe_json_loads(getattr(response, "content", "") or "")
-            summary = summary or extracted_entities.get("summary")
-            products_discussed = products_discussed or extracted_entities.get("products_discussed")
-            sentiment = sentiment or extracted_entities.get("sentiment")
-            outcomes = outcomes or extracted_entities.get("outcomes")
-            next_steps = next_steps or extracted_entities.get("next_steps")
-            attendees = attendees or extracted_entities.get("attendees")
-
-        interaction = models.Interaction(
-            hcp_id=resolved_hcp_id,
-            interaction_type=interaction_type,
-            channel=channel,
-            interaction_date=_parse_datetime(interaction_date),
-            summary=summary,
-            notes=raw_notes,
-            attendees=attendees,
-            outcomes=outcomes,
-            next_steps=next_steps,
-            products_discussed=products_discussed,
-            sentiment=sentiment,
-            extracted_entities=extracted_entities,
-            source="chat",
-        )
-        session.add(interaction)
-        session.commit()
-        session.refresh(interaction)
+        if _needs_extraction(raw_notes, fields):
+            extracted_entities = await extraction_service.extract(extraction_llm, raw_notes)
+        interaction = await _save_interaction(config, resolved_hcp_id, raw_notes, fields, extracted_entities)
         return {"interaction_id": interaction.id, "summary": interaction.summary}
 
+    @tool("log_interaction_with_compliance")
+    async def log_interaction_with_compliance(
+        raw_notes: str,
+        config: RunnableConfig,
+        hcp_id: Optional[int] = None,
+        interaction_type: Optional[str] = None,
+        channel: Optional[str] = None,
+        interaction_date: Optional[str] = None,
+        attendees: Optional[str] = None,
+        outcomes: Optional[str] = None,
+        next_steps: Optional[str] = None,
+        products_discussed: Optional[list[str]] = None,
+        sentiment: Optional[str] = None,
+        summary: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Log an HCP interaction and review its notes for compliance risks in one step.
+        Use this instead of calling log_interaction and check_compliance separately."""
+        resolved_hcp_id = _resolve_hcp_id(hcp_id, config)
+        if resolved_hcp_id is None:
+            return {"error": "HCP id is required"}
+
+        fields = {
+            "interaction_type": interaction_type,
+            "channel": channel,
+            "interaction_date": interaction_date,
+            "attendees": attendees,
+            "outcomes": outcomes,
+            "next_steps": next_steps,
+            "products_discussed": products_discussed,
+            "sentiment": sentiment,
+            "summary": summary,
+        }
+        # Both LLM calls only need the raw notes, so they run side by side.
+        compliance_review = review_compliance(compliance_llm, raw_notes, products_discussed)
+        if _needs_extraction(raw_notes, fields):
+            extracted_entities, compliance = await asyncio.gather(
+                extraction_service.extract(extraction_llm, raw_notes), compliance_review, return_exceptions=True
+            )
+            if isinstance(extracted_entities, Exception):
+                raise extracted_entities
+        else:
+            extracted_entities = None
+            compliance = (await asyncio.gather(compliance_review, return_exceptions=True))[0]
+        if isinstance(compliance, Exception):
+            # The interaction is still worth saving; the rep can re-run the review.
+            compliance = {"error": f"Compliance review failed: {compliance}"}
+
+        interaction = await _save_interaction(config, resolved_hcp_id, raw_notes, fields, extracted_entities)
+        return {"interaction_id": interaction.id, "summary": interaction.summary, "compliance": compliance}
+
     @tool("edit_interaction")
-    def edit_interaction(
+    async def edit_interaction(
         interaction_id: int,
+        config: RunnableConfig,
         summary: Optional[str] = None,
         notes: Optional[str] = None,
         outcomes: Optional[str] = None,
@@ -143,85 +270,97 @@ def build_tools(session: Session, llm, default_hcp_id: Optional[int] = None):
         sentiment: Optional[str] = None,
     ) -> dict[str, Any]:
         """Edit an existing interaction record."""
-        interaction = (
-            session.query(models.Interaction)
-            .filter(models.Interaction.id == interaction_id)
-            .first()
-        )
-        if not interaction:
-            return {"error": "Interaction not found"}
-
-        if summary is not None:
-            interaction.summary = summary
-        if notes is not None:
-            interaction.notes = notes
-        if outcomes is not None:
-            interaction.outcomes = outcomes
-        if next_steps is not None:
-            interaction.next_steps = next_steps
-        if products_discussed is not None:
-            interaction.products_discussed = products_discussed
-        if sentiment is not None:
-            interaction.sentiment = sentiment
-
-        session.commit()
-        session.refresh(interaction)
+        async with _session(config) as session:
+            interaction = await session.get(models.Interaction, interaction_id)
+            if not interaction:
+                return {"error": "Interaction not found"}
+
+            if summary is not None:
+                interaction.summary = summary
+            if notes is not None:
+                interaction.notes = notes
+            if outcomes is not None:
+                interaction.outcomes = outcomes
+            if next_steps is not None:
+                interaction.next_steps = next_steps
+            if products_discussed is not None:
+                interaction.products_discussed = products_discussed
+            if sentiment is not None:
+                interaction.sentiment = sentiment
+
+            await session.commit()
+            await session.refresh(interaction)
+        await interactions_written(config["configurable"]["session_factory"], interaction.hcp_id)
+        await embed_interactions(config["configurable"]["session_factory"], interaction.id)
         return {"interaction_id": interaction.id, "summary": interaction.summary}
 
     @tool("suggest_next_best_action")
-    def suggest_next_best_action(hcp_id: Optional[int] = None) -> dict[str, Any]:
+    async def suggest_next_best_action(config: RunnableConfig, hcp_id: Optional[int] = None) -> dict[str, Any]:
         """Provide a recommended next action for the rep."""
-        resolved_hcp_id = _resolve_hcp_id(hcp_id)
+        resolved_hcp_id = _resolve_hcp_id(hcp_id, config)
         if resolved_hcp_id is None:
             return {"error": "HCP id is required"}
 
-        hcp = session.query(models.HCP).filter(models.HCP.id == resolved_hcp_id).first()
-        if not hcp:
-            return {"error": "HCP not found"}
+        async with _read_session(config) as session:
+            profile = await hcp_profile_cache.get_profile(session, resolved_hcp_id)
+            if not profile:
+                return {"error": "HCP not found"}
+            activity = llm_context(await session.run_sync(hcp_stats, resolved_hcp_id))
+            hcp = profile["hcp"]
+            last_interaction = profile["recent_interactions"][0] if profile["recent_interactions"] else {}
+            # Older or peer interactions that resemble the latest one, instead of the full history.
+            query = " ".join(
+                filter(None, [last_interaction.get("summary"), last_interaction.get("next_steps"), hcp["specialty"]])
+            )
+            relevant_history = await aretrieve_context(
+                session,
+                resolved_hcp_id,
+                query,
+                settings.nba_retrieval_top_k,
+                settings.nba_retrieval_max_tokens,
+                [last_interaction["id"]] if last_interaction else [],
+                settings.nba_retrieval_candidates,
+            )
 
-        last_interaction = (
-            session.query(models.Interaction)
-            .filter(models.Interaction.hcp_id == resolved_hcp_id)
-            .order_by(models.Interaction.interaction_date.desc().nullslast())
-            .first()
-        )
         context = {
             "hcp": {
-                "name": hcp.name,
-                "specialty": hcp.specialty,
-                "organization": hcp.organization,
-                "tier": hcp.tier,
+                "name": hcp["name"],
+                "specialty": hcp["specialty"],
+                "organization": hcp["organization"],
+                "tier": hcp["tier"],
             },
             "last_interaction": {
-                "summary": last_interaction.summary if last_interaction else None,
-                "outcomes": last_interaction.outcomes if last_interaction else None,
-                "next_steps": last_interaction.next_steps if last_interaction else None,
+                "summary": last_interaction.get("summary"),
+                "outcomes": last_interaction.get("outcomes"),
+                "next_steps": last_interaction.get("next_steps"),
             },
+            # Whole-history rollup instead of sending older interactions.
+            "activity": activity,
+            "relevant_history": relevant_history,
         }
-        response = llm.invoke(
+        content = compact_json(context)
+        record_savings("next_best_action", count_tokens(json.dumps(context)), count_tokens(content))
+        response = await llm.ainvoke(
             [
                 SystemMessage(
                     content=(
                         "You are a CRM assistant. Suggest a concise next best action for a rep "
                         "based on the HCP context. Respond in 2-3 sentences.")),
-                HumanMessage(content=json.dumps(context)),
+                HumanMessage(content=content),
             ]
         )
         return {"recommendation": getattr(response, "content", "")}
 
     @tool("check_compliance")
-    def check_compliance(raw_notes: str, products_discussed: Optional[list[str]] = None) -> dict[str, Any]:
+    async def check_compliance(raw_notes: str, products_discussed: Optional[list[str]] = None) -> dict[str, Any]:
         """Check compliance risks in the interaction notes."""
-        payload = {
-            "notes": raw_notes,
-            "products_discussed": products_discussed or [],
-        }
-        response = llm.invoke([COMPLIANCE_PROMPT, HumanMessage(content=json.dumps(payload))])
-        return _safe_json_loads(getattr(response, "content", "") or "")
+        return await review_compliance(compliance_llm, raw_notes, products_discussed)
 
     return [
         fetch_hcp_profile,
+        search_interactions,
         log_interaction,
+        log_interaction_with_compliance,
         edit_interaction,
         suggest_next_best_action,
         check_compliance,
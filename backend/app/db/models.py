@@ -1,9 +1,43 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, String, Text, func
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    LargeBinary,
+    String,
+    Text,
+    event,
+    func,
+    literal_column,
+)
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
 
 
+def search_vector(summary, notes, outcomes):
+    """Postgres tsvector over summary/notes/outcomes.
+
+    The GIN index on interactions is built from this expression; search queries
+    must use the same expression for the planner to pick the index.
+    """
+    def text(column):
+        return func.coalesce(column, literal_column("''"))
+
+    document = text(summary).op("||")(literal_column("' '")).op("||")(text(notes))
+    document = document.op("||")(literal_column("' '")).op("||")(text(outcomes))
+    return func.to_tsvector(literal_column("'english'"), document)
+
+
+# MySQL's BLOB tops out at 64KB, too small for long conversation checkpoints.
+Blob = LargeBinary().with_variant(mysql.LONGBLOB(), "mysql")
+
+
 class HCP(Base):
     __tablename__ = "hcps"
 
@@ -18,6 +52,11 @@ class HCP(Base):
 
     interactions = relationship("Interaction", back_populates="hcp")
 
+    __table_args__ = (
+        # Matches the (name, id) keyset order of GET /hcps.
+        Index("ix_hcps_name_id", name, id),
+    )
+
 
 class Interaction(Base):
     __tablename__ = "interactions"
@@ -36,7 +75,169 @@ class Interaction(Base):
     sentiment = Column(String(50), nullable=True)
     extracted_entities = Column(JSON, nullable=True)
     source = Column(String(50), nullable=False, default="form")
+    raw_notes = Column(Text, nullable=True)
+    # pending -> processing -> completed | failed; NULL when no LLM enrichment was requested.
+    enrichment_status = Column(String(20), nullable=True)
+    enrichment_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    enrichment_error = Column(Text, nullable=True)
+    # Earliest retry time while pending; lease expiry while processing.
+    enrichment_next_attempt_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     hcp = relationship("HCP", back_populates="interactions")
+
+    __table_args__ = (
+        # Matches the (interaction_date DESC, id DESC) keyset order of GET /interactions.
+        Index("ix_interactions_hcp_id_interaction_date", hcp_id, interaction_date.desc(), id.desc()),
+        # Full-text search over summary/notes/outcomes, one native index per backend;
+        # SQLite uses the FTS5 table created below.
+        Index(
+            "ix_interactions_search_tsv",
+            search_vector(summary, notes, outcomes),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_interactions_fulltext", summary, notes, outcomes, mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        Index("ix_interactions_enrichment_queue", enrichment_status, enrichment_next_attempt_at),
+        # Incremental exports scan by updated_at watermark.
+        Index("ix_interactions_updated_at", updated_at, id),
+    )
+
+
+# SQLite full-text search: an external-content FTS5 table kept in sync by triggers.
+for _statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts USING fts5("
+    "summary, notes, outcomes, content='interactions', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS interactions_fts_ai AFTER INSERT ON interactions BEGIN "
+    "INSERT INTO interactions_fts(rowid, summary, notes, outcomes) "
+    "VALUES (new.id, new.summary, new.notes, new.outcomes); END",
+    "CREATE TRIGGER IF NOT EXISTS interactions_fts_ad AFTER DELETE ON interactions BEGIN "
+    "INSERT INTO interactions_fts(interactions_fts, rowid, summary, notes, outcomes) "
+    "VALUES ('delete', old.id, old.summary, old.notes, old.outcomes); END",
+    "CREATE TRIGGER IF NOT EXISTS interactions_fts_au AFTER UPDATE ON interactions BEGIN "
+    "INSERT INTO interactions_fts(interactions_fts, rowid, summary, notes, outcomes) "
+    "VALUES ('delete', old.id, old.summary, old.notes, old.outcomes); "
+    "INSERT INTO interactions_fts(rowid, summary, notes, outcomes) "
+    "VALUES (new.id, new.summary, new.notes, new.outcomes); END",
+):
+    event.listen(Interaction.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+def newest_first(dialect: str) -> list:
+    """ORDER BY for interactions newest first, undated last, then by id.
+
+    MySQL has no ``NULLS LAST``; sorting on ``interaction_date IS NULL`` first
+    puts undated rows at the end there.
+    """
+    interaction_date = Interaction.interaction_date
+    if dialect in ("postgresql", "sqlite"):
+        return [interaction_date.desc().nullslast(), Interaction.id.desc()]
+    return [interaction_date.is_(None), interaction_date.desc(), Interaction.id.desc()]
+
+
+class HCPActivityStats(Base):
+    """Per-HCP rollup of interaction history, refreshed on every interaction write."""
+
+    __tablename__ = "hcp_activity_stats"
+
+    hcp_id = Column(Integer, ForeignKey("hcps.id"), primary_key=True)
+    interaction_count = Column(Integer, nullable=False, default=0)
+    first_interaction_at = Column(DateTime(timezone=True), nullable=True)
+    last_interaction_at = Column(DateTime(timezone=True), nullable=True)
+    avg_days_between_interactions = Column(Float, nullable=True)
+    sentiment_counts = Column(JSON, nullable=False, default=dict)
+    # Newest first, capped; the trend compares its newer and older halves.
+    recent_sentiments = Column(JSON, nullable=False, default=list)
+    sentiment_trend = Column(String(20), nullable=True)
+    product_counts = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ExtractionCacheEntry(Base):
+    __tablename__ = "extraction_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class InteractionEmbedding(Base):
+    """Embedding of an interaction's summary, outcomes and next steps, as float32 bytes."""
+
+    __tablename__ = "interaction_embeddings"
+
+    interaction_id = Column(Integer, ForeignKey("interactions.id", ondelete="CASCADE"), primary_key=True)
+    hcp_id = Column(Integer, ForeignKey("hcps.id"), nullable=False, index=True)
+    # Embedder name and dimensions; rows from another embedder are ignored and re-embedded.
+    model = Column(String(100), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ComplianceReview(Base):
+    """Batch compliance review of an interaction under one version of the prompt and prefilter rules."""
+
+    __tablename__ = "compliance_reviews"
+
+    interaction_id = Column(Integer, ForeignKey("interactions.id", ondelete="CASCADE"), primary_key=True)
+    # Hash of COMPLIANCE_PROMPT and the prefilter rules; a new version re-reviews every interaction.
+    prompt_hash = Column(String(64), primary_key=True)
+    # Hash of the reviewed notes and products; an edited interaction is reviewed again.
+    content_hash = Column(String(64), nullable=False)
+    # prefilter (no rule matched, so the LLM was not asked) | llm
+    reviewed_by = Column(String(20), nullable=False)
+    risk_level = Column(String(10), nullable=False)
+    issues = Column(JSON, nullable=False, default=list)
+    suggested_remediation = Column(Text, nullable=True)
+    prefilter_flags = Column(JSON, nullable=False, default=list)
+    reviewed_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_compliance_reviews_prompt_hash_risk_level", prompt_hash, risk_level),)
+
+
+class IdempotencyKey(Base):
+    """A client-supplied ``Idempotency-Key`` and the response it produced.
+
+    The row is inserted before the request runs; the primary key makes concurrent
+    duplicates fail at the database. ``status_code`` stays null until it completes.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(32), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class AgentCheckpoint(Base):
+    __tablename__ = "agent_checkpoints"
+
+    thread_id = Column(String(255), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    parent_checkpoint_id = Column(String(64), nullable=True)
+    type = Column(String(50), nullable=True)
+    checkpoint = Column(Blob, nullable=False)
+    metadata_type = Column(String(50), nullable=True)
+    checkpoint_metadata = Column("metadata", Blob, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AgentCheckpointWrite(Base):
+    __tablename__ = "agent_checkpoint_writes"
+
+    thread_id = Column(String(255), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    task_id = Column(String(64), primary_key=True)
+    idx = Column(Integer, primary_key=True, autoincrement=False)
+    channel = Column(String(255), nullable=False)
+    type = Column(String(50), nullable=True)
+    value = Column(Blob, nullable=True)
@@ -0,0 +1,44 @@
+"""Demo HCPs for a fresh database. Run ``python -m app.db.seed`` from ``backend/`` after migrating."""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import SessionLocal
+
+
+DEMO_HCPS = (
+    dict(
+        name="Dr. Anaya Iyer",
+        specialty="Cardiology",
+        organization="Northbridge Medical Center",
+        city="Pune",
+        state="MH",
+        tier="A",
+    ),
+    dict(
+        name="Dr. Kunal Mehta",
+        specialty="Endocrinology",
+        organization="Sunrise Hospitals",
+        city="Ahmedabad",
+        state="GJ",
+        tier="B",
+    ),
+)
+
+
+def seed_demo_hcps(session: Session) -> int:
+    """Add the demo HCPs if the table is empty; returns the number added."""
+    if session.scalar(select(models.HCP.id).limit(1)) is not None:
+        return 0
+    session.add_all(models.HCP(**values) for values in DEMO_HCPS)
+    session.commit()
+    return len(DEMO_HCPS)
+
+
+def main() -> None:
+    with SessionLocal() as session:
+        print(f"added {seed_demo_hcps(session)} HCPs")
+
+
+if __name__ == "__main__":
+    main()
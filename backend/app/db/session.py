@@ -1,11 +1,60 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.services.metrics import instrument_engine
 
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+
+def _async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def _engine_options(database_url: str) -> dict:
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    # SQLite uses a per-file or null pool that takes no sizing arguments.
+    if make_url(database_url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+        )
+    return options
+
+
+def _create_engines(database_url: str, async_database_url: str | None):
+    sync_engine = create_engine(database_url, **_engine_options(database_url))
+    async_url = async_database_url or _async_database_url(database_url)
+    async_engine = create_async_engine(async_url, **_engine_options(async_url))
+    instrument_engine(sync_engine)
+    instrument_engine(async_engine.sync_engine)
+    return sync_engine, async_engine
+
+
+engine, async_engine = _create_engines(settings.database_url, settings.async_database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Reads that tolerate replica lag go here; without DATABASE_READ_URL these are the primary.
+if settings.database_read_url:
+    read_engine, async_read_engine = _create_engines(settings.database_read_url, settings.async_database_read_url)
+else:
+    read_engine, async_read_engine = engine, async_engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
 
 
 def get_session():
@@ -14,3 +63,16 @@ def get_session():
         yield session
     finally:
         session.close()
+
+
+def get_read_session():
+    session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+async def get_async_session():
+    async with AsyncSessionLocal() as session:
+        yield session
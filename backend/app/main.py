@@ -1,10 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db.base import Base
-from app.db.session import SessionLocal, engine
-from app.db import models
-from app.routers import agent, hcps, interactions
+from app.config import settings
+
+from app.db.seed import seed_demo_hcps
+from app.db.session import SessionLocal
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers import agent, compliance, hcps, interactions, metrics
+from app.routers.interactions import EXPORT_WATERMARK_HEADER
+from app.services.idempotency import REPLAYED_HEADER
+from app.services.llm_gateway import REP_HEADER, LLMGatewayBusy, rep_scope, retry_after_header
+from app.services.enrichment import enrichment_queue
+from app.services.metrics import finish_request, request_scope
 
 
 app = FastAPI(title="AI-First CRM HCP Module")
@@ -15,38 +23,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing", REPLAYED_HEADER, EXPORT_WATERMARK_HEADER],
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    with request_scope() as request_metrics, rep_scope(request.headers.get(REP_HEADER)):
+        response = await call_next(request)
+    if settings.metrics_timing_header:
+        # Streamed bodies are still running here, so this covers time to first byte.
+        response.headers["Server-Timing"] = request_metrics.server_timing()
+
+    body_iterator = response.body_iterator
+    route = request.scope.get("route")
+
+    async def instrumented_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            finish_request(request_metrics, request.method, getattr(route, "path", "unmatched"), response.status_code)
+
+    response.body_iterator = instrumented_body()
+    return response
+
+
+@app.exception_handler(LLMGatewayBusy)
+async def llm_gateway_busy(request: Request, exc: LLMGatewayBusy):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": retry_after_header(exc)},
+    )
+
+
+@app.on_event("startup")
+def seed_demo_data():
+    # The schema comes from ``alembic upgrade head``; startup runs no DDL.
+    if settings.seed_demo_data:
+        with SessionLocal() as session:
+            seed_demo_hcps(session)
+
+
 @app.on_event("startup")
-def on_startup():
-    Base.metadata.create_all(bind=engine)
-    session = SessionLocal()
-    try:
-        if session.query(models.HCP).count() == 0:
-            session.add_all(
-                [
-                    models.HCP(
-                        name="Dr. Anaya Iyer",
-                        specialty="Cardiology",
-                        organization="Northbridge Medical Center",
-                        city="Pune",
-                        state="MH",
-                        tier="A",
-                    ),
-                    models.HCP(
-                        name="Dr. Kunal Mehta",
-                        specialty="Endocrinology",
-                        organization="Sunrise Hospitals",
-                        city="Ahmedabad",
-                        state="GJ",
-                        tier="B",
-                    ),
-                ]
-            )
-            session.commit()
-    finally:
-        session.close()
+async def start_enrichment_workers():
+    if settings.enrichment_workers > 0:
+        enrichment_queue.start(settings.enrichment_workers)
+
+
+@app.on_event("shutdown")
+async def stop_enrichment_workers():
+    await enrichment_queue.stop()
 
 
 @app.get("/")
@@ -57,3 +85,5 @@ def root():
 app.include_router(hcps.router)
 app.include_router(interactions.router)
 app.include_router(agent.router)
+app.include_router(compliance.router)
+app.include_router(metrics.router)
@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, get_args
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def _cursor_value(value: Any, kind: Any) -> Any:
+    if value is None and type(None) in get_args(kind):
+        return None
+    kind = next((arg for arg in get_args(kind) if arg is not type(None)), kind)
+    if kind is datetime:
+        if not isinstance(value, str):
+            raise ValueError(value)
+        return datetime.fromisoformat(value)
+    # Exact match: JSON true/false would otherwise pass as an int.
+    if type(value) is not kind or (kind is int and abs(value) >= 2**63):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, *kinds: Any) -> list[Any]:
+    """Values of an ``encode_cursor`` cursor, one per kind (``int``, ``str``, ``datetime``
+    or ``Optional`` of one); datetimes are parsed. Anything else is a 400."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(kinds):
+            raise ValueError(values)
+        return [_cursor_value(value, kind) for value, kind in zip(values, kinds)]
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_fields(fields: Optional[str], allowed: set[str]) -> Optional[list[str]]:
+    """Split a ``fields=a,b`` projection, always keeping ``id``."""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def projected_response(rows: list, fields: list[str], next_cursor: Optional[str]) -> JSONResponse:
+    content = [{field: getattr(row, field) for field in fields} for row in rows]
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return JSONResponse(jsonable_encoder(content), headers=headers)
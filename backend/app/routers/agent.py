@@ -1,67 +1,179 @@
 import json
-from typing import Optional
+import uuid
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
 
-from app.agents.graph import build_agent
-from app.db import models
-from app.db.session import get_session
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal
 from app.schemas import AgentChatRequest, AgentChatResponse, AgentMessage
+from app.services.hcp_cache import hcp_profile_cache
+from app.services.idempotency import idempotency_store, request_hash
+
+if TYPE_CHECKING:
+    from langchain_core.messages import HumanMessage, ToolMessage
 
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
 
+def _tool_payload(message: "ToolMessage") -> Any:
+    try:
+        return json.loads(message.content)
+    except (json.JSONDecodeError, TypeError):
+        return message.content
+
+
 def _extract_interaction_id(messages: list) -> Optional[int]:
     for message in messages:
-        if isinstance(message, ToolMessage):
-            try:
-                payload = json.loads(message.content)
-            except json.JSONDecodeError:
-                continue
+        if message.type == "tool":
+            payload = _tool_payload(message)
             if isinstance(payload, dict) and "interaction_id" in payload:
                 return payload["interaction_id"]
     return None
 
 
 def _serialize_message(message) -> AgentMessage:
-    if isinstance(message, HumanMessage):
+    # Checked by ``type`` so LangChain's message classes are not imported with the router.
+    message_type = getattr(message, "type", None)
+    if message_type == "human":
         return AgentMessage(role="user", content=message.content)
-    if isinstance(message, AIMessage):
+    if message_type == "ai":
         return AgentMessage(role="assistant", content=message.content or "", tool_calls=message.tool_calls)
-    if isinstance(message, ToolMessage):
+    if message_type == "tool":
         return AgentMessage(role="tool", content=message.content)
     return AgentMessage(role="assistant", content=str(message))
 
 
+def _turn_input(payload: AgentChatRequest) -> tuple[str, "HumanMessage"]:
+    from langchain_core.messages import HumanMessage
+
+    conversation_id = payload.conversation_id or uuid.uuid4().hex
+    return conversation_id, HumanMessage(content=payload.message, id=uuid.uuid4().hex)
+
+
+def _current_turn(messages: list, human_message: "HumanMessage") -> list:
+    """The checkpointed state holds the whole conversation; responses only carry this turn."""
+    for index, message in enumerate(messages):
+        if message.id == human_message.id:
+            return messages[index:]
+    return messages
+
+
+async def _hcp_context(hcp_id: Optional[int]) -> Optional[dict]:
+    if hcp_id is None:
+        return None
+    # A short-lived session: a request-scoped one would hold its connection for the whole agent run.
+    async with AsyncReadSessionLocal() as session:
+        profile = await hcp_profile_cache.get_profile(session, hcp_id)
+    return profile["hcp"] if profile else None
+
+
 @router.post("/chat", response_model=AgentChatResponse)
-def chat(payload: AgentChatRequest, session: Session = Depends(get_session)):
-    hcp_context = None
-    if payload.hcp_id is not None:
-        hcp = session.query(models.HCP).filter(models.HCP.id == payload.hcp_id).first()
-        if hcp:
-            hcp_context = {
-                "id": hcp.id,
-                "name": hcp.name,
-                "specialty": hcp.specialty,
-                "organization": hcp.organization,
-                "city": hcp.city,
-                "state": hcp.state,
-                "tier": hcp.tier,
-            }
-
-    agent = build_agent(
-        session,
-        model_override=payload.model,
-        default_hcp_id=payload.hcp_id,
-        hcp_context=hcp_context,
+async def chat(payload: AgentChatRequest, idempotency_key: Optional[str] = Header(None)):
+    """Run one agent turn. A retry with the same ``Idempotency-Key`` header replays the first response."""
+    if idempotency_key is None:
+        return await _chat(payload)
+    replay = await idempotency_store.claim("agent.chat", idempotency_key, request_hash(payload))
+    if replay is not None:
+        return replay
+    try:
+        response = await _chat(payload)
+    except BaseException:
+        await idempotency_store.release("agent.chat", idempotency_key)
+        raise
+    await idempotency_store.complete("agent.chat", idempotency_key, 200, response.model_dump(mode="json"))
+    return response
+
+
+async def _chat(payload: AgentChatRequest) -> AgentChatResponse:
+    # The agent graph pulls in LangGraph and the LLM clients; load it with the first chat, not at startup.
+    from app.agents.graph import agent_config, get_agent
+
+    hcp_context = await _hcp_context(payload.hcp_id)
+    conversation_id, human_message = _turn_input(payload)
+    agent = get_agent(payload.model)
+    result = await agent.ainvoke(
+        {"messages": [human_message]},
+        config=agent_config(
+            AsyncSessionLocal,
+            AsyncReadSessionLocal,
+            default_hcp_id=payload.hcp_id,
+            hcp_context=hcp_context,
+            conversation_id=conversation_id,
+        ),
     )
-    result = agent.invoke({"messages": [HumanMessage(content=payload.message)]})
-    messages = result.get("messages", [])
+    messages = _current_turn(result.get("messages", []), human_message)
     interaction_id = _extract_interaction_id(messages)
     return AgentChatResponse(
         messages=[_serialize_message(message) for message in messages],
         interaction_id=interaction_id,
+        conversation_id=conversation_id,
+    )
+
+
+def _ndjson(event: dict[str, Any]) -> str:
+    return json.dumps(event, default=str) + "\n"
+
+
+async def _chat_events(payload: AgentChatRequest, hcp_context: Optional[dict]) -> AsyncIterator[str]:
+    from app.agents.graph import agent_config, get_agent
+
+    conversation_id, human_message = _turn_input(payload)
+    agent = get_agent(payload.model)
+    config = agent_config(
+        AsyncSessionLocal,
+        AsyncReadSessionLocal,
+        default_hcp_id=payload.hcp_id,
+        hcp_context=hcp_context,
+        conversation_id=conversation_id,
+    )
+    interaction_id = None
+    streamed_runs = set()
+    try:
+        async for event in agent.astream_events(
+            {"messages": [human_message]},
+            config=config,
+            version="v2",
+        ):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+            if kind == "on_chat_model_stream" and node == "assistant":
+                content = event["data"]["chunk"].content
+                if content:
+                    streamed_runs.add(event["run_id"])
+                    yield _ndjson({"type": "token", "content": content})
+            elif kind == "on_chat_model_end" and node == "assistant":
+                # Models without token streaming only report the final message.
+                content = getattr(event["data"].get("output"), "content", "")
+                if content and event["run_id"] not in streamed_runs:
+                    yield _ndjson({"type": "token", "content": content})
+            elif kind == "on_chain_end" and event["name"] == "fast_path":
+                messages = (event["data"].get("output") or {}).get("messages") or []
+                if messages and messages[-1].type == "ai" and messages[-1].content:
+                    yield _ndjson({"type": "token", "content": messages[-1].content})
+            elif kind == "on_tool_start":
+                yield _ndjson({"type": "tool_start", "name": event["name"], "input": event["data"].get("input")})
+            elif kind == "on_tool_end":
+                output = event["data"].get("output")
+                result = _tool_payload(output) if getattr(output, "type", None) == "tool" else output
+                tool_event = {"type": "tool_end", "name": event["name"], "output": result}
+                if isinstance(result, dict) and "interaction_id" in result:
+                    interaction_id = result["interaction_id"]
+                    tool_event["interaction_id"] = interaction_id
+                yield _ndjson(tool_event)
+    except Exception as exc:
+        yield _ndjson({"type": "error", "detail": str(exc)})
+        return
+    yield _ndjson({"type": "done", "interaction_id": interaction_id, "conversation_id": conversation_id})
+
+
+@router.post("/chat/stream")
+async def chat_stream(payload: AgentChatRequest):
+    """Stream the agent run as NDJSON events: token, tool_start, tool_end, done (or error)."""
+    hcp_context = await _hcp_context(payload.hcp_id)
+    return StreamingResponse(
+        _chat_events(payload, hcp_context),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
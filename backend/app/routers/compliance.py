@@ -0,0 +1,63 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import get_read_session
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.schemas import ComplianceReviewOut
+
+
+router = APIRouter(prefix="/compliance", tags=["compliance"])
+
+
+@router.get("/reviews", response_model=list[ComplianceReviewOut])
+def list_compliance_reviews(
+    response: Response,
+    risk_level: Optional[Literal["low", "medium", "high"]] = None,
+    hcp_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_read_session),
+):
+    """Batch scan results under the current prompt and rules, newest interaction first.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next page.
+    """
+    # Hashing the prompt loads the LLM services, which API startup leaves for first use.
+    from app.services.compliance_scan import review_version
+
+    review = models.ComplianceReview
+    query = (
+        select(review, models.Interaction.hcp_id)
+        .join(models.Interaction, models.Interaction.id == review.interaction_id)
+        .where(review.prompt_hash == review_version())
+    )
+    if risk_level is not None:
+        query = query.where(review.risk_level == risk_level)
+    if hcp_id is not None:
+        query = query.where(models.Interaction.hcp_id == hcp_id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(review.interaction_id < last_id)
+
+    rows = session.execute(query.order_by(review.interaction_id.desc()).limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1][0].interaction_id)
+    return [
+        ComplianceReviewOut(
+            interaction_id=row.interaction_id,
+            hcp_id=hcp_id,
+            risk_level=row.risk_level,
+            issues=row.issues,
+            suggested_remediation=row.suggested_remediation,
+            prefilter_flags=row.prefilter_flags,
+            reviewed_by=row.reviewed_by,
+            reviewed_at=row.reviewed_at,
+            prompt_hash=row.prompt_hash,
+        )
+        for row, hcp_id in rows
+    ]
@@ -1,17 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, load_only
 
 from app.db import models
-from app.db.session import get_session
-from app.schemas import HCPCreate, HCPOut
+from app.db.seed import seed_demo_hcps
+from app.db.session import get_read_session, get_session
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, parse_fields, projected_response
+from app.schemas import HCPActivityStatsOut, HCPCreate, HCPOut
+from app.services.activity_stats import hcp_stats
 
 
 router = APIRouter(prefix="/hcps", tags=["hcps"])
 
 
 @router.get("", response_model=list[HCPOut])
-def list_hcps(session: Session = Depends(get_session)):
-    return session.query(models.HCP).order_by(models.HCP.name).all()
+def list_hcps(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: Session = Depends(get_read_session),
+):
+    """Ordered by name, keyset-paginated on (name, id) via the ``X-Next-Cursor`` header."""
+    projection = parse_fields(fields, set(HCPOut.model_fields))
+
+    query = session.query(models.HCP)
+    if projection:
+        columns = {getattr(models.HCP, field) for field in projection}
+        query = query.options(load_only(*columns, models.HCP.name))
+    if cursor:
+        last_name, last_id = decode_cursor(cursor, str, int)
+        query = query.filter(
+            or_(models.HCP.name > last_name, and_(models.HCP.name == last_name, models.HCP.id > last_id))
+        )
+
+    rows = query.order_by(models.HCP.name, models.HCP.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].name, rows[-1].id)
+
+    if projection:
+        return projected_response(rows, projection, next_cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
+@router.get("/{hcp_id}/stats", response_model=HCPActivityStatsOut)
+def get_hcp_stats(hcp_id: int, session: Session = Depends(get_read_session)):
+    """Visit cadence, recency, sentiment trend and product counts over the HCP's whole history."""
+    if session.get(models.HCP, hcp_id) is None:
+        raise HTTPException(status_code=404, detail="HCP not found")
+    return hcp_stats(session, hcp_id)
 
 
 @router.post("", response_model=HCPOut)
@@ -25,28 +68,5 @@ def create_hcp(payload: HCPCreate, session: Session = Depends(get_session)):
 
 @router.post("/seed", response_model=list[HCPOut])
 def seed_hcps(session: Session = Depends(get_session)):
-    existing = session.query(models.HCP).count()
-    if existing:
-        return session.query(models.HCP).order_by(models.HCP.name).all()
-
-    seed_data = [
-        models.HCP(
-            name="Dr. Anaya Iyer",
-            specialty="Cardiology",
-            organization="Northbridge Medical Center",
-            city="Pune",
-            state="MH",
-            tier="A",
-        ),
-        models.HCP(
-            name="Dr. Kunal Mehta",
-            specialty="Endocrinology",
-            organization="Sunrise Hospitals",
-            city="Ahmedabad",
-            state="GJ",
-            tier="B",
-        ),
-    ]
-    session.add_all(seed_data)
-    session.commit()
+    seed_demo_hcps(session)
     return session.query(models.HCP).order_by(models.HCP.name).all()
@@ -1,87 +1,376 @@
 import json
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_groq import ChatGroq
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 
 from app.config import settings
 from app.db import models
-from app.db.session import get_session
-from app.schemas import InteractionCreate, InteractionOut, InteractionUpdate
+from app.db.session import (
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    SessionLocal,
+    get_async_session,
+    get_read_session,
+    get_session,
+)
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, parse_fields, projected_response
+from app.schemas import (
+    BulkInteractionResponse,
+    BulkInteractionResult,
+    InteractionCreate,
+    InteractionOut,
+    InteractionUpdate,
+)
+from app.services.activity_stats import fold_new_interactions, interactions_created, interactions_written_sync
+from app.services.embeddings import embed_interactions, embed_interactions_sync
+from app.services.enrichment import enrichment_queue, pending_enrichment
+from app.services.export import (
+    ENCODERS,
+    EXPORT_COLUMNS,
+    FORMATS,
+    export_watermark,
+    iter_batches,
+    parquet_available,
+    resume_watermark,
+)
+from app.services.idempotency import idempotency_store, request_hash
+from app.services.search import search_interactions_query
 
 
 router = APIRouter(prefix="/interactions", tags=["interactions"])
 
-SUMMARY_PROMPT = SystemMessage(
-    content=(
-        "You are a life sciences CRM assistant. Extract a concise summary and key entities "
-        "from HCP interaction notes. Return strict JSON with keys: summary, products_discussed, "
-        "sentiment, outcomes, next_steps, attendees. Use arrays for products_discussed."))
-
-
-def _safe_json_loads(text: str) -> dict:
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        return {}
+EXPORT_WATERMARK_HEADER = "X-Export-Watermark"
 
 
 @router.get("", response_model=list[InteractionOut])
 def list_interactions(
+    response: Response,
     hcp_id: Optional[int] = None,
-    session: Session = Depends(get_session),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: Session = Depends(get_read_session),
 ):
+    """Newest first, keyset-paginated on (interaction_date, id).
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the next page.
+    ``fields`` limits the columns loaded and returned (``id`` is always included).
+    """
+    projection = parse_fields(fields, set(InteractionOut.model_fields))
+    interaction_date = models.Interaction.interaction_date
+    interaction_id = models.Interaction.id
+
     query = session.query(models.Interaction)
+    if projection:
+        columns = {getattr(models.Interaction, field) for field in projection}
+        query = query.options(load_only(*columns, interaction_date))
     if hcp_id is not None:
         query = query.filter(models.Interaction.hcp_id == hcp_id)
-    return query.order_by(models.Interaction.interaction_date.desc().nullslast()).all()
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, Optional[datetime], int)
+        if last_date is None:
+            query = query.filter(interaction_date.is_(None), interaction_id < last_id)
+        else:
+            query = query.filter(
+                or_(
+                    interaction_date < last_date,
+                    and_(interaction_date == last_date, interaction_id < last_id),
+                    interaction_date.is_(None),
+                )
+            )
 
+    order_by = models.newest_first(session.get_bind().dialect.name)
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].interaction_date, rows[-1].id)
 
-@router.post("", response_model=InteractionOut)
-def create_interaction(payload: InteractionCreate, session: Session = Depends(get_session)):
-    extracted_entities = payload.extracted_entities
-    summary = payload.summary
-    attendees = payload.attendees
-    outcomes = payload.outcomes
-    next_steps = payload.next_steps
-    products_discussed = payload.products_discussed
-    sentiment = payload.sentiment
-
-    if payload.raw_notes and not summary:
-        llm = ChatGroq(api_key=settings.groq_api_key, model_name=settings.groq_model)
-        response = llm.invoke([SUMMARY_PROMPT, HumanMessage(content=payload.raw_notes)])
-        extracted_entities = _safe_json_loads(getattr(response, "content", "") or "")
-        summary = extracted_entities.get("summary")
-        products_discussed = extracted_entities.get("products_discussed")
-        sentiment = extracted_entities.get("sentiment")
-        outcomes = extracted_entities.get("outcomes")
-        next_steps = extracted_entities.get("next_steps")
-        attendees = extracted_entities.get("attendees")
-
-    interaction = models.Interaction(
-        hcp_id=payload.hcp_id,
-        interaction_type=payload.interaction_type,
-        channel=payload.channel,
-        interaction_date=payload.interaction_date,
-        summary=summary,
-        notes=payload.notes or payload.raw_notes,
-        attendees=attendees,
-        outcomes=outcomes,
-        next_steps=next_steps,
-        products_discussed=products_discussed,
+    if projection:
+        return projected_response(rows, projection, next_cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
+@router.get("/search", response_model=list[InteractionOut])
+def search_interactions(
+    q: Optional[str] = None,
+    products: Optional[list[str]] = Query(None),
+    sentiment: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    specialty: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    hcp_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    session: Session = Depends(get_read_session),
+):
+    """Full-text search over summary, notes and outcomes plus structured filters.
+
+    ``products`` may be repeated and matches interactions discussing any of them.
+    """
+    statement = search_interactions_query(
+        session.get_bind().dialect.name,
+        query=q,
+        products=products,
         sentiment=sentiment,
-        extracted_entities=extracted_entities,
-        source=payload.source or "form",
+        date_from=date_from,
+        date_to=date_to,
+        specialty=specialty,
+        city=city,
+        state=state,
+        hcp_id=hcp_id,
+        limit=limit,
     )
+    return session.scalars(statement).all()
+
+
+@router.get("/export")
+def export_interactions(
+    format: str = Query("ndjson", pattern="^(csv|ndjson|parquet)$"),
+    hcp_id: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
+    fields: Optional[str] = None,
+):
+    """Stream every matching interaction as CSV, NDJSON or Parquet, oldest ``updated_at`` first.
+
+    For incremental exports pass the previous response's ``X-Export-Watermark`` header
+    as ``updated_since``. The header trails the newest exported row by
+    ``EXPORT_WATERMARK_LAG_SECONDS`` so late-committing writes are not skipped; rows in
+    that window are exported again, so consumers should upsert by ``id``.
+    """
+    columns = parse_fields(fields, set(EXPORT_COLUMNS)) or list(EXPORT_COLUMNS)
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+    with ReadSessionLocal() as session:
+        watermark = export_watermark(session, hcp_id, updated_since)
+
+    def body():
+        # Its own session: the request's dependencies are closed before the body streams.
+        with ReadSessionLocal() as session:
+            batches = iter(()) if watermark is None else iter_batches(
+                session, columns, hcp_id, updated_since, watermark, settings.export_batch_size
+            )
+            yield from ENCODERS[format](batches, columns)
+
+    headers = {"Content-Disposition": f'attachment; filename="interactions.{format}"'}
+    resume = resume_watermark(watermark, updated_since, settings.export_watermark_lag_seconds)
+    if resume:
+        headers[EXPORT_WATERMARK_HEADER] = resume.isoformat()
+    return StreamingResponse(body(), media_type=FORMATS[format], headers=headers)
+
+
+@router.get("/{interaction_id}", response_model=InteractionOut)
+def get_interaction(interaction_id: int, session: Session = Depends(get_session)):
+    """A single interaction, including its ``enrichment_status`` while extraction is queued.
+
+    Read from the primary: clients poll this right after creating the row.
+    """
+    interaction = session.get(models.Interaction, interaction_id)
+    if not interaction:
+        raise HTTPException(status_code=404, detail="Interaction not found")
+    return interaction
+
+
+def _needs_extraction(payload: InteractionCreate) -> bool:
+    return bool(payload.raw_notes and not payload.summary)
+
+
+def _interaction_values(payload: InteractionCreate, extracted_entities: Optional[dict] = None) -> dict[str, Any]:
+    values = {
+        "hcp_id": payload.hcp_id,
+        "interaction_type": payload.interaction_type,
+        "channel": payload.channel,
+        "interaction_date": payload.interaction_date,
+        "summary": payload.summary,
+        "notes": payload.notes or payload.raw_notes,
+        "attendees": payload.attendees,
+        "outcomes": payload.outcomes,
+        "next_steps": payload.next_steps,
+        "products_discussed": payload.products_discussed,
+        "sentiment": payload.sentiment,
+        "extracted_entities": payload.extracted_entities,
+        "source": payload.source or "form",
+        "raw_notes": payload.raw_notes,
+    }
+    if extracted_entities is not None:
+        values["extracted_entities"] = extracted_entities
+        for field in ("summary", "products_discussed", "sentiment", "outcomes", "next_steps", "attendees"):
+            values[field] = extracted_entities.get(field)
+    return values
+
+
+def _parse_bulk_body(body: bytes, content_type: str) -> list[Any]:
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    if "ndjson" not in content_type and text.startswith("["):
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of interactions")
+        return rows
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except json.JSONDecodeError as exc:
+            rows.append(ValueError(f"Invalid JSON: {exc.msg}"))
+    return rows
+
+
+@router.post("", response_model=InteractionOut)
+async def create_interaction(
+    payload: InteractionCreate,
+    idempotency_key: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Save the interaction immediately; raw notes are summarized by the enrichment workers.
+
+    Poll ``GET /interactions/{id}`` for ``enrichment_status``. A retry with the same
+    ``Idempotency-Key`` header returns the first response instead of inserting again.
+    """
+    if idempotency_key is not None:
+        replay = await idempotency_store.claim("interactions.create", idempotency_key, request_hash(payload))
+        if replay is not None:
+            return replay
+
+    values = _interaction_values(payload)
+    queued = _needs_extraction(payload)
+    if queued:
+        values.update(pending_enrichment())
+
+    interaction = models.Interaction(**values)
     session.add(interaction)
-    session.commit()
-    session.refresh(interaction)
+    try:
+        unfolded = await session.run_sync(fold_new_interactions, [values])
+        if idempotency_key is not None:
+            # The stored response commits with the row, so a replay can never miss an inserted interaction.
+            await session.flush()
+            await session.refresh(interaction)
+            response = InteractionOut.model_validate(interaction).model_dump(mode="json")
+            await idempotency_store.complete("interactions.create", idempotency_key, 200, response, session=session)
+        await session.commit()
+    except BaseException:
+        if idempotency_key is not None:
+            await idempotency_store.release("interactions.create", idempotency_key)
+        raise
+    await session.refresh(interaction)
+    await interactions_created(AsyncSessionLocal, [interaction.hcp_id], unfolded)
+    await embed_interactions(AsyncSessionLocal, interaction.id)
+    if queued:
+        enrichment_queue.notify()
     return interaction
 
 
+@router.post("/bulk", response_model=BulkInteractionResponse)
+async def bulk_create_interactions(request: Request, session: AsyncSession = Depends(get_async_session)):
+    """Ingest a JSON array or NDJSON stream of interactions.
+
+    Notes needing extraction are summarized in one bounded-concurrency batch and
+    rows are inserted in chunked transactions; each row reports its id or error.
+    """
+    try:
+        raw_rows = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    results = [BulkInteractionResult(index=index) for index in range(len(raw_rows))]
+    payloads: dict[int, InteractionCreate] = {}
+    for index, row in enumerate(raw_rows):
+        if isinstance(row, Exception):
+            results[index].error = str(row)
+            continue
+        try:
+            payloads[index] = InteractionCreate.model_validate(row)
+        except ValidationError as exc:
+            results[index].error = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            )
+
+    hcp_ids = {payload.hcp_id for payload in payloads.values()}
+    known_hcp_ids = set(
+        (await session.scalars(select(models.HCP.id).where(models.HCP.id.in_(hcp_ids)))).all()
+    ) if hcp_ids else set()
+    for index, payload in list(payloads.items()):
+        if payload.hcp_id not in known_hcp_ids:
+            results[index].error = "HCP not found"
+            del payloads[index]
+
+    # Hand the connection back to the pool while the LLM batch runs.
+    await session.close()
+
+    extracted: dict[int, dict] = {}
+    to_extract = [index for index, payload in payloads.items() if _needs_extraction(payload)]
+    if to_extract:
+        from app.services.extraction import extraction_service
+        from app.services.model_router import model_router
+
+        llm = model_router.for_task("extraction")
+        outcomes = await extraction_service.extract_many(
+            llm,
+            [payloads[index].raw_notes for index in to_extract],
+            max_concurrency=settings.bulk_llm_concurrency,
+        )
+        for index, outcome in zip(to_extract, outcomes):
+            if isinstance(outcome, Exception):
+                results[index].error = f"Extraction failed: {outcome}"
+                del payloads[index]
+            else:
+                extracted[index] = outcome
+
+    statement = insert(models.Interaction)
+    returns_ids = session.bind.dialect.insert_executemany_returning_sort_by_parameter_order
+    if returns_ids:
+        statement = statement.returning(models.Interaction.id, sort_by_parameter_order=True)
+
+    indexes = list(payloads)
+    chunk_size = settings.bulk_insert_chunk_size
+    written_hcp_ids: set[int] = set()
+    unfolded: set[int] = set()
+    for start in range(0, len(indexes), chunk_size):
+        chunk = indexes[start:start + chunk_size]
+        rows = [_interaction_values(payloads[index], extracted.get(index)) for index in chunk]
+        try:
+            result = await session.execute(statement, rows)
+            ids = result.scalars().all() if returns_ids else [None] * len(chunk)
+            chunk_unfolded = await session.run_sync(fold_new_interactions, rows)
+            await session.commit()
+        except SQLAlchemyError as exc:
+            await session.rollback()
+            for index in chunk:
+                results[index].error = f"Insert failed: {exc.__class__.__name__}"
+            continue
+        for index, interaction_id in zip(chunk, ids):
+            results[index].interaction_id = interaction_id
+        written_hcp_ids.update(row["hcp_id"] for row in rows)
+        unfolded |= chunk_unfolded
+        if returns_ids:
+            # Without RETURNING (MySQL) the new ids are unknown; the embeddings CLI backfills them.
+            await embed_interactions(AsyncSessionLocal, *ids)
+    if written_hcp_ids:
+        # Once per request: rollups the chunks could not fold are recomputed after the last one.
+        await interactions_created(AsyncSessionLocal, written_hcp_ids, unfolded)
+
+    failed = sum(1 for result in results if result.error)
+    return BulkInteractionResponse(
+        received=len(results),
+        inserted=len(results) - failed,
+        failed=failed,
+        results=results,
+    )
+
+
 @router.put("/{interaction_id}", response_model=InteractionOut)
 def update_interaction(
     interaction_id: int,
@@ -97,4 +386,6 @@ def update_interaction(
 
     session.commit()
     session.refresh(interaction)
+    interactions_written_sync(SessionLocal, interaction.hcp_id)
+    embed_interactions_sync(SessionLocal, interaction.id)
     return interaction
@@ -0,0 +1,65 @@
+import sys
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+from app.services.hcp_cache import hcp_profile_cache
+
+
+router = APIRouter(tags=["metrics"])
+
+
+def _loaded(module: str):
+    """``module`` if something already imported it; LLM services are loaded on first use, not by a scrape."""
+    return sys.modules.get(module)
+
+
+class CacheStatsCollector:
+    """Exposes the in-process caches' ``stats()`` at scrape time."""
+
+    def collect(self):
+        caches = {"hcp_profile": hcp_profile_cache.stats()}
+        extraction = _loaded("app.services.extraction")
+        if extraction is not None:
+            caches["extraction"] = extraction.extraction_service.stats()
+        families: dict[str, GaugeMetricFamily] = {}
+        for name, stats in caches.items():
+            for key, value in stats.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if key not in families:
+                    families[key] = GaugeMetricFamily(f"crm_cache_{key}", f"Cache {key.replace('_', ' ')}.", labels=["cache"])
+                families[key].add_metric([name], value)
+        yield from families.values()
+
+
+class ModelRouterCollector:
+    """Exposes the model router's rolling per-model stats at scrape time."""
+
+    def collect(self):
+        families = {
+            "calls": GaugeMetricFamily("crm_llm_router_calls", "Calls routed to the model.", labels=["model"]),
+            "errors": GaugeMetricFamily("crm_llm_router_errors", "Failed routed calls.", labels=["model"]),
+            "p95_seconds": GaugeMetricFamily(
+                "crm_llm_router_p95_seconds", "Recent p95 latency used for routing and hedging.", labels=["model"]
+            ),
+            "circuit_open": GaugeMetricFamily(
+                "crm_llm_router_circuit_open", "1 while the model's circuit breaker is open.", labels=["model"]
+            ),
+        }
+        router_module = _loaded("app.services.model_router")
+        stats_by_model = router_module.model_router.stats() if router_module is not None else {}
+        for model, stats in stats_by_model.items():
+            for key, family in families.items():
+                family.add_metric([model], stats[key])
+        yield from families.values()
+
+
+REGISTRY.register(CacheStatsCollector())
+REGISTRY.register(ModelRouterCollector())
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
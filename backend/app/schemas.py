@@ -25,6 +25,19 @@ class HCPOut(HCPBase):
         from_attributes = True
 
 
+class HCPActivityStatsOut(BaseModel):
+    hcp_id: int
+    interaction_count: int
+    first_interaction_at: Optional[datetime] = None
+    last_interaction_at: Optional[datetime] = None
+    days_since_last_interaction: Optional[int] = None
+    avg_days_between_interactions: Optional[float] = None
+    sentiment_counts: dict[str, int]
+    recent_sentiments: List[str]
+    sentiment_trend: Optional[str] = None
+    product_counts: dict[str, int]
+
+
 class InteractionBase(BaseModel):
     hcp_id: int
     interaction_type: Optional[str] = None
@@ -61,6 +74,9 @@ class InteractionUpdate(BaseModel):
 
 class InteractionOut(InteractionBase):
     id: int
+    enrichment_status: Optional[str] = None
+    enrichment_attempts: int = 0
+    enrichment_error: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -68,6 +84,19 @@ class InteractionOut(InteractionBase):
         from_attributes = True
 
 
+class BulkInteractionResult(BaseModel):
+    index: int
+    interaction_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkInteractionResponse(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    results: List[BulkInteractionResult]
+
+
 class AgentChatRequest(BaseModel):
     hcp_id: Optional[int] = None
     message: str
@@ -84,3 +113,16 @@ class AgentMessage(BaseModel):
 class AgentChatResponse(BaseModel):
     messages: List[AgentMessage]
     interaction_id: Optional[int] = None
+    conversation_id: Optional[str] = None
+
+
+class ComplianceReviewOut(BaseModel):
+    interaction_id: int
+    hcp_id: int
+    risk_level: str
+    issues: List[Any]
+    suggested_remediation: Optional[str] = None
+    prefilter_flags: List[str]
+    reviewed_by: str
+    reviewed_at: datetime
+    prompt_hash: str
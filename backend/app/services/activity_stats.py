@@ -0,0 +1,279 @@
+"""Per-HCP activity rollups (``hcp_activity_stats``).
+
+New interactions are folded into the stored row in the transaction that inserts
+them; edits recompute the HCP's row from its interactions. Run
+``python -m app.services.activity_stats`` from ``backend/`` to rebuild every row.
+"""
+import argparse
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.hcp_cache import hcp_profile_cache
+
+
+RECENT_SENTIMENTS = 6
+SENTIMENT_SCORES = {"positive": 1, "neutral": 0, "negative": -1}
+# Mean score change between the older and newer half of recent sentiments that counts as a trend.
+TREND_THRESHOLD = 0.5
+CONTEXT_PRODUCTS = 5
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; everything is stored as UTC.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _sentiment_trend(recent: list[str]) -> Optional[str]:
+    scores = [SENTIMENT_SCORES[sentiment] for sentiment in recent if sentiment in SENTIMENT_SCORES]
+    if len(scores) < 2:
+        return None
+    half = len(scores) // 2
+    newer, older = scores[:half], scores[half:]
+    change = sum(newer) / len(newer) - sum(older) / len(older)
+    if change >= TREND_THRESHOLD:
+        return "improving"
+    if change <= -TREND_THRESHOLD:
+        return "declining"
+    return "stable"
+
+
+def compute_stats(hcp_id: int, rows: Iterable[tuple]) -> models.HCPActivityStats:
+    """Rollup for one HCP from (contacted_at, sentiment, products_discussed) rows."""
+    rows = sorted(rows, key=lambda row: _aware(row[0]) or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+    contacts = [_aware(row[0]) for row in rows if row[0] is not None]
+    sentiments = [row[1].strip().lower() for row in rows if row[1] and row[1].strip()]
+    products = Counter(
+        product.strip()
+        for row in rows
+        for product in (row[2] or [])
+        if isinstance(product, str) and product.strip()
+    )
+    average_gap = None
+    if len(contacts) > 1:
+        average_gap = (contacts[0] - contacts[-1]).total_seconds() / 86400 / (len(contacts) - 1)
+    recent = sentiments[:RECENT_SENTIMENTS]
+    return models.HCPActivityStats(
+        hcp_id=hcp_id,
+        interaction_count=len(rows),
+        first_interaction_at=contacts[-1] if contacts else None,
+        last_interaction_at=contacts[0] if contacts else None,
+        avg_days_between_interactions=round(average_gap, 1) if average_gap is not None else None,
+        sentiment_counts=dict(Counter(sentiments)),
+        recent_sentiments=recent,
+        sentiment_trend=_sentiment_trend(recent),
+        product_counts=dict(products.most_common()),
+    )
+
+
+def _history(hcp_ids: list[int]):
+    Interaction = models.Interaction
+    return select(
+        Interaction.hcp_id,
+        func.coalesce(Interaction.interaction_date, Interaction.created_at),
+        Interaction.sentiment,
+        Interaction.products_discussed,
+    ).where(Interaction.hcp_id.in_(hcp_ids))
+
+
+def load_stats(session: Session, hcp_ids: Iterable[int]) -> dict[int, models.HCPActivityStats]:
+    """Compute rollups from the interactions table without storing them."""
+    hcp_ids = sorted(set(hcp_ids))
+    rows = defaultdict(list)
+    if hcp_ids:
+        for hcp_id, *row in session.execute(_history(hcp_ids)):
+            rows[hcp_id].append(row)
+    return {hcp_id: compute_stats(hcp_id, rows[hcp_id]) for hcp_id in hcp_ids}
+
+
+def _lock_rollups(session: Session, hcp_ids: Iterable[int]) -> dict[int, models.HCPActivityStats]:
+    """Stored rollup rows for ``hcp_ids``, locked until the transaction ends (a no-op on SQLite)."""
+    rows = session.scalars(
+        select(models.HCPActivityStats).where(models.HCPActivityStats.hcp_id.in_(list(hcp_ids))).with_for_update()
+    )
+    return {stats.hcp_id: stats for stats in rows}
+
+
+def refresh_activity_stats(session: Session, hcp_ids: Iterable[int]) -> None:
+    """Recompute and store the rollup rows for ``hcp_ids``; the caller commits.
+
+    Only the touched HCPs' interactions are read (via the ``hcp_id`` index). Edits
+    can move or remove any value, which is why they recompute rather than patch.
+    The rows are locked before the interactions are read, so a concurrent
+    ``fold_new_interactions`` is either counted here or applied after.
+    """
+    hcp_ids = sorted(set(hcp_ids))
+    _lock_rollups(session, hcp_ids)
+    for stats in load_stats(session, hcp_ids).values():
+        session.merge(stats)
+
+
+def _add(stats: models.HCPActivityStats, added: models.HCPActivityStats) -> None:
+    # ``added`` always has contact times: fold_new_interactions fills in the insert time.
+    contacts = [added.first_interaction_at, added.last_interaction_at]
+    contacts += [value for value in (_aware(stats.first_interaction_at), _aware(stats.last_interaction_at)) if value]
+    count = (stats.interaction_count or 0) + added.interaction_count
+    first, last = min(contacts), max(contacts)
+    average_gap = (last - first).total_seconds() / 86400 / (count - 1) if count > 1 else None
+    recent = (added.recent_sentiments + list(stats.recent_sentiments or []))[:RECENT_SENTIMENTS]
+    stats.interaction_count = count
+    stats.first_interaction_at = first
+    stats.last_interaction_at = last
+    stats.avg_days_between_interactions = round(average_gap, 1) if average_gap is not None else None
+    stats.sentiment_counts = dict(Counter(stats.sentiment_counts or {}) + Counter(added.sentiment_counts))
+    stats.recent_sentiments = recent
+    stats.sentiment_trend = _sentiment_trend(recent)
+    stats.product_counts = dict((Counter(stats.product_counts or {}) + Counter(added.product_counts)).most_common())
+
+
+def fold_new_interactions(session: Session, interactions: Iterable[dict[str, Any]]) -> set[int]:
+    """Add interactions being inserted (their column values) to the stored rollups.
+
+    Call it in the inserting transaction, before the commit, so each interaction is
+    counted exactly once; it reads only the rollup rows. Returns the HCPs it left
+    alone for ``interactions_created`` to recompute after the commit: those with no
+    rollup row yet, and those where a new interaction predates the latest contact,
+    which changes which sentiments are the recent ones.
+    """
+    now = datetime.now(timezone.utc)
+    rows = defaultdict(list)
+    for values in interactions:
+        # created_at is a server default; the recompute may differ from this by the insert's latency.
+        contacted_at = values.get("interaction_date") or now
+        rows[values["hcp_id"]].append((contacted_at, values.get("sentiment"), values.get("products_discussed")))
+    stored = _lock_rollups(session, rows)
+    unfolded = set()
+    for hcp_id, new_rows in rows.items():
+        stats = stored.get(hcp_id)
+        added = compute_stats(hcp_id, new_rows)
+        last_interaction_at = _aware(stats.last_interaction_at) if stats is not None else None
+        if stats is None or (last_interaction_at is not None and added.first_interaction_at < last_interaction_at):
+            unfolded.add(hcp_id)
+            continue
+        _add(stats, added)
+    return unfolded
+
+
+async def _refresh(session_factory, hcp_ids: Iterable[int]) -> None:
+    for attempt in range(2):
+        async with session_factory() as session:
+            try:
+                await session.run_sync(refresh_activity_stats, hcp_ids)
+                await session.commit()
+                return
+            except IntegrityError:
+                # A concurrent write inserted the first rollup row for one of these HCPs; the retry updates it.
+                if attempt:
+                    raise
+
+
+async def interactions_written(session_factory, *hcp_ids: int) -> None:
+    """Run after committing any interaction update for ``hcp_ids``.
+
+    Recomputes their activity rollups in a session of its own, so it sees every
+    committed row and leaves the caller's objects alone, then drops their cached profiles.
+    """
+    await _refresh(session_factory, hcp_ids)
+    await hcp_profile_cache.ainvalidate(*hcp_ids)
+
+
+async def interactions_created(session_factory, hcp_ids: Iterable[int], unfolded: Iterable[int]) -> None:
+    """Run after committing inserts for ``hcp_ids`` that went through ``fold_new_interactions``.
+
+    Recomputes the rollups it could not fold (``unfolded``) and drops every touched HCP's cached profile.
+    """
+    unfolded = set(unfolded)
+    if unfolded:
+        await _refresh(session_factory, unfolded)
+    await hcp_profile_cache.ainvalidate(*hcp_ids)
+
+
+def interactions_written_sync(session_factory, *hcp_ids: int) -> None:
+    """``interactions_written`` for sync request handlers."""
+    for attempt in range(2):
+        with session_factory() as session:
+            try:
+                refresh_activity_stats(session, hcp_ids)
+                session.commit()
+                break
+            except IntegrityError:
+                if attempt:
+                    raise
+    hcp_profile_cache.invalidate(*hcp_ids)
+
+
+def stats_payload(stats: models.HCPActivityStats, now: Optional[datetime] = None) -> dict[str, Any]:
+    now = now or datetime.now(timezone.utc)
+    last_interaction_at = _aware(stats.last_interaction_at)
+    first_interaction_at = _aware(stats.first_interaction_at)
+    return {
+        "hcp_id": stats.hcp_id,
+        "interaction_count": stats.interaction_count or 0,
+        "first_interaction_at": first_interaction_at.isoformat() if first_interaction_at else None,
+        "last_interaction_at": last_interaction_at.isoformat() if last_interaction_at else None,
+        "days_since_last_interaction": (now - last_interaction_at).days if last_interaction_at else None,
+        "avg_days_between_interactions": stats.avg_days_between_interactions,
+        "sentiment_counts": stats.sentiment_counts or {},
+        "recent_sentiments": stats.recent_sentiments or [],
+        "sentiment_trend": stats.sentiment_trend,
+        "product_counts": stats.product_counts or {},
+    }
+
+
+def hcp_stats(session: Session, hcp_id: int) -> dict[str, Any]:
+    """Stored rollup for one HCP, computed on the fly if it was never written (run a rebuild)."""
+    stats = session.get(models.HCPActivityStats, hcp_id)
+    if stats is None:
+        stats = load_stats(session, [hcp_id])[hcp_id]
+    return stats_payload(stats)
+
+
+def llm_context(stats: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+    """A few fields summarizing the whole history, for prompts in place of raw interactions."""
+    if not stats or not stats["interaction_count"]:
+        return None
+    context = {
+        "interactions": stats["interaction_count"],
+        "days_since_last": stats["days_since_last_interaction"],
+        "avg_days_between": stats["avg_days_between_interactions"],
+        "sentiment_trend": stats["sentiment_trend"],
+        "top_products": list(stats["product_counts"])[:CONTEXT_PRODUCTS],
+    }
+    return {key: value for key, value in context.items() if value not in (None, [])}
+
+
+def rebuild_activity_stats(session: Session, batch_size: int = 500) -> int:
+    """Recompute every HCP's rollup, committing per batch; returns the number of HCPs."""
+    rebuilt = 0
+    last_id = 0
+    while True:
+        hcp_ids = session.scalars(
+            select(models.HCP.id).where(models.HCP.id > last_id).order_by(models.HCP.id).limit(batch_size)
+        ).all()
+        if not hcp_ids:
+            return rebuilt
+        refresh_activity_stats(session, hcp_ids)
+        session.commit()
+        rebuilt += len(hcp_ids)
+        last_id = hcp_ids[-1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild hcp_activity_stats from the interactions table.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        print(f"rebuilt activity stats for {rebuild_activity_stats(session, args.batch_size)} HCPs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """In-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, key: str, payload: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """JSON values in Redis, shared by every worker.
+
+    ``client`` is any redis-py compatible client, e.g. ``fakeredis.FakeRedis()`` in tests.
+    Calls block, so async callers run them in a thread. A Redis error is logged and
+    treated as a miss: the cache never fails the request.
+    """
+
+    def __init__(self, client, ttl_seconds: int, prefix: str = ""):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: int, prefix: str = "", timeout_seconds: float = 1.0) -> "RedisCache":
+        import redis
+
+        client = redis.Redis.from_url(url, socket_timeout=timeout_seconds, socket_connect_timeout=timeout_seconds)
+        return cls(client, ttl_seconds, prefix)
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except RedisError as exc:
+            logger.warning("Redis get of %s failed: %s", key, exc)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, payload: Any) -> None:
+        try:
+            self.client.set(self.prefix + key, json.dumps(payload, default=str), ex=self.ttl_seconds)
+        except RedisError as exc:
+            logger.warning("Redis set of %s failed: %s", key, exc)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            self.client.delete(*(self.prefix + key for key in keys))
+        except RedisError as exc:
+            # The entries expire after the TTL instead.
+            logger.warning("Redis delete of %s failed: %s", ", ".join(keys), exc)
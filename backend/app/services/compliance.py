@@ -0,0 +1,65 @@
+import json
+from typing import Any, Literal, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, field_validator
+
+from app.config import settings
+from app.services.model_router import model_router
+from app.services.structured_output import invoke_structured
+from app.services.token_budget import compact_json, count_tokens, record_savings, truncate_text
+
+
+COMPLIANCE_PROMPT = SystemMessage(
+    content=(
+        "You are a medical compliance reviewer for field interactions. Identify potential risks "
+        "(off-label claims, safety omissions, or unbalanced benefit statements). Return strict JSON "
+        "with keys: risk_level (low|medium|high), issues (array), suggested_remediation."))
+
+
+class ComplianceOutput(BaseModel):
+    """Shape of a ``COMPLIANCE_PROMPT`` answer."""
+
+    risk_level: Literal["low", "medium", "high"]
+    issues: list[Any] = []
+    suggested_remediation: Optional[str] = None
+
+    @field_validator("risk_level", mode="before")
+    @classmethod
+    def _normalize_risk_level(cls, value: Any) -> Any:
+        return value.strip().lower() if isinstance(value, str) else value
+
+    @field_validator("issues", mode="before")
+    @classmethod
+    def _wrap_issue(cls, value: Any) -> Any:
+        if value is None:
+            return []
+        return [value] if isinstance(value, (str, dict)) else value
+
+    @field_validator("suggested_remediation", mode="before")
+    @classmethod
+    def _join_remediation(cls, value: Any) -> Any:
+        if isinstance(value, list):
+            return " ".join(str(item) for item in value)
+        return value
+
+
+async def review_compliance(llm, notes: str, products_discussed: Optional[list[str]] = None) -> dict[str, Any]:
+    payload = {
+        "notes": truncate_text(" ".join(notes.split()), settings.llm_max_note_tokens),
+        "products_discussed": products_discussed or [],
+    }
+    content = compact_json(payload)
+    prompt_tokens = count_tokens(COMPLIANCE_PROMPT.content)
+    original = json.dumps({"notes": notes, "products_discussed": products_discussed or []})
+    record_savings("compliance", prompt_tokens + count_tokens(original), prompt_tokens + count_tokens(content))
+    review = await invoke_structured(
+        "compliance",
+        llm,
+        [COMPLIANCE_PROMPT, HumanMessage(content=content)],
+        ComplianceOutput,
+        retry_llm=model_router.for_task("json_repair"),
+    )
+    if review is None:
+        raise ValueError("Compliance review response was not valid JSON")
+    return review
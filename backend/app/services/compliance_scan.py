@@ -0,0 +1,253 @@
+"""Batch compliance review of stored interactions into ``compliance_reviews``.
+
+Interactions are scanned in id order, ``batch_size`` at a time. A local keyword
+prefilter looks for off-label language, unbalanced claims and benefit statements
+with no safety mention; notes it does not flag are recorded as low risk without
+calling the LLM. Flagged notes are reviewed with ``COMPLIANCE_PROMPT``, at most
+``concurrency`` at once.
+
+Reviews are stored under a hash of the prompt and the prefilter rules, so changing
+either re-reviews everything. Rows whose notes have not changed since their review
+are skipped, which also makes an interrupted run resume where it stopped. Run
+``python -m app.services.compliance_scan`` from ``backend/``.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.services.compliance import COMPLIANCE_PROMPT, review_compliance
+from app.services.metrics import COMPLIANCE_SCAN_ROWS
+from app.services.model_router import model_router
+
+
+logger = logging.getLogger(__name__)
+
+# Each matching rule sends the note to the LLM; the rule names are stored as ``prefilter_flags``.
+PREFILTER_RULES = {
+    "off_label": (
+        r"\boff[- ]label\b",
+        r"\bunapproved\b",
+        r"\bnot (?:yet )?approved\b",
+        r"\bnot indicated\b",
+        r"\bunlicensed\b",
+        r"\binvestigational\b",
+        r"\boutside (?:the |its )?(?:label|indication)",
+    ),
+    "unbalanced_claim": (
+        r"\bcures?\b",
+        r"\bguarantee[sd]?\b",
+        r"\bno side[- ]effects?\b",
+        r"\bcompletely safe\b",
+        r"\brisk[- ]free\b",
+        r"\b100 ?%",
+        r"\b(?:better|superior) (?:than|to)\b",
+        r"\bmiracle\b",
+    ),
+}
+# A benefit claim with none of the safety terms is flagged as ``missing_safety``.
+BENEFIT_TERMS = (
+    r"\beffective(?:ness)?\b",
+    r"\befficacy\b",
+    r"\bbenefits?\b",
+    r"\bimprove[sd]?\b",
+    r"\breduc(?:e|es|ed|tion)\b",
+    r"\boutcomes? data\b",
+)
+SAFETY_TERMS = (
+    r"\bsafety\b",
+    r"\bside[- ]effects?\b",
+    r"\badverse\b",
+    r"\brisks?\b",
+    r"\bcontraindicat",
+    r"\bwarnings?\b",
+    r"\bprecautions?\b",
+    r"\btolerab",
+    r"\bprescribing information\b",
+)
+
+
+def _pattern(terms) -> re.Pattern:
+    return re.compile("|".join(terms), re.IGNORECASE)
+
+
+_RULE_PATTERNS = {name: _pattern(terms) for name, terms in PREFILTER_RULES.items()}
+_BENEFIT = _pattern(BENEFIT_TERMS)
+_SAFETY = _pattern(SAFETY_TERMS)
+
+
+def prefilter(text: str) -> list[str]:
+    """Names of the rules ``text`` trips; empty when the LLM need not see it."""
+    flags = [name for name, pattern in _RULE_PATTERNS.items() if pattern.search(text)]
+    if _BENEFIT.search(text) and not _SAFETY.search(text):
+        flags.append("missing_safety")
+    return flags
+
+
+def review_version() -> str:
+    """Hash of everything that decides a review: the prompt and the prefilter rules."""
+    rules = {"prompt": COMPLIANCE_PROMPT.content, "rules": PREFILTER_RULES, "benefit": BENEFIT_TERMS, "safety": SAFETY_TERMS}
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def review_text(row: Any) -> str:
+    """What the rep wrote: the raw notes, else the notes or summary."""
+    return row.raw_notes or row.notes or row.summary or ""
+
+
+def content_hash(text: str, products: Optional[list[str]]) -> str:
+    return hashlib.sha256(json.dumps([text, products or []]).encode("utf-8")).hexdigest()
+
+
+async def _save(session_factory, reviews: list[models.ComplianceReview]) -> None:
+    for attempt in range(2):
+        async with session_factory() as session:
+            try:
+                for review in reviews:
+                    await session.merge(review)
+                await session.commit()
+                return
+            except IntegrityError:
+                # Another scanner stored one of these first; the retry overwrites it.
+                if attempt:
+                    raise
+
+
+async def scan_compliance(
+    session_factory=AsyncSessionLocal,
+    batch_size: int = 200,
+    concurrency: int = 4,
+    max_llm_reviews: Optional[int] = None,
+) -> Counter:
+    """Review every interaction missing a current review; returns row counts by outcome.
+
+    Outcomes: ``unchanged`` (already reviewed), ``cleared`` (no prefilter flag),
+    ``reviewed`` (by the LLM) and ``failed`` (left for the next run). With
+    ``max_llm_reviews``, the run stops once that many notes were sent to the LLM.
+    """
+    version = review_version()
+    llm = model_router.for_task("compliance")
+    semaphore = asyncio.Semaphore(concurrency)
+    table, review_table = models.Interaction, models.ComplianceReview
+    counts: Counter = Counter()
+    llm_budget = max_llm_reviews
+    last_id = 0
+
+    async def review(text: str, products: Optional[list[str]]) -> dict[str, Any]:
+        async with semaphore:
+            return await review_compliance(llm, text, products)
+
+    while llm_budget is None or llm_budget > 0:
+        async with session_factory() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        table.id,
+                        table.raw_notes,
+                        table.notes,
+                        table.summary,
+                        table.products_discussed,
+                        review_table.content_hash,
+                    )
+                    .outerjoin(
+                        review_table,
+                        and_(review_table.interaction_id == table.id, review_table.prompt_hash == version),
+                    )
+                    .where(table.id > last_id)
+                    .order_by(table.id)
+                    .limit(batch_size)
+                )
+            ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        now = datetime.now(timezone.utc)
+        reviews: list[models.ComplianceReview] = []
+        flagged = []
+        for row in rows:
+            text = review_text(row)
+            if not text.strip():
+                continue
+            digest = content_hash(text, row.products_discussed)
+            if row.content_hash == digest:
+                counts["unchanged"] += 1
+                continue
+            flags = prefilter(text)
+            if flags:
+                if llm_budget is not None and len(flagged) >= llm_budget:
+                    # Out of budget: the loop ends after this batch, the rest waits for the next run.
+                    break
+                flagged.append((row, text, digest, flags))
+                continue
+            counts["cleared"] += 1
+            reviews.append(
+                review_table(
+                    interaction_id=row.id,
+                    prompt_hash=version,
+                    content_hash=digest,
+                    reviewed_by="prefilter",
+                    risk_level="low",
+                    issues=[],
+                    prefilter_flags=[],
+                    reviewed_at=now,
+                )
+            )
+
+        results = await asyncio.gather(
+            *(review(text, row.products_discussed) for row, text, _, _ in flagged), return_exceptions=True
+        )
+        if llm_budget is not None:
+            llm_budget -= len(flagged)
+        now = datetime.now(timezone.utc)
+        for (row, _, digest, flags), result in zip(flagged, results):
+            if isinstance(result, Exception):
+                counts["failed"] += 1
+                logger.warning("Compliance review of interaction %s failed: %s", row.id, result)
+                continue
+            counts["reviewed"] += 1
+            reviews.append(
+                review_table(
+                    interaction_id=row.id,
+                    prompt_hash=version,
+                    content_hash=digest,
+                    reviewed_by="llm",
+                    risk_level=result["risk_level"],
+                    issues=result.get("issues") or [],
+                    suggested_remediation=result.get("suggested_remediation"),
+                    prefilter_flags=flags,
+                    reviewed_at=now,
+                )
+            )
+        if reviews:
+            await _save(session_factory, reviews)
+
+    for outcome, count in counts.items():
+        COMPLIANCE_SCAN_ROWS.labels(outcome).inc(count)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Review interactions missing a current compliance review.")
+    parser.add_argument("--batch-size", type=int, default=settings.compliance_scan_batch_size)
+    parser.add_argument("--concurrency", type=int, default=settings.compliance_scan_concurrency)
+    parser.add_argument("--max-llm-reviews", type=int, default=None, help="stop after sending this many notes to the LLM")
+    args = parser.parse_args()
+
+    counts = asyncio.run(scan_compliance(AsyncSessionLocal, args.batch_size, args.concurrency, args.max_llm_reviews))
+    print(f"prompt version {review_version()[:12]}: " + ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Embedding index over interactions (``interaction_embeddings``) for next-best-action retrieval.
+
+Vectors are stored in the database next to the rows they describe and scored
+with NumPy over a bounded candidate set: the HCP's own interactions plus those
+of HCPs with the same specialty. Run ``python -m app.services.embeddings`` from
+``backend/`` to embed rows written before the index existed.
+"""
+import argparse
+import asyncio
+import hashlib
+import re
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.token_budget import count_tokens, truncate_text
+
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Longest text embedded per interaction; summaries are short, raw notes can be huge.
+MAX_EMBED_TOKENS = 256
+# Only snippets at least this similar to the query are worth the tokens.
+MIN_SCORE = 0.1
+
+
+class HashingEmbedder:
+    """Deterministic bag of words and bigrams hashed into ``dimensions`` signed buckets.
+
+    Needs no model download, so it is the default and what tests use.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> list[str]:
+        words = _TOKEN.findall(text.lower())
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """A local ``sentence-transformers`` model; install the package to use it."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.dimensions = self.model.get_sentence_embedding_dimension()
+        self.name = f"{model_name}-{self.dimensions}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        return _normalize(np.asarray(self.model.encode(texts), dtype=np.float32))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+_embedder = None
+
+
+def get_embedder():
+    """The ``EMBEDDING_BACKEND`` embedder, loaded on first use."""
+    global _embedder
+    if _embedder is None:
+        if settings.embedding_backend == "sentence_transformers":
+            _embedder = SentenceTransformerEmbedder(settings.embedding_model)
+        elif settings.embedding_backend == "hashing":
+            _embedder = HashingEmbedder(settings.embedding_dimensions)
+        else:
+            raise ValueError(f"Unknown embedding backend '{settings.embedding_backend}'")
+    return _embedder
+
+
+def embedding_text(interaction: models.Interaction) -> str:
+    """What an interaction is found by: its summary, outcomes, next steps and products (notes if unsummarized)."""
+    parts = [
+        interaction.summary or interaction.notes or interaction.raw_notes,
+        interaction.outcomes,
+        interaction.next_steps,
+        ", ".join(interaction.products_discussed or []),
+    ]
+    return truncate_text(" ".join(part for part in parts if part), MAX_EMBED_TOKENS)
+
+
+def stale_embeddings(session: Session, interaction_ids: Iterable[int], model: str) -> list[tuple[int, int, str, str]]:
+    """``(interaction_id, hcp_id, text, content_hash)`` for each of ``interaction_ids`` whose text changed."""
+    interaction_ids = list(interaction_ids)
+    interactions = session.scalars(
+        select(models.Interaction).where(models.Interaction.id.in_(interaction_ids))
+    ).all()
+    existing = {
+        row.interaction_id: row
+        for row in session.scalars(
+            select(models.InteractionEmbedding).where(models.InteractionEmbedding.interaction_id.in_(interaction_ids))
+        )
+    }
+    stale = []
+    for interaction in interactions:
+        text = embedding_text(interaction)
+        if not text:
+            continue
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        current = existing.get(interaction.id)
+        if current is None or current.content_hash != content_hash or current.model != model:
+            stale.append((interaction.id, interaction.hcp_id, text, content_hash))
+    return stale
+
+
+def store_embeddings(session: Session, stale: list[tuple[int, int, str, str]], vectors: np.ndarray, model: str) -> None:
+    now = datetime.now(timezone.utc)
+    for (interaction_id, hcp_id, _, content_hash), vector in zip(stale, vectors):
+        session.merge(
+            models.InteractionEmbedding(
+                interaction_id=interaction_id,
+                hcp_id=hcp_id,
+                model=model,
+                content_hash=content_hash,
+                vector=vector.astype(np.float32).tobytes(),
+                updated_at=now,
+            )
+        )
+
+
+def refresh_embeddings(session: Session, interaction_ids: Iterable[int]) -> int:
+    """Embed ``interaction_ids`` whose text changed since they were last embedded; the caller commits."""
+    embedder = get_embedder()
+    stale = stale_embeddings(session, interaction_ids, embedder.name)
+    if stale:
+        store_embeddings(session, stale, embedder.embed([text for _, _, text, _ in stale]), embedder.name)
+    return len(stale)
+
+
+async def embed_interactions(session_factory, *interaction_ids: int) -> None:
+    """Run after committing interaction inserts or updates; unchanged text is not re-embedded.
+
+    The model runs in a worker thread between two short sessions, so neither the
+    event loop nor a database connection waits on it.
+    """
+    embedder = await asyncio.to_thread(get_embedder)
+    async with session_factory() as session:
+        stale = await session.run_sync(stale_embeddings, interaction_ids, embedder.name)
+    if not stale:
+        return
+    vectors = await asyncio.to_thread(embedder.embed, [text for _, _, text, _ in stale])
+    for attempt in range(2):
+        async with session_factory() as session:
+            try:
+                await session.run_sync(store_embeddings, stale, vectors, embedder.name)
+                await session.commit()
+                return
+            except IntegrityError:
+                # A concurrent write embedded the same interaction first; the retry updates it.
+                if attempt:
+                    raise
+
+
+def embed_interactions_sync(session_factory, *interaction_ids: int) -> None:
+    for attempt in range(2):
+        with session_factory() as session:
+            try:
+                refresh_embeddings(session, interaction_ids)
+                session.commit()
+                return
+            except IntegrityError:
+                if attempt:
+                    raise
+
+
+def _snippet(interaction: models.Interaction, hcp: models.HCP, hcp_id: int) -> str:
+    when = interaction.interaction_date or interaction.created_at
+    parts = [
+        interaction.summary or interaction.notes,
+        f"Outcome: {interaction.outcomes}" if interaction.outcomes else None,
+        f"Next: {interaction.next_steps}" if interaction.next_steps else None,
+    ]
+    source = "" if hcp.id == hcp_id else f"[peer {hcp.specialty or 'HCP'}] "
+    date = f"{when.date().isoformat()}: " if when else ""
+    return source + date + " ".join(part for part in parts if part)
+
+
+def candidate_vectors(
+    session: Session, hcp_id: int, model: str, exclude_ids: Iterable[int], candidates: int
+) -> list[tuple[int, bytes]]:
+    """The most recent embedded interactions of the HCP and of HCPs with the same specialty."""
+    specialty = session.scalar(select(models.HCP.specialty).where(models.HCP.id == hcp_id))
+    embedding = models.InteractionEmbedding
+    scope = [embedding.hcp_id == hcp_id]
+    if specialty:
+        scope.append(models.HCP.specialty == specialty)
+    return session.execute(
+        select(embedding.interaction_id, embedding.vector)
+        .join(models.HCP, models.HCP.id == embedding.hcp_id)
+        .where(or_(*scope), embedding.model == model, embedding.interaction_id.not_in(list(exclude_ids)))
+        .order_by(embedding.interaction_id.desc())
+        .limit(candidates)
+    ).all()
+
+
+def rank_candidates(embedder, rows: list[tuple[int, bytes]], query: str, top_k: int) -> list[int]:
+    """Ids of the ``top_k`` candidates most similar to ``query``, best first, above ``MIN_SCORE``."""
+    if not rows:
+        return []
+    matrix = np.frombuffer(b"".join(vector for _, vector in rows), dtype=np.float32).reshape(len(rows), -1)
+    scores = matrix @ embedder.embed([query])[0]
+    best = np.argsort(-scores)[:top_k]
+    return [rows[index][0] for index in best if scores[index] >= MIN_SCORE]
+
+
+def context_snippets(session: Session, hcp_id: int, ranked: list[int], max_tokens: int) -> list[str]:
+    """Snippets for the ``ranked`` interactions totalling at most ``max_tokens``; peers' are labelled as such."""
+    if not ranked:
+        return []
+    loaded = {
+        interaction.id: (interaction, hcp)
+        for interaction, hcp in session.execute(
+            select(models.Interaction, models.HCP)
+            .join(models.HCP, models.HCP.id == models.Interaction.hcp_id)
+            .where(models.Interaction.id.in_(ranked))
+        )
+    }
+    snippets = []
+    remaining = max_tokens
+    for interaction_id in ranked:
+        if interaction_id not in loaded or remaining <= 0:
+            continue
+        snippet = _snippet(*loaded[interaction_id], hcp_id)
+        if count_tokens(snippet) > remaining:
+            snippet = truncate_text(snippet, remaining)
+        snippets.append(snippet)
+        remaining -= count_tokens(snippet)
+    return snippets
+
+
+def retrieve_context(
+    session: Session,
+    hcp_id: int,
+    query: str,
+    top_k: int,
+    max_tokens: int,
+    exclude_ids: Iterable[int] = (),
+    candidates: int = 2000,
+) -> list[str]:
+    """The ``top_k`` interactions most similar to ``query`` as snippets totalling at most ``max_tokens``.
+
+    Candidates are the most recent embedded interactions of the HCP and of HCPs with
+    the same specialty; peers' snippets are labelled as such.
+    """
+    if not query.strip() or top_k <= 0:
+        return []
+    embedder = get_embedder()
+    rows = candidate_vectors(session, hcp_id, embedder.name, exclude_ids, candidates)
+    return context_snippets(session, hcp_id, rank_candidates(embedder, rows, query, top_k), max_tokens)
+
+
+async def aretrieve_context(
+    session: AsyncSession,
+    hcp_id: int,
+    query: str,
+    top_k: int,
+    max_tokens: int,
+    exclude_ids: Iterable[int] = (),
+    candidates: int = 2000,
+) -> list[str]:
+    """``retrieve_context`` with the query embedded and scored in a worker thread, off the event loop."""
+    if not query.strip() or top_k <= 0:
+        return []
+    embedder = await asyncio.to_thread(get_embedder)
+    rows = await session.run_sync(candidate_vectors, hcp_id, embedder.name, exclude_ids, candidates)
+    ranked = await asyncio.to_thread(rank_candidates, embedder, rows, query, top_k)
+    return await session.run_sync(context_snippets, hcp_id, ranked, max_tokens)
+
+
+def rebuild_embeddings(session: Session, batch_size: int = 500) -> int:
+    """Embed every interaction that is missing or stale, committing per batch; returns the number embedded."""
+    embedded = 0
+    last_id = 0
+    while True:
+        interaction_ids = session.scalars(
+            select(models.Interaction.id)
+            .where(models.Interaction.id > last_id)
+            .order_by(models.Interaction.id)
+            .limit(batch_size)
+        ).all()
+        if not interaction_ids:
+            return embedded
+        embedded += refresh_embeddings(session, interaction_ids)
+        session.commit()
+        session.expunge_all()
+        last_id = interaction_ids[-1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embed interactions missing from interaction_embeddings.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        print(f"embedded {rebuild_embeddings(session, args.batch_size)} interactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import and_, or_, select, update
+
+from app.config import settings
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.services.activity_stats import interactions_written
+from app.services.embeddings import embed_interactions
+from app.services.metrics import ENRICHMENT_JOBS
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+
+EXTRACTED_FIELDS = ("summary", "products_discussed", "sentiment", "outcomes", "next_steps", "attendees")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def pending_enrichment() -> dict[str, Any]:
+    """Column values that queue a new interaction for enrichment."""
+    return {"enrichment_status": PENDING, "enrichment_attempts": 0, "enrichment_next_attempt_at": _utcnow()}
+
+
+def _claimable(now: datetime):
+    Interaction = models.Interaction
+    return or_(
+        and_(Interaction.enrichment_status == PENDING, Interaction.enrichment_next_attempt_at <= now),
+        # A worker died mid-job; its lease has run out.
+        and_(Interaction.enrichment_status == PROCESSING, Interaction.enrichment_next_attempt_at <= now),
+    )
+
+
+class EnrichmentQueue:
+    """DB-backed queue of interactions awaiting LLM summary/entity extraction.
+
+    Any number of workers, in any number of processes, claim rows from the
+    ``interactions`` table: ``SELECT ... FOR UPDATE SKIP LOCKED`` on Postgres/MySQL,
+    a single ``UPDATE ... RETURNING`` on SQLite (which serializes writers). A claim
+    is a lease, so jobs held by a crashed worker are picked up again once it expires.
+    Failures are retried with exponential backoff up to ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 300.0,
+        poll_seconds: float = 2.0,
+        lease_seconds: int = 300,
+    ):
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    @classmethod
+    def from_settings(cls) -> "EnrichmentQueue":
+        return cls(
+            max_attempts=settings.enrichment_max_attempts,
+            retry_base_seconds=settings.enrichment_retry_base_seconds,
+            retry_max_seconds=settings.enrichment_retry_max_seconds,
+            poll_seconds=settings.enrichment_poll_seconds,
+            lease_seconds=settings.enrichment_lease_seconds,
+        )
+
+    def llm(self):
+        # The LLM stack is imported by the first job rather than at API startup.
+        from app.services.model_router import model_router
+
+        return model_router.for_task("extraction")
+
+    async def claim(self) -> Optional[tuple[int, int]]:
+        """Lease the next due job; returns (interaction_id, attempt number) or None."""
+        Interaction = models.Interaction
+        now = _utcnow()
+        lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+        due = (
+            select(Interaction.id, Interaction.enrichment_attempts)
+            .where(_claimable(now))
+            .order_by(Interaction.enrichment_next_attempt_at, Interaction.id)
+            .limit(1)
+        )
+        async with self.session_factory() as session:
+            if session.bind.dialect.name == "sqlite":
+                row = (
+                    await session.execute(
+                        update(Interaction)
+                        .where(Interaction.id == due.with_only_columns(Interaction.id).scalar_subquery())
+                        .values(
+                            enrichment_status=PROCESSING,
+                            enrichment_attempts=Interaction.enrichment_attempts + 1,
+                            enrichment_next_attempt_at=lease_expires_at,
+                        )
+                        .returning(Interaction.id, Interaction.enrichment_attempts)
+                        .execution_options(synchronize_session=False)
+                    )
+                ).first()
+                await session.commit()
+                return tuple(row) if row else None
+
+            row = (await session.execute(due.with_for_update(skip_locked=True))).first()
+            if row is None:
+                await session.rollback()
+                return None
+            interaction_id, attempts = row
+            await session.execute(
+                update(Interaction)
+                .where(Interaction.id == interaction_id)
+                .values(
+                    enrichment_status=PROCESSING,
+                    enrichment_attempts=attempts + 1,
+                    enrichment_next_attempt_at=lease_expires_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            return interaction_id, attempts + 1
+
+    def _retry_delay(self, attempt: int) -> float:
+        delay = min(self.retry_base_seconds * 2 ** (attempt - 1), self.retry_max_seconds)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _finish(self, interaction_id: int, attempt: int, values: dict[str, Any]) -> bool:
+        """Apply ``values`` only if this worker still holds the lease."""
+        Interaction = models.Interaction
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(Interaction)
+                .where(
+                    Interaction.id == interaction_id,
+                    Interaction.enrichment_status == PROCESSING,
+                    Interaction.enrichment_attempts == attempt,
+                )
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            return result.rowcount == 1
+
+    async def process(self, interaction_id: int, attempt: int) -> None:
+        async with self.session_factory() as session:
+            interaction = await session.get(models.Interaction, interaction_id)
+            if interaction is None:
+                return
+            hcp_id = interaction.hcp_id
+            notes = interaction.raw_notes or interaction.notes or ""
+
+        from app.services.extraction import extraction_service
+
+        try:
+            extracted = await extraction_service.extract(self.llm(), notes)
+            if not extracted:
+                raise ValueError("LLM response was not valid JSON")
+        except Exception as exc:
+            error = f"{exc.__class__.__name__}: {exc}"
+            if attempt >= self.max_attempts:
+                await self._finish(interaction_id, attempt, {"enrichment_status": FAILED, "enrichment_error": error})
+                ENRICHMENT_JOBS.labels(FAILED).inc()
+            else:
+                retry_at = _utcnow() + timedelta(seconds=self._retry_delay(attempt))
+                await self._finish(
+                    interaction_id,
+                    attempt,
+                    {"enrichment_status": PENDING, "enrichment_error": error, "enrichment_next_attempt_at": retry_at},
+                )
+                ENRICHMENT_JOBS.labels("retried").inc()
+            return
+
+        values = {field: extracted.get(field) for field in EXTRACTED_FIELDS}
+        values.update(
+            extracted_entities=extracted,
+            enrichment_status=COMPLETED,
+            enrichment_error=None,
+            enrichment_next_attempt_at=None,
+        )
+        if await self._finish(interaction_id, attempt, values):
+            ENRICHMENT_JOBS.labels(COMPLETED).inc()
+            await interactions_written(self.session_factory, hcp_id)
+            await embed_interactions(self.session_factory, interaction_id)
+
+    async def _worker(self) -> None:
+        while True:
+            # Clear before claiming so a notify() that races with an empty claim is not lost.
+            self._wakeup.clear()
+            try:
+                job = await self.claim()
+                if job is not None:
+                    await self.process(*job)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Enrichment worker failed; retrying after poll interval")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def notify(self) -> None:
+        """Wake idle workers in this process after queueing a job."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, workers: int) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+enrichment_queue = EnrichmentQueue.from_settings()
@@ -0,0 +1,210 @@
+"""Streaming export of interactions as CSV, NDJSON or Parquet.
+
+Rows come off a server-side cursor in ``batch_size`` chunks and each chunk is
+encoded and handed to the response before the next is fetched, so memory stays
+flat however many rows match. Parquet is written one row group per chunk.
+
+``updated_at`` is stamped with the database's ``now()``, which on Postgres is
+the start of the writing transaction. A transaction that commits after an
+export has read past its timestamp would never be exported, so the watermark
+handed to the next run trails the newest exported row by
+``EXPORT_WATERMARK_LAG_SECONDS`` and the overlap is exported again. Writes
+that stay uncommitted for longer than the lag can still be missed.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+
+EXPORT_COLUMNS = (
+    "id",
+    "hcp_id",
+    "interaction_type",
+    "channel",
+    "interaction_date",
+    "summary",
+    "notes",
+    "attendees",
+    "outcomes",
+    "next_steps",
+    "products_discussed",
+    "sentiment",
+    "extracted_entities",
+    "source",
+    "enrichment_status",
+    "created_at",
+    "updated_at",
+)
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _timestamp(dialect: str, value: Any) -> Any:
+    # SQLite stores CURRENT_TIMESTAMP and Python datetimes as differently formatted text.
+    return func.datetime(value) if dialect == "sqlite" else value
+
+
+def _filters(
+    dialect: str, hcp_id: Optional[int], updated_since: Optional[datetime], watermark: Optional[datetime]
+) -> list:
+    updated_at = _timestamp(dialect, models.Interaction.updated_at)
+    filters = []
+    if hcp_id is not None:
+        filters.append(models.Interaction.hcp_id == hcp_id)
+    if updated_since is not None:
+        filters.append(updated_at >= _timestamp(dialect, updated_since))
+    if watermark is not None:
+        filters.append(updated_at <= _timestamp(dialect, watermark))
+    return filters
+
+
+def export_watermark(session: Session, hcp_id: Optional[int], updated_since: Optional[datetime]) -> Optional[datetime]:
+    """Newest ``updated_at`` the export will include; rows written while it streams wait for the next run."""
+    filters = _filters(session.get_bind().dialect.name, hcp_id, updated_since, None)
+    return session.scalar(select(func.max(models.Interaction.updated_at)).where(*filters))
+
+
+def resume_watermark(
+    watermark: Optional[datetime], updated_since: Optional[datetime], lag_seconds: float
+) -> Optional[datetime]:
+    """The ``updated_since`` for the next run: ``lag_seconds`` behind ``watermark``, never behind this run's."""
+    if watermark is None:
+        return updated_since
+    resume = _aware(watermark) - timedelta(seconds=lag_seconds)
+    return resume if updated_since is None else max(resume, _aware(updated_since))
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite returns naive UTC timestamps.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def iter_batches(
+    session: Session,
+    columns: list[str],
+    hcp_id: Optional[int],
+    updated_since: Optional[datetime],
+    watermark: Optional[datetime],
+    batch_size: int,
+) -> Iterator[list[dict[str, Any]]]:
+    """Matching rows in (updated_at, id) order, ``batch_size`` at a time from a server-side cursor."""
+    table = models.Interaction
+    statement = (
+        select(*(getattr(table, column) for column in columns))
+        .where(*_filters(session.get_bind().dialect.name, hcp_id, updated_since, watermark))
+        .order_by(table.updated_at, table.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in session.execute(statement).mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+def _text_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def encode_csv(batches: Iterator[list[dict[str, Any]]], columns: list[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_text_value(row[column]) for column in columns] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(batches: Iterator[list[dict[str, Any]]], columns: list[str]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(json.dumps(row, default=_text_value) + "\n" for row in batch).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that keeps only what was written since the last ``drain``."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet_schema(columns: list[str]):
+    import pyarrow as pa
+
+    timestamp = pa.timestamp("us", tz="UTC")
+    types = {
+        "id": pa.int64(),
+        "hcp_id": pa.int64(),
+        "interaction_date": timestamp,
+        "created_at": timestamp,
+        "updated_at": timestamp,
+        "products_discussed": pa.list_(pa.string()),
+    }
+    return pa.schema([(column, types.get(column, pa.string())) for column in columns])
+
+
+def _parquet_value(column: str, value: Any) -> Any:
+    if column == "products_discussed":
+        return [str(item) for item in value] if isinstance(value, list) else None
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def encode_parquet(batches: Iterator[list[dict[str, Any]]], columns: list[str]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            arrays = {column: [_parquet_value(column, row[column]) for row in batch] for column in columns}
+            writer.write_table(pa.table(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "parquet": encode_parquet}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,281 @@
+import asyncio
+import copy
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, field_validator
+
+from app.config import settings
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.services.cache import MemoryCache
+from app.services.metrics import STRUCTURED_OUTPUTS
+from app.services.model_router import model_router
+from app.services.structured_output import parse_output, response_text
+from app.services.token_budget import count_tokens, record_savings, truncate_text
+
+
+SUMMARY_PROMPT = SystemMessage(
+    content=(
+        "You are a life sciences CRM assistant. Extract a concise summary and key entities "
+        "from HCP interaction notes. Return strict JSON with keys: summary, products_discussed, "
+        "sentiment, outcomes, next_steps, attendees. Use arrays for products_discussed."))
+
+
+class ExtractionOutput(BaseModel):
+    """Shape of a ``SUMMARY_PROMPT`` answer; near-misses (a string for a list, and so on) are coerced."""
+
+    summary: str
+    products_discussed: Optional[list[str]] = None
+    sentiment: Optional[str] = None
+    outcomes: Optional[str] = None
+    next_steps: Optional[str] = None
+    attendees: Optional[str] = None
+
+    @field_validator("products_discussed", mode="before")
+    @classmethod
+    def _split_products(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return [product.strip() for product in value.split(",") if product.strip()]
+        return value
+
+    @field_validator("sentiment", mode="before")
+    @classmethod
+    def _normalize_sentiment(cls, value: Any) -> Any:
+        return (value.strip().lower() or None) if isinstance(value, str) else value
+
+    @field_validator("outcomes", "next_steps", "attendees", mode="before")
+    @classmethod
+    def _join_lists(cls, value: Any) -> Any:
+        if isinstance(value, list):
+            return "; ".join(str(item) for item in value)
+        return value
+
+
+def normalize_notes(notes: str) -> str:
+    return " ".join(notes.split())
+
+
+def cache_key(model_name: str, prompt: str, notes: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model_name, prompt, normalize_notes(notes)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _model_name(llm) -> str:
+    return getattr(llm, "model_name", None) or type(llm).__name__
+
+
+class SQLCache:
+    """Persistent cache in the ``extraction_cache`` table, shared by all workers."""
+
+    def __init__(self, ttl_seconds: int, session_factory=AsyncSessionLocal):
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+
+    async def get(self, key: str) -> Optional[dict]:
+        async with self.session_factory() as session:
+            entry = await session.get(models.ExtractionCacheEntry, key)
+            if entry is None:
+                return None
+            expires_at = entry.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                await session.delete(entry)
+                await session.commit()
+                return None
+            return entry.payload
+
+    async def set(self, key: str, model_name: str, payload: dict) -> None:
+        async with self.session_factory() as session:
+            await session.merge(
+                models.ExtractionCacheEntry(
+                    key=key,
+                    model=model_name,
+                    payload=payload,
+                    expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds),
+                )
+            )
+            await session.commit()
+
+
+class ExtractionService:
+    """Summary/entity extraction for raw notes, cached by hash(model, prompt, normalized notes).
+
+    Lookups go memory -> SQL backend (if configured) -> LLM. Concurrent requests
+    for the same key share one LLM call. Parse failures are not cached.
+    """
+
+    def __init__(
+        self,
+        memory: MemoryCache,
+        persistent: Optional[SQLCache] = None,
+        prompt: SystemMessage = SUMMARY_PROMPT,
+        max_note_tokens: int = 1500,
+        repair_llm=None,
+    ):
+        self.memory = memory
+        self.persistent = persistent
+        self.prompt = prompt
+        self.max_note_tokens = max_note_tokens
+        # Asked again when the first model's answer cannot be validated or repaired.
+        self.repair_llm = repair_llm
+        self.hits = 0
+        self.misses = 0
+        self.llm_calls = 0
+        self.escalations = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ExtractionService":
+        memory = MemoryCache(settings.extraction_cache_max_entries, settings.extraction_cache_ttl_seconds)
+        persistent = None
+        if settings.extraction_cache_backend == "sql":
+            persistent = SQLCache(settings.extraction_cache_ttl_seconds)
+        return cls(
+            memory,
+            persistent,
+            max_note_tokens=settings.llm_max_note_tokens,
+            repair_llm=model_router.for_task("json_repair"),
+        )
+
+    def _notes_message(self, notes: str) -> HumanMessage:
+        """Normalized notes, truncated to the note budget; very long notes lose their middle."""
+        normalized = normalize_notes(notes)
+        budgeted = truncate_text(normalized, self.max_note_tokens)
+        prompt_tokens = count_tokens(self.prompt.content)
+        record_savings("extraction", prompt_tokens + count_tokens(notes), prompt_tokens + count_tokens(budgeted))
+        return HumanMessage(content=budgeted)
+
+    async def extract(self, llm, notes: str) -> dict[str, Any]:
+        model_name = _model_name(llm)
+        key = cache_key(model_name, self.prompt.content, notes)
+
+        cached = self.memory.get(key)
+        if cached is None and self.persistent is not None:
+            cached = await self.persistent.get(key)
+            if cached is not None:
+                self.memory.set(key, cached)
+        if cached is not None:
+            self.hits += 1
+            return copy.deepcopy(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            return copy.deepcopy(await asyncio.shield(inflight))
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.llm_calls += 1
+            message = self._notes_message(notes)
+            response = await llm.ainvoke([self.prompt, message])
+            payload = parse_output("extraction", response_text(response), ExtractionOutput) or {}
+            if not payload and self.repair_llm is not None:
+                payload = (await self._escalate([message]))[0]
+            if payload:
+                self.memory.set(key, payload)
+                if self.persistent is not None:
+                    await self.persistent.set(key, model_name, payload)
+            future.set_result(payload)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters re-raise it; keep asyncio from logging "exception never retrieved".
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        return copy.deepcopy(payload)
+
+    async def extract_many(self, llm, notes: list[str], max_concurrency: int) -> list[dict[str, Any] | Exception]:
+        """Extract a batch of notes; misses go through one ``abatch`` with bounded concurrency.
+
+        Returns one result per input in order; failed calls are returned as the exception.
+        """
+        model_name = _model_name(llm)
+        keys = [cache_key(model_name, self.prompt.content, item) for item in notes]
+        results: dict[str, dict[str, Any] | Exception] = {}
+        pending: dict[str, HumanMessage] = {}
+        for key, item in zip(keys, notes):
+            if key in results or key in pending:
+                self.hits += 1
+                continue
+            cached = self.memory.get(key)
+            if cached is None and self.persistent is not None:
+                cached = await self.persistent.get(key)
+                if cached is not None:
+                    self.memory.set(key, cached)
+            if cached is not None:
+                self.hits += 1
+                results[key] = cached
+            else:
+                self.misses += 1
+                pending[key] = self._notes_message(item)
+
+        if pending:
+            self.llm_calls += len(pending)
+            responses = await llm.abatch(
+                [[self.prompt, message] for message in pending.values()],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True,
+            )
+            for key, response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    results[key] = response
+                else:
+                    results[key] = parse_output("extraction", response_text(response), ExtractionOutput) or {}
+            unparsed = [key for key in pending if results[key] == {}]
+            if unparsed and self.repair_llm is not None:
+                for key, payload in zip(unparsed, await self._escalate([pending[key] for key in unparsed])):
+                    results[key] = payload
+            for key in pending:
+                payload = results[key]
+                if payload and not isinstance(payload, Exception):
+                    self.memory.set(key, payload)
+                    if self.persistent is not None:
+                        await self.persistent.set(key, model_name, payload)
+
+        return [
+            results[key] if isinstance(results[key], Exception) else copy.deepcopy(results[key])
+            for key in keys
+        ]
+
+    async def _escalate(self, messages: list[HumanMessage]) -> list[dict[str, Any]]:
+        """Re-run extractions whose answer could not be validated or repaired on the repair model.
+
+        Answers that still fail stay ``{}``.
+        """
+        self.escalations += len(messages)
+        STRUCTURED_OUTPUTS.labels("extraction", "retried").inc(len(messages))
+        self.llm_calls += len(messages)
+        responses = await self.repair_llm.abatch(
+            [[self.prompt, message] for message in messages], return_exceptions=True
+        )
+        return [
+            {}
+            if isinstance(response, Exception)
+            else parse_output("extraction", response_text(response), ExtractionOutput) or {}
+            for response in responses
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sql" if self.persistent is not None else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "llm_calls": self.llm_calls,
+            "escalations": self.escalations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+
+extraction_service = ExtractionService.from_settings()
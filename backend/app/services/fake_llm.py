@@ -0,0 +1,97 @@
+"""Deterministic local chat model for benchmarks and development without a Groq key.
+
+Responds to the extraction, compliance, next-best-action and history-summary
+prompts with canned text or JSON. Agent turns get canned tool calls picked from
+the user's message (restricted to the bound tools), then a short reply once the
+tool results are in. Every call sleeps ``latency`` seconds to mimic a provider
+round-trip. Select it with ``LLM_PROVIDER=fake``.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+# Message keyword -> tool calls, first match wins; anything else logs an interaction.
+TOOL_PLANS = [
+    ("compliance", ("log_interaction", "check_compliance")),
+    ("next", ("fetch_hcp_profile", "suggest_next_best_action")),
+    ("profile", ("fetch_hcp_profile",)),
+    ("search", ("search_interactions",)),
+]
+DEFAULT_PLAN = ("log_interaction",)
+TOOL_ARGUMENTS = {
+    "log_interaction": lambda text: {"raw_notes": text},
+    "check_compliance": lambda text: {"raw_notes": text},
+    "search_interactions": lambda text: {"query": text.split()[-1]},
+}
+
+
+def _call_id(text: str, name: str) -> str:
+    return "call_" + hashlib.sha1(f"{name}\0{text}".encode("utf-8")).hexdigest()[:16]
+
+
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake"
+    latency: float = 0.2
+    bound_tools: tuple[str, ...] = ()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools, **kwargs: Any):
+        names = tuple(convert_to_openai_tool(tool)["function"]["name"] for tool in tools)
+        return self.model_copy(update={"bound_tools": names})
+
+    def _tool_calls(self, text: str) -> list[dict[str, Any]]:
+        lowered = text.lower()
+        plan = next((names for keyword, names in TOOL_PLANS if keyword in lowered), DEFAULT_PLAN)
+        if self.bound_tools:
+            plan = [name for name in plan if name in self.bound_tools] or [self.bound_tools[0]]
+        return [
+            {"name": name, "args": TOOL_ARGUMENTS.get(name, lambda _: {})(text), "id": _call_id(text, name)}
+            for name in plan
+        ]
+
+    def _reply(self, messages: list[BaseMessage]) -> AIMessage:
+        system = messages[0].content if isinstance(messages[0], SystemMessage) else ""
+        last = messages[-1]
+        if "Extract a concise summary" in system:
+            return AIMessage(
+                content=json.dumps(
+                    {
+                        "summary": f"Summary: {last.content[:60]}",
+                        "products_discussed": ["Cardiozen"],
+                        "sentiment": "positive",
+                        "outcomes": "Agreed to review data",
+                        "next_steps": "Follow up in two weeks",
+                        "attendees": "HCP",
+                    }
+                )
+            )
+        if "compliance reviewer" in system:
+            return AIMessage(content=json.dumps({"risk_level": "low", "issues": [], "suggested_remediation": ""}))
+        if "next best action" in system:
+            return AIMessage(content="Call the HCP next week to review the Cardiozen data.")
+        if "Summarize this CRM assistant conversation" in system:
+            return AIMessage(content="Earlier, the rep logged interactions with the active HCP.")
+        if isinstance(last, ToolMessage):
+            return AIMessage(content="Done.")
+        if isinstance(last, HumanMessage) and self.bound_tools:
+            return AIMessage(content="", tool_calls=self._tool_calls(str(last.content)))
+        return AIMessage(content="Call the HCP next week.")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
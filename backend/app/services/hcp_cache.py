@@ -0,0 +1,166 @@
+import asyncio
+import copy
+import time
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import models
+from app.services.cache import MemoryCache, RedisCache
+
+
+def _profile_key(hcp_id: int) -> str:
+    return f"hcp-profile:{hcp_id}"
+
+
+async def _load_profile(session: AsyncSession, hcp_id: int, recent_limit: int) -> Optional[dict[str, Any]]:
+    hcp = await session.get(models.HCP, hcp_id)
+    if not hcp:
+        return None
+    interactions = (
+        await session.scalars(
+            select(models.Interaction)
+            .where(models.Interaction.hcp_id == hcp_id)
+            .order_by(*models.newest_first(session.get_bind().dialect.name))
+            .limit(recent_limit)
+        )
+    ).all()
+    return {
+        "hcp": {
+            "id": hcp.id,
+            "name": hcp.name,
+            "specialty": hcp.specialty,
+            "organization": hcp.organization,
+            "city": hcp.city,
+            "state": hcp.state,
+            "tier": hcp.tier,
+        },
+        "recent_interactions": [
+            {
+                "id": interaction.id,
+                "summary": interaction.summary,
+                "interaction_date": interaction.interaction_date.isoformat() if interaction.interaction_date else None,
+                "sentiment": interaction.sentiment,
+                "outcomes": interaction.outcomes,
+                "next_steps": interaction.next_steps,
+            }
+            for interaction in interactions
+        ],
+    }
+
+
+class HCPProfileCache:
+    """Read-through cache of an HCP record plus its most recent interactions.
+
+    Lookups go local LRU -> shared backend (Redis, if configured) -> database.
+    Every interaction write must call ``invalidate`` (``ainvalidate`` on the event
+    loop) for the HCP it touched. Redis calls run in a thread, and a Redis error
+    counts as a miss. Other workers' local copies can lag for up to the local TTL,
+    which is kept short when a shared backend is in use.
+
+    When profiles are loaded from a read replica, a load within
+    ``replica_lag_seconds`` of this process invalidating the HCP is returned but
+    not cached, so a lagging replica cannot pin a pre-write profile for the full TTL.
+    """
+
+    def __init__(
+        self,
+        local: MemoryCache,
+        shared: Optional[RedisCache] = None,
+        recent_limit: int = 5,
+        replica_lag_seconds: float = 0.0,
+    ):
+        self.local = local
+        self.shared = shared
+        self.recent_limit = recent_limit
+        self.replica_lag_seconds = replica_lag_seconds
+        self._invalidated_at: dict[int, float] = {}
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "HCPProfileCache":
+        shared = None
+        local_ttl = settings.hcp_cache_ttl_seconds
+        if settings.hcp_cache_redis_url:
+            shared = RedisCache.from_url(settings.hcp_cache_redis_url, settings.hcp_cache_ttl_seconds)
+            local_ttl = min(local_ttl, settings.hcp_cache_local_ttl_seconds)
+        return cls(
+            MemoryCache(settings.hcp_cache_max_entries, local_ttl),
+            shared,
+            recent_limit=settings.hcp_cache_recent_interactions,
+            replica_lag_seconds=settings.hcp_cache_replica_lag_seconds if settings.database_read_url else 0.0,
+        )
+
+    def _recently_invalidated(self, hcp_id: int) -> bool:
+        invalidated_at = self._invalidated_at.get(hcp_id)
+        if invalidated_at is None:
+            return False
+        if time.monotonic() - invalidated_at < self.replica_lag_seconds:
+            return True
+        del self._invalidated_at[hcp_id]
+        return False
+
+    async def get_profile(self, session: AsyncSession, hcp_id: int) -> Optional[dict[str, Any]]:
+        key = _profile_key(hcp_id)
+        profile = self.local.get(key)
+        if profile is not None:
+            self.local_hits += 1
+            return copy.deepcopy(profile)
+        if self.shared is not None:
+            profile = await asyncio.to_thread(self.shared.get, key)
+            if profile is not None:
+                self.shared_hits += 1
+                self.local.set(key, profile)
+                return copy.deepcopy(profile)
+
+        self.misses += 1
+        profile = await _load_profile(session, hcp_id, self.recent_limit)
+        if profile is not None and not self._recently_invalidated(hcp_id):
+            self.local.set(key, profile)
+            if self.shared is not None:
+                await asyncio.to_thread(self.shared.set, key, profile)
+        return copy.deepcopy(profile)
+
+    def _invalidate_local(self, hcp_ids: tuple[int, ...]) -> list[str]:
+        if self.replica_lag_seconds:
+            now = time.monotonic()
+            self._invalidated_at = {
+                hcp_id: invalidated_at
+                for hcp_id, invalidated_at in self._invalidated_at.items()
+                if now - invalidated_at < self.replica_lag_seconds
+            }
+            self._invalidated_at.update(dict.fromkeys(hcp_ids, now))
+        keys = [_profile_key(hcp_id) for hcp_id in hcp_ids]
+        for key in keys:
+            self.local.delete(key)
+        return keys
+
+    def invalidate(self, *hcp_ids: int) -> None:
+        """For sync write paths, which already run off the event loop."""
+        keys = self._invalidate_local(hcp_ids)
+        if self.shared is not None:
+            self.shared.delete(*keys)
+
+    async def ainvalidate(self, *hcp_ids: int) -> None:
+        keys = self._invalidate_local(hcp_ids)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.delete, *keys)
+
+    def stats(self) -> dict[str, Any]:
+        hits = self.local_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            "backend": "memory+redis" if self.shared is not None else "memory",
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "local_entries": len(self.local),
+        }
+
+
+hcp_profile_cache = HCPProfileCache.from_settings()
@@ -0,0 +1,154 @@
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import models
+from app.db.session import AsyncSessionLocal
+from app.services.metrics import IDEMPOTENCY_REQUESTS
+
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+PURGE_INTERVAL_SECONDS = 300
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def request_hash(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """``Idempotency-Key`` bookkeeping in the ``idempotency_keys`` table.
+
+    ``claim`` inserts the key before the request does any work, so of several
+    concurrent duplicates exactly one wins the primary key; the others get 409
+    while it runs and the stored response once it has completed. Keys expire after
+    ``ttl_seconds``; one left unfinished by a crashed request can be reclaimed after
+    ``lock_seconds``.
+    """
+
+    def __init__(self, ttl_seconds: int, lock_seconds: int, session_factory=AsyncSessionLocal):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.session_factory = session_factory
+        self._last_purge = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "IdempotencyStore":
+        return cls(settings.idempotency_ttl_seconds, settings.idempotency_lock_seconds)
+
+    def _reclaimable(self, now: datetime):
+        table = models.IdempotencyKey
+        return or_(
+            table.expires_at <= now,
+            table.status_code.is_(None) & (table.created_at <= now - timedelta(seconds=self.lock_seconds)),
+        )
+
+    async def claim(self, scope: str, key: str, payload_hash: str) -> Optional[JSONResponse]:
+        """Reserve ``key`` for this request; returns the stored response if it already completed."""
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+        await self._maybe_purge()
+        table = models.IdempotencyKey
+        # The second pass runs after deleting an expired or abandoned row.
+        for _ in range(2):
+            now = _utcnow()
+            async with self.session_factory() as session:
+                session.add(
+                    table(
+                        scope=scope,
+                        key=key,
+                        request_hash=payload_hash,
+                        created_at=now,
+                        expires_at=now + timedelta(seconds=self.ttl_seconds),
+                    )
+                )
+                try:
+                    await session.commit()
+                    IDEMPOTENCY_REQUESTS.labels(scope, "claimed").inc()
+                    return None
+                except IntegrityError:
+                    await session.rollback()
+
+                result = await session.execute(
+                    delete(table).where(table.scope == scope, table.key == key, self._reclaimable(now))
+                )
+                await session.commit()
+                if result.rowcount:
+                    continue
+                existing = await session.get(table, (scope, key))
+                if existing is None:
+                    continue
+                if existing.request_hash != payload_hash:
+                    IDEMPOTENCY_REQUESTS.labels(scope, "mismatch").inc()
+                    raise HTTPException(
+                        status_code=422, detail="Idempotency-Key was already used for a different request"
+                    )
+                if existing.status_code is None:
+                    IDEMPOTENCY_REQUESTS.labels(scope, "in_progress").inc()
+                    raise HTTPException(
+                        status_code=409,
+                        detail="A request with this Idempotency-Key is still in progress",
+                        headers={"Retry-After": "1"},
+                    )
+                IDEMPOTENCY_REQUESTS.labels(scope, "replayed").inc()
+                return JSONResponse(
+                    content=existing.response,
+                    status_code=existing.status_code,
+                    headers={REPLAYED_HEADER: "true"},
+                )
+        raise HTTPException(status_code=409, detail="Idempotency-Key is being reused concurrently; retry")
+
+    async def complete(
+        self,
+        scope: str,
+        key: str,
+        status_code: int,
+        response: Any,
+        session: Optional[AsyncSession] = None,
+    ) -> None:
+        """Store the response for replays. With ``session``, it commits together with the caller's writes."""
+        table = models.IdempotencyKey
+        statement = (
+            update(table)
+            .where(table.scope == scope, table.key == key)
+            .values(status_code=status_code, response=response)
+        )
+        if session is not None:
+            await session.execute(statement)
+            return
+        async with self.session_factory() as own_session:
+            await own_session.execute(statement)
+            await own_session.commit()
+
+    async def release(self, scope: str, key: str) -> None:
+        """Forget an unfinished key after the request failed, so the client can retry it."""
+        table = models.IdempotencyKey
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(table).where(table.scope == scope, table.key == key, table.status_code.is_(None))
+            )
+            await session.commit()
+
+    async def _maybe_purge(self) -> None:
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        async with self.session_factory() as session:
+            await session.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at <= _utcnow()))
+            await session.commit()
+
+
+idempotency_store = IdempotencyStore.from_settings()
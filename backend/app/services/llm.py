@@ -0,0 +1,115 @@
+import time
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import LLMResult
+from langchain_groq import ChatGroq
+
+from app.config import settings
+from app.services.fake_llm import FakeChatModel
+from app.services.llm_gateway import llm_gateway
+from app.services.metrics import LLM_ERRORS, LLM_SECONDS, LLM_TOKENS, increment, record_stage
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Callback handler attached to every chat model: latency, tokens and errors per model."""
+
+    # Run in the caller's context so the request's metrics are visible.
+    run_inline = True
+
+    def __init__(self):
+        self._runs: dict[UUID, tuple[str, float]] = {}
+
+    def _start(self, run_id: UUID, serialized: Optional[dict], metadata: Optional[dict]) -> None:
+        model = (metadata or {}).get("ls_model_name") or ((serialized or {}).get("kwargs") or {}).get("model_name")
+        self._runs[run_id] = (model or "unknown", time.perf_counter())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any) -> None:
+        self._start(run_id, serialized, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, metadata=None, **kwargs: Any) -> None:
+        self._start(run_id, serialized, metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model, started = run
+        elapsed = time.perf_counter() - started
+        LLM_SECONDS.labels(model).observe(elapsed)
+        record_stage("llm", elapsed)
+        input_tokens, output_tokens = _token_usage(response)
+        LLM_TOKENS.labels(model, "input").inc(input_tokens)
+        LLM_TOKENS.labels(model, "output").inc(output_tokens)
+        increment("input_tokens", input_tokens)
+        increment("output_tokens", output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            LLM_ERRORS.labels(run[0]).inc()
+
+
+llm_metrics = LLMMetricsHandler()
+
+
+class GatewayMixin:
+    """Takes a slot from the LLM gateway before every provider call, including tool-calling ones."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        async with llm_gateway.slot(self.model_name, messages, kwargs.get("tools")):
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+class StreamingGatewayMixin(GatewayMixin):
+    # Only for models that implement ``_astream``: defining it tells LangChain the model can stream.
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        async with llm_gateway.slot(self.model_name, messages, kwargs.get("tools")):
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+
+
+class GatedChatGroq(StreamingGatewayMixin, ChatGroq):
+    pass
+
+
+class GatedFakeChatModel(GatewayMixin, FakeChatModel):
+    pass
+
+
+def _groq(model_name: str) -> BaseChatModel:
+    return GatedChatGroq(api_key=settings.groq_api_key, model_name=model_name, callbacks=[llm_metrics])
+
+
+def _fake(model_name: str) -> BaseChatModel:
+    return GatedFakeChatModel(
+        model_name=model_name, latency=settings.fake_llm_latency_seconds, callbacks=[llm_metrics]
+    )
+
+
+PROVIDERS: dict[str, Callable[[str], BaseChatModel]] = {
+    "groq": _groq,
+    "fake": _fake,
+}
+
+
+def get_chat_model(model_name: Optional[str] = None) -> BaseChatModel:
+    """Chat model for ``model_name`` (default ``GROQ_MODEL``) from the ``LLM_PROVIDER`` backend.
+
+    Every model reports to the LLM metrics handler and is rate limited by the LLM gateway.
+    """
+    if settings.llm_provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{settings.llm_provider}'; expected one of {sorted(PROVIDERS)}")
+    return PROVIDERS[settings.llm_provider](model_name or settings.groq_model)
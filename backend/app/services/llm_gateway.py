@@ -0,0 +1,301 @@
+"""Admission control for LLM calls: per-model token buckets and a fair per-rep queue.
+
+Every chat model from ``app.services.llm`` asks the gateway for a slot before
+calling the provider. Slots come from two token buckets per model, requests per
+minute and tokens per minute, kept in a local SQLite file, so all uvicorn workers
+on a host draw from the same budget. Callers wait in a bounded queue per model
+that is served round-robin across reps (``X-Rep-Id``), so one rep's burst cannot
+starve everyone else. When the queue is full, or a caller would wait longer than
+``max_wait_seconds``, the call fails with ``LLMGatewayBusy`` and the API answers
+429 with ``Retry-After``.
+"""
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.config import settings
+from app.services.token_budget import CHARS_PER_TOKEN, approx_tokens
+
+
+REP_HEADER = "X-Rep-Id"
+# Calls made outside a request (enrichment workers, CLIs) share one lane.
+BACKGROUND_REP = "background"
+# Longest single sleep while waiting for a bucket to refill, so new arrivals are noticed.
+MAX_POLL_SECONDS = 0.5
+
+QUEUE_DEPTH = Gauge("crm_llm_gateway_queue_depth", "LLM calls waiting for a rate-limit slot.", ["model"])
+WAIT_SECONDS = Histogram(
+    "crm_llm_gateway_wait_seconds",
+    "Time LLM calls waited for a rate-limit slot.",
+    ["model"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+REJECTIONS = Counter(
+    "crm_llm_gateway_rejections_total",
+    "LLM calls refused by admission control (queue_full, rep_queue_full, timeout).",
+    ["model", "reason"],
+)
+
+_current_rep: ContextVar[str] = ContextVar("llm_gateway_rep", default=BACKGROUND_REP)
+_admitted: ContextVar[bool] = ContextVar("llm_gateway_admitted", default=False)
+
+
+class LLMGatewayBusy(Exception):
+    """Raised instead of queueing when the model's queue is full or the wait would be too long."""
+
+    def __init__(self, model: str, reason: str, retry_after: float):
+        super().__init__(f"LLM capacity for {model} is exhausted ({reason}); retry in {math.ceil(retry_after)}s")
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@contextmanager
+def rep_scope(rep_id: Optional[str]) -> Iterator[None]:
+    token = _current_rep.set(rep_id or BACKGROUND_REP)
+    try:
+        yield
+    finally:
+        _current_rep.reset(token)
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+class BucketStore:
+    """Token buckets in a SQLite file; ``BEGIN IMMEDIATE`` serializes updates across processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "model TEXT PRIMARY KEY, requests REAL NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def try_acquire(self, model: str, tokens: int, limits: ModelLimits) -> float:
+        """Take one request and ``tokens`` from the model's buckets; returns 0, or the seconds until they refill."""
+        # A call larger than the whole per-minute budget may still run once the bucket is full.
+        tokens = min(tokens, limits.tokens_per_minute)
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = connection.execute(
+                    "SELECT requests, tokens, updated_at FROM buckets WHERE model = ?", (model,)
+                ).fetchone()
+                if row is None:
+                    available_requests, available_tokens = limits.requests_per_minute, limits.tokens_per_minute
+                else:
+                    elapsed = max(now - row[2], 0.0)
+                    available_requests = min(
+                        limits.requests_per_minute, row[0] + elapsed * limits.requests_per_minute / 60
+                    )
+                    available_tokens = min(limits.tokens_per_minute, row[1] + elapsed * limits.tokens_per_minute / 60)
+                wait = max(
+                    (1 - available_requests) * 60 / limits.requests_per_minute,
+                    (tokens - available_tokens) * 60 / limits.tokens_per_minute,
+                    0.0,
+                )
+                if wait == 0:
+                    available_requests -= 1
+                    available_tokens -= tokens
+                connection.execute(
+                    "INSERT INTO buckets (model, requests, tokens, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(model) DO UPDATE SET requests = excluded.requests, tokens = excluded.tokens, "
+                    "updated_at = excluded.updated_at",
+                    (model, available_requests, available_tokens, now),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return wait
+
+
+@dataclass
+class _Waiter:
+    rep: str
+    tokens: int
+    future: asyncio.Future
+
+
+@dataclass
+class _Lane:
+    """One model's queue in this process: a FIFO per rep, served round-robin."""
+
+    loop: asyncio.AbstractEventLoop
+    queues: dict[str, deque] = field(default_factory=dict)
+    turns: deque = field(default_factory=deque)
+    depth: int = 0
+    dispatcher: Optional[asyncio.Task] = None
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        store: BucketStore,
+        default_limits: ModelLimits,
+        model_limits: Optional[dict[str, ModelLimits]] = None,
+        max_queue: int = 200,
+        max_queue_per_rep: int = 16,
+        max_wait_seconds: float = 30.0,
+        output_tokens: int = 256,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.default_limits = default_limits
+        self.model_limits = model_limits or {}
+        self.max_queue = max_queue
+        self.max_queue_per_rep = max_queue_per_rep
+        self.max_wait_seconds = max_wait_seconds
+        self.output_tokens = output_tokens
+        self.enabled = enabled
+        self._lanes: dict[str, _Lane] = {}
+
+    @classmethod
+    def from_settings(cls) -> "LLMGateway":
+        path = settings.llm_gateway_store_path or os.path.join(tempfile.gettempdir(), "hcp-crm-llm-gateway.db")
+        return cls(
+            BucketStore(path),
+            ModelLimits(settings.llm_gateway_requests_per_minute, settings.llm_gateway_tokens_per_minute),
+            {
+                model: ModelLimits(limits["requests_per_minute"], limits["tokens_per_minute"])
+                for model, limits in settings.llm_gateway_model_limits.items()
+            },
+            max_queue=settings.llm_gateway_max_queue,
+            max_queue_per_rep=settings.llm_gateway_max_queue_per_rep,
+            max_wait_seconds=settings.llm_gateway_max_wait_seconds,
+            output_tokens=settings.llm_gateway_output_tokens,
+            enabled=settings.llm_gateway_enabled,
+        )
+
+    def limits(self, model: str) -> ModelLimits:
+        return self.model_limits.get(model, self.default_limits)
+
+    def estimate_tokens(self, messages: list, tools: Any = None) -> int:
+        """Prompt estimate plus the expected completion; the buckets are charged before the call."""
+        tool_tokens = len(json.dumps(tools, default=str)) // CHARS_PER_TOKEN if tools else 0
+        return approx_tokens(messages) + tool_tokens + self.output_tokens
+
+    def _lane(self, model: str) -> _Lane:
+        loop = asyncio.get_running_loop()
+        lane = self._lanes.get(model)
+        if lane is None or lane.loop is not loop:
+            lane = self._lanes[model] = _Lane(loop)
+        return lane
+
+    async def acquire(self, model: str, tokens: int) -> None:
+        lane = self._lane(model)
+        limits = self.limits(model)
+        if lane.depth == 0 and await asyncio.to_thread(self.store.try_acquire, model, tokens, limits) == 0:
+            WAIT_SECONDS.labels(model).observe(0)
+            return
+
+        rep = _current_rep.get()
+        if lane.depth >= self.max_queue:
+            self._reject(model, "queue_full", lane, limits)
+        if len(lane.queues.get(rep, ())) >= self.max_queue_per_rep:
+            self._reject(model, "rep_queue_full", lane, limits)
+
+        waiter = _Waiter(rep, tokens, lane.loop.create_future())
+        if rep not in lane.queues:
+            lane.queues[rep] = deque()
+            lane.turns.append(rep)
+        lane.queues[rep].append(waiter)
+        lane.depth += 1
+        QUEUE_DEPTH.labels(model).inc()
+        if lane.dispatcher is None or lane.dispatcher.done():
+            lane.dispatcher = lane.loop.create_task(self._dispatch(model, lane))
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self._remove(model, lane, waiter)
+            self._reject(model, "timeout", lane, limits)
+        except BaseException:
+            self._remove(model, lane, waiter)
+            raise
+        WAIT_SECONDS.labels(model).observe(time.perf_counter() - started)
+
+    def _reject(self, model: str, reason: str, lane: _Lane, limits: ModelLimits) -> None:
+        REJECTIONS.labels(model, reason).inc()
+        # Roughly when the calls queued now will have been let through.
+        raise LLMGatewayBusy(model, reason, (lane.depth + 1) * 60 / limits.requests_per_minute)
+
+    def _remove(self, model: str, lane: _Lane, waiter: _Waiter) -> None:
+        queue = lane.queues.get(waiter.rep)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._dequeued(model, lane, waiter.rep)
+        waiter.future.cancel()
+
+    def _dequeued(self, model: str, lane: _Lane, rep: str) -> None:
+        lane.depth -= 1
+        QUEUE_DEPTH.labels(model).dec()
+        if not lane.queues[rep]:
+            del lane.queues[rep]
+            lane.turns.remove(rep)
+
+    async def _dispatch(self, model: str, lane: _Lane) -> None:
+        """Grant slots to the head of each rep's queue in turn, waiting for the buckets as needed."""
+        limits = self.limits(model)
+        while lane.turns:
+            rep = lane.turns[0]
+            waiter = lane.queues[rep][0]
+            wait = await asyncio.to_thread(self.store.try_acquire, model, waiter.tokens, limits)
+            if wait > 0:
+                await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+                continue
+            if lane.queues.get(rep) and lane.queues[rep][0] is waiter:
+                lane.queues[rep].popleft()
+                self._dequeued(model, lane, rep)
+                if rep in lane.queues:
+                    lane.turns.rotate(-1)
+                waiter.future.set_result(None)
+            # Otherwise the waiter gave up while its slot was being taken, and that slot goes unused.
+
+    @asynccontextmanager
+    async def slot(self, model: str, messages: list, tools: Any = None) -> AsyncIterator[None]:
+        """Hold an admitted slot for one provider call; nested calls (streaming fallbacks) are not charged twice."""
+        if not self.enabled or _admitted.get():
+            yield
+            return
+        await self.acquire(model, self.estimate_tokens(messages, tools))
+        token = _admitted.set(True)
+        try:
+            yield
+        finally:
+            _admitted.reset(token)
+
+
+def retry_after_header(exc: LLMGatewayBusy) -> str:
+    return str(max(math.ceil(exc.retry_after), 1))
+
+
+llm_gateway = LLMGateway.from_settings()
@@ -0,0 +1,163 @@
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+STAGE_SECONDS = Histogram(
+    "crm_stage_duration_seconds",
+    "Time spent per stage (graph nodes, LLM calls, DB queries).",
+    ["stage"],
+)
+LLM_SECONDS = Histogram(
+    "crm_llm_request_duration_seconds",
+    "LLM call latency.",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+LLM_TOKENS = Counter("crm_llm_tokens_total", "LLM tokens consumed.", ["model", "direction"])
+LLM_ERRORS = Counter("crm_llm_errors_total", "Failed LLM calls.", ["model"])
+TOOL_CALLS = Counter("crm_agent_tool_calls_total", "Agent tool calls.", ["tool"])
+AGENT_ITERATIONS = Histogram(
+    "crm_agent_loop_iterations",
+    "Assistant turns per request.",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+)
+FAST_PATH_DECISIONS = Counter(
+    "crm_agent_fast_path_decisions_total",
+    "Chat turns by fast-path routing decision (handled, fallback, agent).",
+    ["intent", "decision"],
+)
+LLM_CALLS_SAVED = Counter("crm_agent_llm_calls_saved_total", "LLM calls skipped by the fast path.")
+ENRICHMENT_JOBS = Counter("crm_enrichment_jobs_total", "Enrichment job attempts by outcome.", ["outcome"])
+IDEMPOTENCY_REQUESTS = Counter(
+    "crm_idempotency_requests_total",
+    "Requests carrying an Idempotency-Key by outcome (claimed, replayed, in_progress, mismatch).",
+    ["scope", "outcome"],
+)
+STRUCTURED_OUTPUTS = Counter(
+    "crm_llm_structured_outputs_total",
+    "Structured LLM answers by call and outcome (valid, repaired, retried, invalid).",
+    ["call", "outcome"],
+)
+COMPLIANCE_SCAN_ROWS = Counter(
+    "crm_compliance_scan_rows_total",
+    "Interactions seen by the batch compliance scan by outcome (unchanged, cleared, reviewed, failed).",
+    ["outcome"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "crm_db_query_duration_seconds",
+    "Database statement latency.",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+HTTP_SECONDS = Histogram(
+    "crm_http_request_duration_seconds",
+    "HTTP request latency, including streamed bodies.",
+    ["method", "route", "status"],
+)
+
+
+def percentile(ordered: list[float], percent: float) -> float:
+    """Nearest-rank percentile of a non-empty ascending list."""
+    rank = max(math.ceil(len(ordered) * percent / 100) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class RequestMetrics:
+    """Per-request totals, shared by everything running inside the request's context."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = defaultdict(float)
+        self.counts: dict[str, int] = defaultdict(int)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] += seconds
+        self.counts[stage] += 1
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value; stage counts and token totals go in ``desc``."""
+        parts = [f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}']
+        for stage, seconds in self.stages.items():
+            parts.append(f'{stage};dur={seconds * 1000:.1f};desc="{self.counts[stage]}x"')
+        counters = ("input_tokens", "output_tokens", "tool_calls", "iterations", "llm_calls_saved", "prompt_tokens_saved")
+        for name in counters:
+            if self.counts.get(name):
+                parts.append(f'{name};desc="{self.counts[name]}"')
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_request() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestMetrics]:
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add(stage, seconds)
+
+
+def increment(name: str, amount: int = 1) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.counts[name] += amount
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_tool_calls(tool_calls: list[dict[str, Any]]) -> None:
+    for tool_call in tool_calls:
+        TOOL_CALLS.labels(tool_call.get("name", "unknown")).inc()
+    increment("tool_calls", len(tool_calls))
+
+
+def finish_request(metrics: RequestMetrics, method: str, route: str, status: int) -> None:
+    HTTP_SECONDS.labels(method, route, str(status)).observe(time.perf_counter() - metrics.started)
+    if metrics.counts.get("iterations"):
+        AGENT_ITERATIONS.observe(metrics.counts["iterations"])
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on ``engine`` (pass ``async_engine.sync_engine`` for async engines)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_SECONDS.labels(operation).observe(elapsed)
+        record_stage("db", elapsed)
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from prometheus_client import Counter
+
+from app.config import settings
+from app.services.llm import get_chat_model
+from app.services.llm_gateway import LLMGatewayBusy, llm_gateway
+from app.services.metrics import percentile
+
+
+logger = logging.getLogger(__name__)
+
+ROUTE_DECISIONS = Counter(
+    "crm_llm_route_decisions_total",
+    "Routed LLM calls by task, serving model and reason (preferred, adaptive, failover, hedge).",
+    ["task", "model", "reason"],
+)
+
+
+@dataclass(frozen=True)
+class TaskRoute:
+    preferred: str  # settings attribute naming the model
+    # Cheap tasks may move to the other model when it is currently much faster.
+    adaptive: bool = False
+    # Ask the provider for a JSON object (``response_format``) instead of free text.
+    json_mode: bool = False
+
+
+TASKS = {
+    "extraction": TaskRoute("groq_model", adaptive=True, json_mode=True),
+    "compliance": TaskRoute("secondary_model", json_mode=True),
+    "json_repair": TaskRoute("secondary_model", json_mode=True),
+}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Rate limits, timeouts, connection failures and 5xx responses; the other model may still answer."""
+    if isinstance(exc, LLMGatewayBusy):
+        return True
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return any(marker in type(exc).__name__ for marker in ("RateLimit", "Timeout", "Connection"))
+
+
+class ModelStats:
+    """Latencies of a model's recent successful calls, plus call and error counts.
+
+    Samples older than ``window_seconds`` are ignored, so a model that routing moved
+    away from is not judged on stale numbers forever.
+    """
+
+    def __init__(self, max_samples: int = 200, window_seconds: float = 300.0):
+        self.latencies: deque[tuple[float, float]] = deque(maxlen=max_samples)
+        self.window_seconds = window_seconds
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, seconds: Optional[float], error: bool = False) -> None:
+        self.calls += 1
+        if error:
+            self.errors += 1
+        elif seconds is not None:
+            self.latencies.append((time.monotonic(), seconds))
+
+    def p95(self, min_samples: int = 20) -> Optional[float]:
+        cutoff = time.monotonic() - self.window_seconds
+        recent = sorted(seconds for recorded_at, seconds in self.latencies if recorded_at >= cutoff)
+        if not recent or len(recent) < min_samples:
+            return None
+        return percentile(recent, 95)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive retryable failures; after ``reset_seconds``
+    a single trial call is let through (half-open) and its outcome closes or re-opens it."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        # A trial that never reported back (e.g. the model ended up unused) frees up after reset_seconds.
+        if state == "half_open" and (self._trial_started is None or now - self._trial_started >= self.reset_seconds):
+            self._trial_started = now
+            return True
+        return False
+
+    def success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def failure(self) -> None:
+        self.failures += 1
+        self._trial_started = None
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class ModelRouter:
+    """Routes LLM calls by task between the fast model (``GROQ_MODEL``) and ``SECONDARY_MODEL``.
+
+    Each task has a preferred model. A call fails over to the other model on rate
+    limits, timeouts and server errors, skips models whose circuit breaker is open,
+    and, once a model's p95 latency is known, is hedged: if the first model has not
+    answered within its p95, the other is asked too and the first answer wins.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[str], BaseChatModel] = get_chat_model,
+        timeout_seconds: float = 30.0,
+        hedge_enabled: bool = True,
+        hedge_min_delay_seconds: float = 1.0,
+        adaptive_p95_ratio: float = 2.0,
+        breaker_failures: int = 5,
+        breaker_reset_seconds: float = 30.0,
+        json_mode_enabled: bool = True,
+    ):
+        self.model_factory = model_factory
+        self.timeout_seconds = timeout_seconds
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.adaptive_p95_ratio = adaptive_p95_ratio
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self.json_mode_enabled = json_mode_enabled
+        self._models: dict[str, BaseChatModel] = {}
+        self.stats_by_model: dict[str, ModelStats] = {}
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ModelRouter":
+        return cls(
+            timeout_seconds=settings.llm_timeout_seconds,
+            hedge_enabled=settings.llm_hedge_enabled,
+            hedge_min_delay_seconds=settings.llm_hedge_min_delay_seconds,
+            adaptive_p95_ratio=settings.llm_adaptive_p95_ratio,
+            breaker_failures=settings.llm_breaker_failures,
+            breaker_reset_seconds=settings.llm_breaker_reset_seconds,
+            json_mode_enabled=settings.llm_json_mode_enabled,
+        )
+
+    def model(self, name: str) -> BaseChatModel:
+        if name not in self._models:
+            self._models[name] = self.model_factory(name)
+            self.stats_by_model[name] = ModelStats()
+            self.breakers[name] = CircuitBreaker(self.breaker_failures, self.breaker_reset_seconds)
+        return self._models[name]
+
+    def candidates(self, task: str) -> list[tuple[str, str]]:
+        """(model, reason) in the order to try them for ``task``."""
+        route = TASKS[task]
+        preferred = getattr(settings, route.preferred)
+        other = settings.secondary_model if preferred == settings.groq_model else settings.groq_model
+        for name in (preferred, other):
+            self.model(name)
+        order = [(preferred, "preferred"), (other, "failover")]
+        if route.adaptive:
+            preferred_p95 = self.stats_by_model[preferred].p95()
+            other_p95 = self.stats_by_model[other].p95()
+            if preferred_p95 and other_p95 and preferred_p95 > other_p95 * self.adaptive_p95_ratio:
+                order = [(other, "adaptive"), (preferred, "failover")]
+        if preferred == other:
+            order = order[:1]
+        return order
+
+    def _call_kwargs(self, task: str) -> dict[str, Any]:
+        if self.json_mode_enabled and TASKS[task].json_mode:
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    async def _call(self, task: str, name: str, messages: list, config: Optional[dict]) -> Any:
+        # Local admission control says nothing about the model's health: LLMGatewayBusy and
+        # time queued for a slot stay out of the timeout, the latency stats and the breaker.
+        # The model's own gateway check is skipped while this slot is held.
+        async with llm_gateway.slot(name, messages):
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self._models[name].ainvoke(messages, config, **self._call_kwargs(task)), self.timeout_seconds
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats_by_model[name].record(None, error=True)
+                if is_retryable(exc):
+                    self.breakers[name].failure()
+                raise
+        self.stats_by_model[name].record(time.perf_counter() - started)
+        self.breakers[name].success()
+        return response
+
+    async def ainvoke(self, task: str, messages: list, config: Optional[dict] = None) -> Any:
+        candidates = [(name, reason) for name, reason in self.candidates(task) if self.breakers[name].allow()]
+        if not candidates:
+            # Every breaker is open: try the preferred model rather than failing outright.
+            candidates = self.candidates(task)[:1]
+
+        first, reason = candidates[0]
+        backup = candidates[1][0] if len(candidates) > 1 else None
+        hedge_delay = self._hedge_delay(first) if backup else None
+        primary = asyncio.ensure_future(self._call(task, first, messages, config))
+        if hedge_delay is not None:
+            try:
+                done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+            except asyncio.CancelledError:
+                primary.cancel()
+                raise
+            if not done:
+                return await self._hedged(task, primary, first, backup, messages, config)
+        try:
+            response = await primary
+        except Exception as exc:
+            if backup is None or not is_retryable(exc):
+                raise
+            logger.warning("LLM call for %s on %s failed (%s); failing over to %s", task, first, exc, backup)
+            ROUTE_DECISIONS.labels(task, backup, "failover").inc()
+            return await self._call(task, backup, messages, config)
+        ROUTE_DECISIONS.labels(task, first, reason).inc()
+        return response
+
+    def _hedge_delay(self, name: str) -> Optional[float]:
+        if not self.hedge_enabled:
+            return None
+        p95 = self.stats_by_model[name].p95()
+        return max(p95, self.hedge_min_delay_seconds) if p95 is not None else None
+
+    async def _hedged(self, task: str, primary: asyncio.Future, first: str, backup: str, messages, config) -> Any:
+        hedge = asyncio.ensure_future(self._call(task, backup, messages, config))
+        calls = {primary: first, hedge: backup}
+        pending = set(calls)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    if call.exception() is None:
+                        ROUTE_DECISIONS.labels(task, calls[call], "hedge" if call is hedge else "preferred").inc()
+                        return call.result()
+                    error = error or call.exception()
+            raise error
+        finally:
+            for call in pending:
+                call.cancel()
+
+    def for_task(self, task: str) -> "RoutedModel":
+        return RoutedModel(self, task)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "p95_seconds": stats.p95(min_samples=1) or 0.0,
+                "circuit_open": int(self.breakers[name].state == "open"),
+            }
+            for name, stats in self.stats_by_model.items()
+        }
+
+
+class RoutedModel:
+    """Chat-model-like handle (``ainvoke``/``abatch``) that sends every call through the router for one task."""
+
+    def __init__(self, router: ModelRouter, task: str):
+        self.router = router
+        self.task = task
+
+    @property
+    def model_name(self) -> str:
+        # Cache keys follow the model the task normally runs on.
+        return getattr(settings, TASKS[self.task].preferred)
+
+    async def ainvoke(self, messages: list, config: Optional[dict] = None, **kwargs: Any) -> Any:
+        return await self.router.ainvoke(self.task, messages, config)
+
+    async def abatch(
+        self, inputs: list, config: Optional[dict] = None, return_exceptions: bool = False, **kwargs: Any
+    ) -> list:
+        semaphore = asyncio.Semaphore((config or {}).get("max_concurrency") or len(inputs) or 1)
+
+        async def run(messages):
+            async with semaphore:
+                return await self.ainvoke(messages)
+
+        return await asyncio.gather(*(run(messages) for messages in inputs), return_exceptions=return_exceptions)
+
+
+model_router = ModelRouter.from_settings()
@@ -0,0 +1,88 @@
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, column, func, literal_column, or_, select, text
+from sqlalchemy.dialects import mysql, postgresql
+
+from app.db import models
+
+
+def _fts5_query(query: str) -> str:
+    # Quote every term so user input can't inject FTS5 operators; terms are ANDed.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def _text_match(dialect: str, query: str):
+    Interaction = models.Interaction
+    if dialect == "postgresql":
+        vector = models.search_vector(Interaction.summary, Interaction.notes, Interaction.outcomes)
+        tsquery = func.plainto_tsquery(literal_column("'english'"), query)
+        return vector.op("@@")(tsquery), func.ts_rank(vector, tsquery)
+    if dialect in ("mysql", "mariadb"):
+        relevance = mysql.match(Interaction.summary, Interaction.notes, Interaction.outcomes, against=query)
+        return relevance.in_natural_language_mode(), None
+    if dialect == "sqlite":
+        matches = text("SELECT rowid FROM interactions_fts WHERE interactions_fts MATCH :fts_query").bindparams(
+            fts_query=_fts5_query(query)
+        )
+        return Interaction.id.in_(matches.columns(column("rowid"))), None
+    raise ValueError(f"Full-text search is not supported on '{dialect}'")
+
+
+def _products_match(dialect: str, products: list[str]):
+    products_discussed = models.Interaction.products_discussed
+    if dialect == "postgresql":
+        return products_discussed.cast(postgresql.JSONB).has_any(postgresql.array(products))
+    if dialect in ("mysql", "mariadb"):
+        return or_(*(func.json_contains(products_discussed, json.dumps(product)) == 1 for product in products))
+    items = func.json_each(products_discussed).table_valued("value")
+    return select(items.c.value).where(items.c.value.in_(products)).exists()
+
+
+def search_interactions_query(
+    dialect: str,
+    query: Optional[str] = None,
+    products: Optional[list[str]] = None,
+    sentiment: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    specialty: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    hcp_id: Optional[int] = None,
+    limit: int = 20,
+) -> Select:
+    """Interactions matching a text query and filters, best match first.
+
+    Text matching uses the backend's native index: tsvector/GIN on Postgres,
+    FULLTEXT on MySQL, FTS5 on SQLite.
+    """
+    Interaction = models.Interaction
+    statement = select(Interaction)
+    order_by = []
+    if query and query.strip():
+        condition, rank = _text_match(dialect, query.strip())
+        statement = statement.where(condition)
+        if rank is not None:
+            order_by.append(rank.desc())
+    if products:
+        statement = statement.where(_products_match(dialect, products))
+    if sentiment:
+        statement = statement.where(func.lower(Interaction.sentiment) == sentiment.lower())
+    if date_from:
+        statement = statement.where(Interaction.interaction_date >= date_from)
+    if date_to:
+        statement = statement.where(Interaction.interaction_date <= date_to)
+    if hcp_id is not None:
+        statement = statement.where(Interaction.hcp_id == hcp_id)
+    if specialty or city or state:
+        statement = statement.join(models.HCP, models.HCP.id == Interaction.hcp_id)
+        if specialty:
+            statement = statement.where(models.HCP.specialty.ilike(f"%{specialty}%"))
+        if city:
+            statement = statement.where(func.lower(models.HCP.city) == city.lower())
+        if state:
+            statement = statement.where(func.lower(models.HCP.state) == state.lower())
+    order_by += models.newest_first(dialect)
+    return statement.order_by(*order_by).limit(limit)
@@ -0,0 +1,66 @@
+"""Parsing and validation of the JSON the LLM returns for extraction and compliance review.
+
+Answers are validated against a pydantic model. An answer that fails is first
+repaired locally (code fences, surrounding prose, trailing commas) and only then
+retried on the repair model, so a formatting slip does not cost another LLM call.
+"""
+import json
+import logging
+import re
+from typing import Any, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from app.services.metrics import STRUCTURED_OUTPUTS
+
+
+logger = logging.getLogger(__name__)
+
+_CODE_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def repair_json(text: str) -> str:
+    """Best-effort fix-up of the usual ways a model wraps or breaks a JSON object."""
+    text = _CODE_FENCE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start:end + 1]
+    return _TRAILING_COMMA.sub(r"\1", text)
+
+
+def _validate(text: str, schema: type[BaseModel]) -> Optional[dict[str, Any]]:
+    try:
+        return schema.model_validate(json.loads(text)).model_dump()
+    except (json.JSONDecodeError, ValidationError, TypeError):
+        return None
+
+
+def parse_output(call: str, text: str, schema: type[BaseModel]) -> Optional[dict[str, Any]]:
+    """Validated payload for ``text``, repairing it locally if needed; None if it cannot be used."""
+    payload = _validate(text, schema)
+    if payload is not None:
+        STRUCTURED_OUTPUTS.labels(call, "valid").inc()
+        return payload
+    payload = _validate(repair_json(text), schema)
+    if payload is not None:
+        STRUCTURED_OUTPUTS.labels(call, "repaired").inc()
+        return payload
+    STRUCTURED_OUTPUTS.labels(call, "invalid").inc()
+    logger.warning("%s response failed validation: %.200r", call, text)
+    return None
+
+
+def response_text(response: Any) -> str:
+    return getattr(response, "content", "") or ""
+
+
+async def invoke_structured(
+    call: str, llm, messages: list, schema: type[BaseModel], retry_llm=None
+) -> Optional[dict[str, Any]]:
+    """Ask ``llm`` for a ``schema`` object; asks ``retry_llm`` once if no valid answer can be recovered."""
+    payload = parse_output(call, response_text(await llm.ainvoke(messages)), schema)
+    if payload is None and retry_llm is not None:
+        STRUCTURED_OUTPUTS.labels(call, "retried").inc()
+        payload = parse_output(call, response_text(await retry_llm.ainvoke(messages)), schema)
+    return payload
@@ -0,0 +1,113 @@
+import json
+from typing import TYPE_CHECKING, Any, Iterable
+
+from prometheus_client import Counter, Histogram
+
+from app.services.metrics import increment
+
+if TYPE_CHECKING:
+    # LangChain is only needed once an LLM is called; the API must start without importing it.
+    from langchain_core.messages import BaseMessage
+    from langchain_core.tools import BaseTool
+
+
+# Rough for English and JSON with the Groq-hosted tokenizers; good enough for budgeting.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+# Messages at or below this size are never shortened to fit the budget.
+MIN_MESSAGE_TOKENS = 64
+
+PROMPT_TOKENS = Histogram(
+    "crm_llm_prompt_tokens_estimated",
+    "Estimated prompt tokens sent per LLM call, after budgeting.",
+    ["call"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+PROMPT_TOKENS_SAVED = Counter(
+    "crm_llm_prompt_tokens_saved_total",
+    "Estimated prompt tokens removed by compaction, tool selection and truncation.",
+    ["call"],
+)
+
+
+def count_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def approx_tokens(messages: list["BaseMessage"]) -> int:
+    total = 0
+    for message in messages:
+        tool_calls = getattr(message, "tool_calls", None) or []
+        total += (len(str(message.content)) + len(json.dumps(tool_calls))) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+def tool_schema_tokens(tool: "BaseTool") -> int:
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    return count_tokens(json.dumps(convert_to_openai_tool(tool)))
+
+
+def compact(value: Any) -> Any:
+    """Drop None, empty strings and empty containers, recursively."""
+    if isinstance(value, dict):
+        items = ((key, compact(item)) for key, item in value.items())
+        return {key: item for key, item in items if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        items = (compact(item) for item in value)
+        return [item for item in items if item not in (None, "", [], {})]
+    return value
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(compact(value), separators=(",", ":"), default=str)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keep the start and end of ``text`` (outcomes and next steps tend to come last)."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    # Leave room for the marker so the result really is within max_chars.
+    kept = max(max_chars - len(f" [... {len(text)} characters omitted ...] "), 0)
+    head = kept * 2 // 3
+    tail = kept - head
+    omitted = len(text) - kept
+    return f"{text[:head]} [... {omitted} characters omitted ...] {text[len(text) - tail:]}"
+
+
+def fit_messages(messages: Iterable["BaseMessage"], max_tokens: int) -> list["BaseMessage"]:
+    """Shorten the largest message contents (usually tool results) until the list fits ``max_tokens``.
+
+    The latest user message is only shortened once nothing else can be. Returns
+    copies; messages in the graph state are left untouched.
+    """
+    messages = list(messages)
+    latest_human = max((index for index, message in enumerate(messages) if message.type == "human"), default=None)
+    for protected in (latest_human, None):
+        excess = approx_tokens(messages) - max_tokens
+        while excess > 0:
+            sizes = [
+                count_tokens(message.content) if isinstance(message.content, str) and index != protected else 0
+                for index, message in enumerate(messages)
+            ]
+            largest = max(range(len(messages)), key=sizes.__getitem__, default=None)
+            if largest is None or sizes[largest] <= MIN_MESSAGE_TOKENS:
+                break
+            target = max(sizes[largest] - excess, sizes[largest] // 2, MIN_MESSAGE_TOKENS)
+            content = truncate_text(messages[largest].content, target)
+            if len(content) >= len(messages[largest].content):
+                break
+            messages[largest] = messages[largest].model_copy(update={"content": content})
+            excess = approx_tokens(messages) - max_tokens
+    return messages
+
+
+def record_savings(call: str, original_tokens: int, sent_tokens: int) -> int:
+    """Report one call's prompt size and the tokens budgeting removed from it."""
+    saved = max(original_tokens - sent_tokens, 0)
+    PROMPT_TOKENS.labels(call).observe(sent_tokens)
+    if saved:
+        PROMPT_TOKENS_SAVED.labels(call).inc(saved)
+        increment("prompt_tokens_saved", saved)
+    return saved
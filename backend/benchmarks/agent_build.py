@@ -0,0 +1,65 @@
+"""Per-request agent setup overhead: rebuilding the graph vs. the cached agent.
+
+Run from ``backend/``::
+
+    python -m benchmarks.agent_build --requests 200
+
+No network calls are made; only client construction, tool binding and graph
+compilation are timed.
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark-key")
+
+from app.agents.graph import _compiled_agent, agent_config, build_agent, get_agent  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.metrics import percentile  # noqa: E402
+
+
+def _time_per_request(fn, requests: int) -> list[float]:
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = percentile(timings, 95)
+    print(
+        f"{label:<28} mean={statistics.mean(timings):8.3f}ms "
+        f"p50={statistics.median(timings):8.3f}ms p95={p95:8.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--model", default=settings.groq_model)
+    args = parser.parse_args()
+
+    def rebuild_per_request():
+        build_agent(args.model)
+        agent_config(None, default_hcp_id=1, hcp_context={"id": 1})
+
+    def cached_per_request():
+        get_agent(args.model)
+        agent_config(None, default_hcp_id=1, hcp_context={"id": 1})
+
+    _compiled_agent.cache_clear()
+    before = _time_per_request(rebuild_per_request, args.requests)
+    get_agent(args.model)
+    after = _time_per_request(cached_per_request, args.requests)
+
+    _report("before (build per request)", before)
+    _report("after (cached agent)", after)
+    print(f"speedup: {statistics.mean(before) / statistics.mean(after):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Concurrency scaling of the LLM-backed endpoints against a local fake LLM.
+
+Run from ``backend/``::
+
+    python -m benchmarks.load_test --concurrency 1 8 32 64 --latency 0.2
+
+Each level runs ``concurrency`` clients that issue ``--rounds`` requests to
+``POST /interactions`` and ``POST /agent/chat`` while a probe measures
+``GET /hcps`` latency. Uses a throwaway SQLite database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+_db_path = os.path.join(tempfile.mkdtemp(prefix="hcp-crm-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["LLM_PROVIDER"] = "fake"
+# Measure the app, not the provider rate limits.
+os.environ["LLM_GATEWAY_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.metrics import percentile  # noqa: E402
+
+
+def _prepare_database() -> None:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        session.add(models.HCP(name="Dr. Anaya Iyer", specialty="Cardiology", city="Pune", state="MH", tier="A"))
+        session.commit()
+
+
+async def _client_loop(client: httpx.AsyncClient, rounds: int, latencies: list[float], errors: list[int]) -> None:
+    for round_number in range(rounds):
+        if round_number % 2:
+            request = client.post("/agent/chat", json={"hcp_id": 1, "message": "Log a visit about Cardiozen"})
+        else:
+            request = client.post("/interactions", json={"hcp_id": 1, "raw_notes": "Discussed Cardiozen dosing"})
+        started = time.perf_counter()
+        response = await request
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def _probe_loop(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/hcps")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+
+async def _run_level(concurrency: int, rounds: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        latencies: list[float] = []
+        probe_latencies: list[float] = []
+        errors: list[int] = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_loop(client, stop, probe_latencies))
+        started = time.perf_counter()
+        await asyncio.gather(*(_client_loop(client, rounds, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "hcps_probe_p50_ms": statistics.median(probe_latencies) * 1000 if probe_latencies else None,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency per call in seconds")
+    args = parser.parse_args()
+
+    settings.fake_llm_latency_seconds = args.latency
+    _prepare_database()
+    for concurrency in args.concurrency:
+        result = await _run_level(concurrency, args.rounds)
+        probe = result["hcps_probe_p50_ms"]
+        print(
+            f"concurrency={result['concurrency']:<4} requests={result['requests']:<5} errors={result['errors']:<3} "
+            f"throughput={result['throughput_rps']:7.1f} req/s p50={result['p50_ms']:7.1f}ms "
+            f"p95={result['p95_ms']:7.1f}ms GET /hcps p50="
+            + (f"{probe:6.1f}ms" if probe is not None else "n/a")
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
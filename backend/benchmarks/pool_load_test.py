@@ -0,0 +1,149 @@
+"""How many concurrent agent chats the DB connection pool sustains.
+
+Run from ``backend/``::
+
+    python -m benchmarks.pool_load_test --concurrency 8 32 64 128 --pool-size 5 --max-overflow 5
+
+Each level runs ``concurrency`` simultaneous ``POST /agent/chat`` turns (full
+agent loop, fast path off) against a fake LLM and reports latency, errors and
+the peak and time-weighted average of DB connections checked out. Uses a throwaway
+SQLite database unless ``--database-url`` is given; SQLite ignores the pool
+sizing flags, so use Postgres/MySQL to see pool timeouts.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from app.services.metrics import percentile
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 64, 128])
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency per call in seconds")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=5)
+    parser.add_argument("--pool-timeout", type=float, default=5.0)
+    return parser.parse_args()
+
+
+class ConnectionTracker:
+    """Peak and time-weighted average of connections checked out from the pool."""
+
+    def __init__(self):
+        self.checked_out = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.peak = self.checked_out
+        self.started = self.changed = time.perf_counter()
+        self.connection_seconds = 0.0
+
+    def _update(self, delta: int) -> None:
+        now = time.perf_counter()
+        self.connection_seconds += self.checked_out * (now - self.changed)
+        self.changed = now
+        self.checked_out += delta
+        self.peak = max(self.peak, self.checked_out)
+
+    def checkout(self, *args) -> None:
+        self._update(1)
+
+    def checkin(self, *args) -> None:
+        self._update(-1)
+
+    def average(self) -> float:
+        self._update(0)
+        return self.connection_seconds / max(self.changed - self.started, 1e-9)
+
+
+async def _chat_loop(client, rounds: int, latencies: list[float], errors: list[int]) -> None:
+    for _ in range(rounds):
+        started = time.perf_counter()
+        response = await client.post("/agent/chat", json={"hcp_id": 1, "message": "Log a visit about Cardiozen"})
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def _run_level(app, tracker: ConnectionTracker, concurrency: int, rounds: int) -> dict:
+    import httpx
+
+    tracker.reset()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        latencies: list[float] = []
+        errors: list[int] = []
+        started = time.perf_counter()
+        await asyncio.gather(*(_chat_loop(client, rounds, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "peak_connections": tracker.peak,
+        "avg_connections": tracker.average(),
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="hcp-crm-pool-"), "bench.db")
+    os.environ.update(
+        DATABASE_URL=database_url,
+        DB_POOL_SIZE=str(args.pool_size),
+        DB_MAX_OVERFLOW=str(args.max_overflow),
+        DB_POOL_TIMEOUT_SECONDS=str(args.pool_timeout),
+        AGENT_FAST_PATH_ENABLED="false",
+        LLM_PROVIDER="fake",
+        LLM_GATEWAY_ENABLED="false",
+        FAKE_LLM_LATENCY_SECONDS=str(args.latency),
+    )
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.pop("DATABASE_READ_URL", None)
+
+    from sqlalchemy import event
+
+    from app.db import models
+    from app.db.base import Base
+    from app.db.session import SessionLocal, async_engine, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        if session.get(models.HCP, 1) is None:
+            session.add(models.HCP(id=1, name="Dr. Anaya Iyer", specialty="Cardiology", city="Pune", state="MH", tier="A"))
+            session.commit()
+
+    tracker = ConnectionTracker()
+    event.listen(async_engine.sync_engine, "checkout", tracker.checkout)
+    event.listen(async_engine.sync_engine, "checkin", tracker.checkin)
+
+    capacity = "unbounded" if async_engine.dialect.name == "sqlite" else args.pool_size + args.max_overflow
+    print(f"database={async_engine.dialect.name} pool capacity={capacity} fake LLM latency={args.latency}s")
+    sustained = None
+    for concurrency in args.concurrency:
+        result = asyncio.run(_run_level(app, tracker, concurrency, args.rounds))
+        if not result["errors"]:
+            sustained = concurrency
+        print(
+            f"concurrency={result['concurrency']:<4} requests={result['requests']:<5} errors={result['errors']:<3} "
+            f"throughput={result['throughput_rps']:7.1f} req/s p50={result['p50_ms']:7.1f}ms "
+            f"p95={result['p95_ms']:7.1f}ms connections peak={result['peak_connections']} "
+            f"avg={result['avg_connections']:.1f}"
+        )
+    print(f"highest error-free concurrency: {sustained if sustained is not None else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Cold-start cost of the API: import time and time to the first successful responses.
+
+Run from ``backend/``::
+
+    python -m benchmarks.startup --output startup-baseline.json
+    python -m benchmarks.startup --output startup.json --compare startup-baseline.json
+
+Each run starts a fresh interpreter, so nothing is cached between runs:
+
+- ``import``: ``import app.main``, and whether it pulled in LangChain/LangGraph
+- ``first_200``: spawning ``uvicorn app.main:app`` until ``GET /hcps`` answers 200
+- ``first_chat``: the first ``POST /agent/chat`` after that, which loads the agent
+
+Uses a throwaway SQLite database migrated with Alembic and the fake LLM provider.
+With ``--compare``, the exit status is 1 if any median is more than ``--threshold``
+percent slower than the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from benchmarks.suite import _git_revision
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LLM_MODULES = ("langchain_core", "langchain_groq", "langgraph")
+IMPORT_SCRIPT = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - started\n"
+    f"loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({LLM_MODULES!r}))\n"
+    "print(json.dumps({'seconds': elapsed, 'llm_modules': loaded}))\n"
+)
+
+
+def _environment(database_url: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=database_url,
+        LLM_PROVIDER="fake",
+        LLM_GATEWAY_ENABLED="false",
+        FAKE_LLM_LATENCY_SECONDS="0",
+        PYTHONPATH=BACKEND_DIR,
+    )
+    for name in ("ASYNC_DATABASE_URL", "DATABASE_READ_URL", "SEED_DEMO_DATA"):
+        env.pop(name, None)
+    return env
+
+
+def _prepare_database(database_url: str) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+
+    from app.db.seed import seed_demo_hcps
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as session:
+        seed_demo_hcps(session)
+
+
+def _import_run(env: dict[str, str]) -> dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_run(env: dict[str, str], timeout: float) -> tuple[float, float]:
+    """Seconds from spawning uvicorn to the first 200, and the first agent chat's latency."""
+    import httpx
+
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        cwd=BACKEND_DIR,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"no 200 from GET /hcps within {timeout}s")
+                try:
+                    if client.get("/hcps").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            first_200 = time.perf_counter() - started
+
+            chat_started = time.perf_counter()
+            response = client.post("/agent/chat", json={"message": "Show Dr. Iyer's profile", "hcp_id": 1})
+            response.raise_for_status()
+            first_chat = time.perf_counter() - chat_started
+    finally:
+        server.terminate()
+        server.wait()
+    return first_200, first_chat
+
+
+def _summary(seconds: list[float]) -> dict[str, Any]:
+    return {
+        "runs": len(seconds),
+        "median_ms": round(statistics.median(seconds) * 1000, 1),
+        "min_ms": round(min(seconds) * 1000, 1),
+        "max_ms": round(max(seconds) * 1000, 1),
+    }
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="hcp-crm-startup-"), "startup.db")
+    _prepare_database(database_url)
+    env = _environment(database_url)
+
+    imports = [_import_run(env) for _ in range(args.runs)]
+    servers = [_server_run(env, args.timeout) for _ in range(args.runs)]
+
+    results = {
+        "import": {
+            **_summary([result["seconds"] for result in imports]),
+            "llm_modules": sorted({name for result in imports for name in result["llm_modules"]}),
+        },
+        "first_200": _summary([first_200 for first_200, _ in servers]),
+        "first_chat": _summary([first_chat for _, first_chat in servers]),
+    }
+    for name, result in results.items():
+        print(
+            f"{name:<12} median={result['median_ms']:8.1f}ms min={result['min_ms']:8.1f}ms "
+            f"max={result['max_ms']:8.1f}ms"
+        )
+    if results["import"]["llm_modules"]:
+        print(f"import app.main loaded {', '.join(results['import']['llm_modules'])}")
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+        },
+        "startup": results,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Print per-measurement changes; returns those slower than ``threshold`` percent."""
+    regressions = []
+    for name, result in current["startup"].items():
+        before = baseline["startup"].get(name)
+        if before is None:
+            print(f"{name:<12} (no baseline)")
+            continue
+        change = (result["median_ms"] - before["median_ms"]) / before["median_ms"] * 100 if before["median_ms"] else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<12} median_ms={before['median_ms']:.1f}->{result['median_ms']:.1f} ({change:+.1f}%)"
+            + (" REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the server to answer")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
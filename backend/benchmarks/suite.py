@@ -0,0 +1,251 @@
+"""Reproducible benchmark suite for the API hot paths, using the fake LLM provider.
+
+Run from ``backend/``::
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --output current.json --compare baseline.json
+    python -m benchmarks.suite --current current.json --compare baseline.json   # compare only
+
+Each scenario sends ``--requests`` requests from ``--concurrency`` clients after
+``--warmup`` unrecorded ones, and reports p50/p95/p99 latency and throughput.
+Uses a throwaway SQLite database unless ``--database-url`` is given. With
+``--compare``, the exit status is 1 if any scenario's p95 or throughput is more
+than ``--threshold`` percent worse than the baseline.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from app.services.metrics import percentile
+
+
+Request = tuple[str, str, dict[str, Any]]
+
+
+def _create(index: int) -> Request:
+    return "POST", "/interactions", {"json": {"hcp_id": 1, "raw_notes": f"Discussed Cardiozen dosing, visit {index}"}}
+
+
+def _list(index: int) -> Request:
+    return "GET", "/interactions", {"params": {"hcp_id": 1, "limit": 50}}
+
+
+def _chat_single_tool(index: int) -> Request:
+    return "POST", "/agent/chat", {"json": {"hcp_id": 1, "message": f"Log a visit about Cardiozen dosing #{index}"}}
+
+
+def _chat_multi_tool(index: int) -> Request:
+    message = f"Log a visit about Cardiozen dosing #{index} and check compliance"
+    return "POST", "/agent/chat", {"json": {"hcp_id": 1, "message": message}}
+
+
+def _chat_fast_path(index: int) -> Request:
+    message = f"Log a visit with Dr. Anaya Iyer about Cardiozen dosing #{index}"
+    return "POST", "/agent/chat", {"json": {"hcp_id": 1, "message": message}}
+
+
+def _bulk(rows: int) -> Callable[[int], Request]:
+    def request(index: int) -> Request:
+        # Half the rows carry a summary; the rest go through extraction.
+        lines = [
+            json.dumps(
+                {"hcp_id": 1, "summary": f"Bulk row {row}"}
+                if row % 2
+                else {"hcp_id": 1, "raw_notes": f"Bulk notes {index}-{row} about Cardiozen"}
+            )
+            for row in range(rows)
+        ]
+        return "POST", "/interactions/bulk", {
+            "content": "\n".join(lines),
+            "headers": {"content-type": "application/x-ndjson"},
+        }
+
+    return request
+
+
+def _scenarios(bulk_rows: int) -> dict[str, Callable[[int], Request]]:
+    return {
+        "interactions_create": _create,
+        "interactions_list": _list,
+        "agent_chat_single_tool": _chat_single_tool,
+        "agent_chat_multi_tool": _chat_multi_tool,
+        "agent_chat_fast_path": _chat_fast_path,
+        "interactions_bulk": _bulk(bulk_rows),
+    }
+
+
+async def _run_scenario(client, build_request, requests: int, concurrency: int, warmup: int) -> dict[str, Any]:
+    for index in range(warmup):
+        method, url, options = build_request(-1 - index)
+        await client.request(method, url, **options)
+
+    latencies: list[float] = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in next_index:
+            method, url, options = build_request(index)
+            started = time.perf_counter()
+            response = await client.request(method, url, **options)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="hcp-crm-suite-"), "bench.db")
+    os.environ.update(
+        DATABASE_URL=database_url,
+        LLM_PROVIDER="fake",
+        # Measure the app, not the provider rate limits.
+        LLM_GATEWAY_ENABLED="false",
+        FAKE_LLM_LATENCY_SECONDS=str(args.latency),
+    )
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.pop("DATABASE_READ_URL", None)
+
+    import httpx
+
+    from app.db import models
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        if session.get(models.HCP, 1) is None:
+            session.add(models.HCP(id=1, name="Dr. Anaya Iyer", specialty="Cardiology", city="Pune", state="MH", tier="A"))
+            session.commit()
+
+    scenarios = _scenarios(args.bulk_rows)
+    selected = args.scenarios or list(scenarios)
+
+    async def run_all() -> dict[str, Any]:
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            for name in selected:
+                results[name] = await _run_scenario(client, scenarios[name], args.requests, args.concurrency, args.warmup)
+                _print_result(name, results[name])
+        return results
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "fake_llm_latency_seconds": args.latency,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "bulk_rows": args.bulk_rows,
+        },
+        "scenarios": asyncio.run(run_all()),
+    }
+
+
+def _print_result(name: str, result: dict[str, Any]) -> None:
+    print(
+        f"{name:<24} requests={result['requests']:<5} errors={result['errors']:<3} "
+        f"throughput={result['throughput_rps']:8.1f} req/s p50={result['p50_ms']:8.1f}ms "
+        f"p95={result['p95_ms']:8.1f}ms p99={result['p99_ms']:8.1f}ms"
+    )
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Print per-scenario changes; returns the scenarios that regressed beyond ``threshold`` percent."""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:<24} (no baseline)")
+            continue
+        changes = {
+            metric: (result[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+        }
+        regressed = changes["p95_ms"] > threshold or changes["throughput_rps"] < -threshold or (
+            result["errors"] > before["errors"]
+        )
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<24} "
+            + " ".join(
+                f"{metric}={before[metric]:.1f}->{result[metric]:.1f} ({changes[metric]:+.1f}%)" for metric in changes
+            )
+            + (" REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(_scenarios(0)), default=None)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--bulk-rows", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency per call in seconds")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--current", help="compare this results file instead of running the suite")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+
+    if args.current:
+        with open(args.current) as handle:
+            results = json.load(handle)
+    else:
+        results = run(args)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read on first import of app.config, so configure before any test imports the app.
+os.environ.update(
+    DATABASE_URL="sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="hcp-crm-tests-"), "test.db"),
+    LLM_PROVIDER="fake",
+    FAKE_LLM_LATENCY_SECONDS="0",
+    ENRICHMENT_WORKERS="0",
+    LLM_GATEWAY_STORE_PATH=os.path.join(tempfile.mkdtemp(prefix="hcp-crm-gateway-"), "gateway.db"),
+)
+for name in ("ASYNC_DATABASE_URL", "DATABASE_READ_URL", "ASYNC_DATABASE_READ_URL", "HCP_CACHE_REDIS_URL"):
+    os.environ.pop(name, None)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The test database migrated to head, with the demo HCPs."""
+    from alembic import command
+    from alembic.config import Config
+
+    from app.db.seed import seed_demo_hcps
+    from app.db.session import SessionLocal
+
+    command.upgrade(Config(os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini")), "head")
+    with SessionLocal() as session:
+        seed_demo_hcps(session)
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
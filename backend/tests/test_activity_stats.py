@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.db import models
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.services import activity_stats
+
+
+def _racing_first_insert(monkeypatch) -> list:
+    """The first refresh fails as if a concurrent write had just inserted the rollup row."""
+    refresh = activity_stats.refresh_activity_stats
+    calls = []
+
+    def refresh_once_racing(session, hcp_ids):
+        calls.append(hcp_ids)
+        if len(calls) == 1:
+            raise IntegrityError("INSERT INTO hcp_activity_stats", {}, Exception("duplicate key"))
+        refresh(session, hcp_ids)
+
+    monkeypatch.setattr(activity_stats, "refresh_activity_stats", refresh_once_racing)
+    return calls
+
+
+def _stored_count(hcp_id: int) -> int:
+    with SessionLocal() as session:
+        return session.get(models.HCPActivityStats, hcp_id).interaction_count
+
+
+def test_rollup_hook_retries_a_racing_first_insert(database, monkeypatch):
+    with SessionLocal() as session:
+        session.add(models.Interaction(hcp_id=2, summary="Rollup race", source="form"))
+        session.commit()
+        expected = session.query(models.Interaction).filter_by(hcp_id=2).count()
+    calls = _racing_first_insert(monkeypatch)
+
+    asyncio.run(activity_stats.interactions_written(AsyncSessionLocal, 2))
+
+    assert len(calls) == 2
+    assert _stored_count(2) == expected
+
+
+def test_sync_rollup_hook_retries_a_racing_first_insert(database, monkeypatch):
+    calls = _racing_first_insert(monkeypatch)
+
+    activity_stats.interactions_written_sync(SessionLocal, 2)
+
+    assert len(calls) == 2
+    with SessionLocal() as session:
+        assert _stored_count(2) == session.query(models.Interaction).filter_by(hcp_id=2).count()
+
+
+def _payloads(hcp_id: int) -> tuple[dict, dict]:
+    """The stored rollup and one recomputed from the interactions table, as API payloads."""
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as session:
+        stored = session.get(models.HCPActivityStats, hcp_id)
+        return (
+            activity_stats.stats_payload(stored, now),
+            activity_stats.stats_payload(activity_stats.load_stats(session, [hcp_id])[hcp_id], now),
+        )
+
+
+def _interaction(day: int, sentiment: str, product: str) -> dict:
+    return {
+        "hcp_id": 1,
+        "interaction_date": f"2031-01-{day:02d}T10:00:00+00:00",
+        "summary": f"Visit on day {day}",
+        "sentiment": sentiment,
+        "products_discussed": [product],
+    }
+
+
+def test_new_interactions_are_folded_in_without_reading_history(client, monkeypatch):
+    activity_stats.interactions_written_sync(SessionLocal, 1)
+    before, _ = _payloads(1)
+
+    def no_history(*args, **kwargs):
+        raise AssertionError("an insert reread the HCP's interactions")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(activity_stats, "load_stats", no_history)
+        assert client.post("/interactions", json=_interaction(10, "negative", "Cardiozen")).status_code == 200
+        assert client.post("/interactions", json=_interaction(11, "negative", "Glucora")).status_code == 200
+
+    stored, recomputed = _payloads(1)
+    assert stored == recomputed
+    assert stored["interaction_count"] == before["interaction_count"] + 2
+    assert stored["recent_sentiments"][:2] == ["negative", "negative"]
+
+
+def test_backdated_and_bulk_inserts_match_a_recompute(client, monkeypatch):
+    activity_stats.interactions_written_sync(SessionLocal, 1)
+    monkeypatch.setattr(settings, "bulk_insert_chunk_size", 1)
+    refreshes = []
+    refresh = activity_stats._refresh
+
+    async def counting_refresh(session_factory, hcp_ids):
+        refreshes.append(set(hcp_ids))
+        await refresh(session_factory, hcp_ids)
+
+    monkeypatch.setattr(activity_stats, "_refresh", counting_refresh)
+
+    rows = [
+        _interaction(20, "positive", "Cardiozen"),
+        _interaction(1, "neutral", "Glucora"),
+        _interaction(21, "positive", "Glucora"),
+    ]
+    response = client.post("/interactions/bulk", json=rows)
+
+    assert response.json()["inserted"] == 3
+    # Three chunks, one of them dated before the latest contact: a single recompute for the request.
+    assert refreshes == [{1}]
+    stored, recomputed = _payloads(1)
+    assert stored == recomputed
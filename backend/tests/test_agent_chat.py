@@ -0,0 +1,27 @@
+from app.agents import tools
+from app.services.llm_gateway import LLMGatewayBusy
+
+
+def test_busy_gateway_during_tool_call_returns_429(client, monkeypatch):
+    async def busy(*args, **kwargs):
+        raise LLMGatewayBusy("fake", "queue full", 12.5)
+
+    monkeypatch.setattr(tools, "review_compliance", busy)
+
+    response = client.post("/agent/chat", json={"message": "Run a compliance check on this call", "hcp_id": 1})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "13"
+
+
+def test_other_tool_errors_go_back_to_the_model(client, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise RuntimeError("reviewer crashed")
+
+    monkeypatch.setattr(tools, "review_compliance", broken)
+
+    response = client.post("/agent/chat", json={"message": "Run a compliance check on this call", "hcp_id": 1})
+
+    assert response.status_code == 200
+    tool_messages = [message["content"] for message in response.json()["messages"] if message["role"] == "tool"]
+    assert any("reviewer crashed" in content for content in tool_messages)
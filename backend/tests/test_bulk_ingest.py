@@ -0,0 +1,39 @@
+import json
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.extraction import extraction_service
+
+
+def test_ndjson_bulk_ingest_reports_each_row_and_extracts_duplicates_once(client):
+    notes = "Bulk import: Dr. Mehta discussed Glucora titration and wants a follow-up call in March."
+    lines = [
+        json.dumps({"hcp_id": 2, "summary": "Imported with a summary"}),
+        json.dumps({"hcp_id": 2, "raw_notes": notes}),
+        json.dumps({"hcp_id": 1, "raw_notes": notes}),
+        "{not json",
+        json.dumps({"hcp_id": 999999, "summary": "Unknown HCP"}),
+        json.dumps({"summary": "No HCP"}),
+    ]
+    llm_calls = extraction_service.llm_calls
+
+    response = client.post(
+        "/interactions/bulk", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["received"], body["inserted"], body["failed"]) == (6, 3, 3)
+    results = body["results"]
+    assert [result["index"] for result in results] == list(range(6))
+    assert all(result["interaction_id"] for result in results[:3])
+    assert results[3]["error"].startswith("Invalid JSON")
+    assert results[4]["error"] == "HCP not found"
+    assert "hcp_id" in results[5]["error"]
+    # Identical notes in one request cost one LLM call.
+    assert extraction_service.llm_calls == llm_calls + 1
+
+    with SessionLocal() as session:
+        extracted = [session.get(models.Interaction, results[index]["interaction_id"]) for index in (1, 2)]
+    assert all(interaction.summary and interaction.raw_notes == notes for interaction in extracted)
+    assert extracted[0].summary == extracted[1].summary
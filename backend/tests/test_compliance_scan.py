@@ -0,0 +1,50 @@
+import asyncio
+
+from app.db import models
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.services import compliance_scan
+
+
+BENIGN = "Dropped off Glucora samples and confirmed the lunch-and-learn date."
+FLAGGED = "Suggested using Cardiozen off-label for pediatric patients."
+
+
+def _interaction(notes: str) -> int:
+    with SessionLocal() as session:
+        interaction = models.Interaction(hcp_id=1, raw_notes=notes, summary=notes)
+        session.add(interaction)
+        session.commit()
+        return interaction.id
+
+
+def _review(interaction_id: int, version: str) -> models.ComplianceReview:
+    with SessionLocal() as session:
+        return session.get(models.ComplianceReview, (interaction_id, version))
+
+
+def test_prefilter_skips_the_llm_and_a_new_prompt_re_reviews(database, monkeypatch):
+    reviewed = []
+
+    async def fake_review(llm, notes, products_discussed=None):
+        reviewed.append(notes)
+        return {"risk_level": "high", "issues": ["Off-label promotion"]}
+
+    monkeypatch.setattr(compliance_scan, "review_compliance", fake_review)
+    benign, flagged = _interaction(BENIGN), _interaction(FLAGGED)
+    version = compliance_scan.review_version()
+
+    asyncio.run(compliance_scan.scan_compliance(AsyncSessionLocal))
+
+    assert FLAGGED in reviewed and BENIGN not in reviewed
+    assert _review(benign, version).reviewed_by == "prefilter"
+    assert _review(flagged, version).prefilter_flags == ["off_label"]
+
+    reviewed.clear()
+    counts = asyncio.run(compliance_scan.scan_compliance(AsyncSessionLocal))
+    assert reviewed == [] and counts["reviewed"] == 0
+
+    monkeypatch.setattr(compliance_scan, "review_version", lambda: "changed-prompt")
+    asyncio.run(compliance_scan.scan_compliance(AsyncSessionLocal))
+
+    assert FLAGGED in reviewed
+    assert _review(flagged, "changed-prompt").risk_level == "high"
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+from sqlalchemy import select
+
+from app.db import models
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.services import embeddings
+
+
+class _ThreadRecordingEmbedder(embeddings.HashingEmbedder):
+    def __init__(self):
+        super().__init__(64)
+        self.threads = []
+
+    def embed(self, texts):
+        self.threads.append(threading.get_ident())
+        return super().embed(texts)
+
+
+def _interaction(summary: str) -> int:
+    with SessionLocal() as session:
+        interaction = models.Interaction(hcp_id=1, summary=summary, sentiment="positive")
+        session.add(interaction)
+        session.commit()
+        return interaction.id
+
+
+def test_embedding_and_retrieval_run_off_the_event_loop(database, monkeypatch):
+    embedder = _ThreadRecordingEmbedder()
+    monkeypatch.setattr(embeddings, "_embedder", embedder)
+    interaction_id = _interaction("Discussed Cardiozen dosing for elderly patients")
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        await embeddings.embed_interactions(AsyncSessionLocal, interaction_id)
+        async with AsyncSessionLocal() as session:
+            snippets = await embeddings.aretrieve_context(session, 1, "Cardiozen dosing", 3, 200)
+        return loop_thread, snippets
+
+    loop_thread, snippets = asyncio.run(scenario())
+
+    assert len(embedder.threads) == 2
+    assert loop_thread not in embedder.threads
+    with SessionLocal() as session:
+        stored = session.scalar(
+            select(models.InteractionEmbedding).where(models.InteractionEmbedding.interaction_id == interaction_id)
+        )
+        assert stored.model == embedder.name
+        assert snippets == embeddings.retrieve_context(session, 1, "Cardiozen dosing", 3, 200)
+    assert "Cardiozen dosing" in snippets[0]
+
+
+def test_unchanged_text_is_not_re_embedded(database, monkeypatch):
+    embedder = _ThreadRecordingEmbedder()
+    monkeypatch.setattr(embeddings, "_embedder", embedder)
+    interaction_id = _interaction("Left samples of Glucora with the front desk")
+
+    asyncio.run(embeddings.embed_interactions(AsyncSessionLocal, interaction_id))
+    asyncio.run(embeddings.embed_interactions(AsyncSessionLocal, interaction_id))
+
+    assert len(embedder.threads) == 1
@@ -0,0 +1,58 @@
+import asyncio
+
+from app.db import models
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.services import extraction
+from app.services.enrichment import COMPLETED, FAILED, PENDING, EnrichmentQueue
+
+
+NOTES = "Met Dr. Iyer to discuss Cardiozen dosing; she was positive and asked for samples next week."
+
+
+def _drain(queue: EnrichmentQueue) -> None:
+    async def run():
+        while (job := await queue.claim()) is not None:
+            await queue.process(*job)
+
+    asyncio.run(run())
+
+
+def _row(interaction_id: int) -> models.Interaction:
+    with SessionLocal() as session:
+        return session.get(models.Interaction, interaction_id)
+
+
+def test_write_returns_before_extraction_and_a_worker_fills_it_in(client):
+    response = client.post("/interactions", json={"hcp_id": 1, "raw_notes": NOTES})
+
+    assert response.status_code == 200
+    created = response.json()
+    assert created["enrichment_status"] == PENDING
+    assert created["summary"] is None
+
+    _drain(EnrichmentQueue(AsyncSessionLocal))
+
+    enriched = _row(created["id"])
+    assert enriched.enrichment_status == COMPLETED
+    assert enriched.summary
+    assert enriched.enrichment_attempts == 1
+
+
+def test_failed_extraction_is_retried_then_given_up(client, monkeypatch):
+    _drain(EnrichmentQueue(AsyncSessionLocal))
+
+    async def broken(llm, notes):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(extraction.extraction_service, "extract", broken)
+    interaction_id = client.post("/interactions", json={"hcp_id": 1, "raw_notes": NOTES}).json()["id"]
+    queue = EnrichmentQueue(AsyncSessionLocal, max_attempts=2, retry_base_seconds=0, retry_max_seconds=0)
+
+    asyncio.run(queue.process(*asyncio.run(queue.claim())))
+    retried = _row(interaction_id)
+    assert (retried.enrichment_status, retried.enrichment_attempts) == (PENDING, 1)
+    assert "provider down" in retried.enrichment_error
+
+    _drain(queue)
+    failed = _row(interaction_id)
+    assert (failed.enrichment_status, failed.enrichment_attempts) == (FAILED, 2)
@@ -0,0 +1,40 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+
+
+def _interaction(summary: str, updated_at: datetime) -> int:
+    with SessionLocal() as session:
+        interaction = models.Interaction(hcp_id=2, summary=summary, updated_at=updated_at)
+        session.add(interaction)
+        session.commit()
+        return interaction.id
+
+
+def _export(client, updated_since: str) -> tuple[list[int], str]:
+    response = client.get("/interactions/export", params={"hcp_id": 2, "updated_since": updated_since, "fields": "id"})
+    assert response.status_code == 200
+    ids = [json.loads(line)["id"] for line in response.text.splitlines()]
+    return ids, response.headers["X-Export-Watermark"]
+
+
+def test_watermark_trails_the_newest_row_so_late_commits_are_exported(client, monkeypatch):
+    monkeypatch.setattr(settings, "export_watermark_lag_seconds", 60)
+    start = datetime(2032, 3, 1, 9, 0, tzinfo=timezone.utc)
+    first = _interaction("Exported on the first run", start)
+
+    ids, watermark = _export(client, (start - timedelta(hours=1)).isoformat())
+
+    assert ids == [first]
+    assert datetime.fromisoformat(watermark) == start - timedelta(seconds=60)
+
+    # Stamped before the first run read past it, committed after: the overlap picks it up.
+    late = _interaction("Committed after the first run", start - timedelta(seconds=30))
+    ids, watermark = _export(client, watermark)
+
+    assert ids == [late, first]
+    # Nothing newer: the next run starts where this one did rather than further back.
+    assert datetime.fromisoformat(watermark) == start - timedelta(seconds=60)
@@ -0,0 +1,62 @@
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+
+from app.config import settings
+from app.services.fake_llm import FakeChatModel
+from app.services.llm import GatedFakeChatModel, get_chat_model
+
+
+@tool
+def fetch_hcp_profile(hcp_id: int) -> dict:
+    """Fetch an HCP profile."""
+    return {}
+
+
+@tool
+def suggest_next_best_action(hcp_id: int) -> dict:
+    """Suggest the next best action."""
+    return {}
+
+
+def _tool_calls(model, text: str) -> list[dict]:
+    return model.invoke([HumanMessage(content=text)]).tool_calls
+
+
+def _names(model, text: str) -> list[str]:
+    return [call["name"] for call in _tool_calls(model, text)]
+
+
+def test_fake_only_calls_bound_tools():
+    model = FakeChatModel(latency=0)
+
+    both = model.bind_tools([fetch_hcp_profile, suggest_next_best_action])
+
+    assert _names(both, "What next?") == ["fetch_hcp_profile", "suggest_next_best_action"]
+    assert _names(model.bind_tools([suggest_next_best_action]), "What next?") == ["suggest_next_best_action"]
+    # Nothing bound: a plain reply instead of tool calls.
+    assert _tool_calls(model, "What next?") == []
+
+
+def test_fake_tool_call_ids_are_deterministic():
+    model = FakeChatModel(latency=0).bind_tools([fetch_hcp_profile, suggest_next_best_action])
+
+    first = _tool_calls(model, "What next for Dr. Iyer?")
+    again = _tool_calls(model, "What next for Dr. Iyer?")
+    other = _tool_calls(model, "What next for Dr. Mehta?")
+
+    assert [call["id"] for call in first] == [call["id"] for call in again]
+    assert len({call["id"] for call in first}) == 2
+    assert {call["id"] for call in first}.isdisjoint(call["id"] for call in other)
+
+
+def test_get_chat_model_builds_the_configured_provider(monkeypatch):
+    model = get_chat_model()
+
+    assert isinstance(model, GatedFakeChatModel)
+    assert model.model_name == settings.groq_model
+    assert get_chat_model(settings.secondary_model).model_name == settings.secondary_model
+
+    monkeypatch.setattr(settings, "llm_provider", "unknown")
+    with pytest.raises(ValueError, match="Unknown LLM provider"):
+        get_chat_model()
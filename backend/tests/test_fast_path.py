@@ -0,0 +1,34 @@
+from app.services.llm import GatedFakeChatModel
+
+
+def _count_llm_calls(monkeypatch) -> list:
+    calls = []
+    generate = GatedFakeChatModel._agenerate
+
+    async def counting(self, messages, *args, **kwargs):
+        calls.append(messages)
+        return await generate(self, messages, *args, **kwargs)
+
+    monkeypatch.setattr(GatedFakeChatModel, "_agenerate", counting)
+    return calls
+
+
+def test_unambiguous_profile_request_is_answered_without_the_llm(client, monkeypatch):
+    calls = _count_llm_calls(monkeypatch)
+
+    response = client.post("/agent/chat", json={"message": "Show Dr. Mehta's profile"})
+
+    assert response.status_code == 200
+    messages = response.json()["messages"]
+    assert [message["role"] for message in messages][-2:] == ["tool", "assistant"]
+    assert messages[-1]["content"].startswith("Dr. Kunal Mehta")
+    assert calls == []
+
+
+def test_unknown_hcp_falls_through_to_the_agent(client, monkeypatch):
+    calls = _count_llm_calls(monkeypatch)
+
+    response = client.post("/agent/chat", json={"message": "Show Dr. Nobody's profile"})
+
+    assert response.status_code == 200
+    assert calls
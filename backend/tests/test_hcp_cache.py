@@ -0,0 +1,59 @@
+import asyncio
+
+import fakeredis
+from redis.exceptions import ConnectionError
+
+from app.db.session import AsyncSessionLocal
+from app.services.cache import MemoryCache, RedisCache
+from app.services.hcp_cache import HCPProfileCache
+
+
+def _worker(client) -> HCPProfileCache:
+    return HCPProfileCache(MemoryCache(100, 60), RedisCache(client, 60))
+
+
+def _get(cache: HCPProfileCache, hcp_id: int = 1):
+    async def get():
+        async with AsyncSessionLocal() as session:
+            return await cache.get_profile(session, hcp_id)
+
+    return asyncio.run(get())
+
+
+def test_profile_loaded_by_one_worker_is_a_shared_hit_for_another(database):
+    redis = fakeredis.FakeRedis()
+    first, second = _worker(redis), _worker(redis)
+
+    loaded = _get(first)
+    shared = _get(second)
+
+    assert shared == loaded
+    assert (first.misses, second.misses, second.shared_hits) == (1, 0, 1)
+
+
+def test_invalidate_drops_the_shared_entry(database):
+    redis = fakeredis.FakeRedis()
+    writer, reader = _worker(redis), _worker(redis)
+    _get(writer)
+
+    asyncio.run(writer.ainvalidate(1))
+    _get(reader)
+
+    assert redis.get("hcp-profile:1") is not None  # reloaded by the reader
+    assert (reader.shared_hits, reader.misses) == (0, 1)
+
+
+class _DownRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("redis is down")
+
+        return fail
+
+
+def test_redis_errors_fall_back_to_the_database(database):
+    cache = _worker(_DownRedis())
+
+    assert _get(cache)["hcp"]["id"] == 1
+    cache.invalidate(1)
+    assert cache.misses == 1
@@ -0,0 +1,38 @@
+from sqlalchemy import func, select
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.idempotency import REPLAYED_HEADER
+
+
+def _interaction_count() -> int:
+    with SessionLocal() as session:
+        return session.scalar(select(func.count()).select_from(models.Interaction))
+
+
+def test_retry_with_the_same_key_replays_the_first_response(client):
+    payload = {"hcp_id": 3, "summary": "Retried after a dropped connection", "sentiment": "neutral"}
+    headers = {"Idempotency-Key": "retry-once"}
+
+    first = client.post("/interactions", json=payload, headers=headers)
+    count = _interaction_count()
+    retry = client.post("/interactions", json=payload, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    assert _interaction_count() == count
+
+
+def test_reusing_a_key_for_a_different_request_is_rejected(client):
+    headers = {"Idempotency-Key": "reused"}
+    first = client.post("/interactions", json={"hcp_id": 3, "summary": "First visit"}, headers=headers)
+    assert first.status_code == 200
+    count = _interaction_count()
+
+    response = client.post("/interactions", json={"hcp_id": 3, "summary": "Another visit"}, headers=headers)
+
+    assert response.status_code == 422
+    assert "different request" in response.json()["detail"]
+    assert _interaction_count() == count
@@ -0,0 +1,52 @@
+import asyncio
+
+from langchain_core.messages import HumanMessage
+
+from app.config import settings
+from app.services import llm, model_router
+from app.services.llm import get_chat_model
+from app.services.llm_gateway import BucketStore, LLMGateway, ModelLimits
+from app.services.model_router import ModelRouter, ModelStats
+
+
+def _stats(latencies: list[float]) -> ModelStats:
+    stats = ModelStats(max_samples=len(latencies))
+    for seconds in latencies:
+        stats.record(seconds)
+    return stats
+
+
+def test_p95_is_nearest_rank_over_20_samples():
+    assert _stats([float(value) for value in range(20, 0, -1)]).p95() == 19.0
+
+
+def test_p95_is_nearest_rank_over_100_samples():
+    assert _stats([float(value) for value in range(1, 101)]).p95() == 95.0
+
+
+def test_p95_rounds_rank_up():
+    # Rank 0.95 * 30 = 28.5 rounds up to the 29th sample.
+    assert _stats([float(value) for value in range(1, 31)]).p95() == 29.0
+
+
+def test_p95_needs_min_samples():
+    assert _stats([1.0] * 19).p95() is None
+
+
+def test_time_queued_in_the_gateway_is_not_a_model_timeout(monkeypatch, tmp_path):
+    # One request a second, with the burst already spent: the call queues for about a second.
+    limits = ModelLimits(requests_per_minute=60, tokens_per_minute=10**9)
+    store = BucketStore(str(tmp_path / "gateway.db"))
+    gateway = LLMGateway(store, limits)
+    for name in (settings.groq_model, settings.secondary_model):
+        while store.try_acquire(name, 1, limits) == 0:
+            pass
+    monkeypatch.setattr(model_router, "llm_gateway", gateway)
+    monkeypatch.setattr(llm, "llm_gateway", gateway)
+    router = ModelRouter(get_chat_model, timeout_seconds=0.5, hedge_enabled=False, breaker_failures=1)
+
+    asyncio.run(router.ainvoke("extraction", [HumanMessage(content="Met Dr. Iyer")]))
+
+    assert all(breaker.state == "closed" for breaker in router.breakers.values())
+    assert all(stats.errors == 0 for stats in router.stats_by_model.values())
+    assert router.stats_by_model[router.candidates("extraction")[0][0]].p95(min_samples=1) < 0.5
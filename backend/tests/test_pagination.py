@@ -0,0 +1,36 @@
+import pytest
+
+from app.pagination import encode_cursor
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-base64!",
+        encode_cursor("notadate", 3),
+        encode_cursor("2024-01-01T00:00:00", "3"),
+        encode_cursor("2024-01-01T00:00:00", True),
+        encode_cursor("2024-01-01T00:00:00", 2**64),
+        encode_cursor(None),
+        encode_cursor({"date": None}, 3),
+    ],
+)
+def test_malformed_interaction_cursor_is_a_400(client, cursor):
+    response = client.get("/interactions", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("cursor", [encode_cursor("Dr. A", "1"), encode_cursor(5, 1), encode_cursor("Dr. A")])
+def test_malformed_hcp_cursor_is_a_400(client, cursor):
+    assert client.get("/hcps", params={"cursor": cursor}).status_code == 400
+
+
+def test_hcp_pages_follow_the_cursor(client):
+    everyone = [hcp["id"] for hcp in client.get("/hcps").json()]
+
+    first = client.get("/hcps", params={"limit": 1})
+    second = client.get("/hcps", params={"limit": 1, "cursor": first.headers["X-Next-Cursor"]})
+
+    assert [hcp["id"] for hcp in first.json() + second.json()] == everyone[:2]
@@ -0,0 +1,16 @@
+from sqlalchemy.dialects import mysql, postgresql
+
+from app.services.search import search_interactions_query
+
+
+def test_mysql_search_orders_undated_last_without_nulls_last():
+    sql = str(search_interactions_query("mysql", query="statin").compile(dialect=mysql.dialect()))
+
+    assert "NULLS LAST" not in sql
+    assert "ORDER BY interactions.interaction_date IS NULL, interactions.interaction_date DESC" in sql
+
+
+def test_postgres_search_keeps_nulls_last():
+    sql = str(search_interactions_query("postgresql", query="statin").compile(dialect=postgresql.dialect()))
+
+    assert "interactions.interaction_date DESC NULLS LAST" in sql
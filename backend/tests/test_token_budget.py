@@ -0,0 +1,46 @@
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from app.agents.graph import _history_window, _summary_cutoff
+from app.config import settings
+from app.services.token_budget import approx_tokens, fit_messages
+
+
+def _turn(index: int) -> list:
+    call_id = f"call_{index}"
+    result = {"hcp": {"id": index, "name": f"Dr. {index}", "notes": "x" * 2000}, "recent_interactions": []}
+    return [
+        HumanMessage(content=f"Show profile {index}"),
+        AIMessage(content="", tool_calls=[{"name": "fetch_hcp_profile", "args": {"hcp_id": index}, "id": call_id}]),
+        ToolMessage(content=json.dumps(result), tool_call_id=call_id),
+        AIMessage(content=f"Here is profile {index}."),
+    ]
+
+
+def _assert_tool_calls_paired(messages: list) -> None:
+    calls = [call["id"] for message in messages if isinstance(message, AIMessage) for call in message.tool_calls]
+    results = [message.tool_call_id for message in messages if isinstance(message, ToolMessage)]
+    assert calls == results
+
+
+def test_trimmed_history_keeps_tool_calls_with_their_results():
+    messages = [message for index in range(6) for message in _turn(index)] + [HumanMessage(content="And the next one?")]
+
+    window = fit_messages(_history_window(messages, 1500), 600)
+
+    assert isinstance(window[0], HumanMessage)
+    assert window[-1].content == "And the next one?"
+    assert len(window) < len(messages)
+    _assert_tool_calls_paired(window)
+    assert approx_tokens(window) <= 600
+
+
+def test_summary_cutoff_never_separates_a_tool_call_from_its_result(monkeypatch):
+    messages = [message for index in range(6) for message in _turn(index)]
+
+    for keep in range(1, len(messages)):
+        monkeypatch.setattr(settings, "agent_history_keep_messages", keep)
+        kept = messages[_summary_cutoff(messages):]
+        assert len(kept) >= keep
+        _assert_tool_calls_paired(kept)
@@ -8,6 +8,29 @@ export async function apiGet(path) {
   return response.json()
 }
 
+// One page of a keyset-paginated list and the cursor for the next (null on the last page).
+export async function apiGetPage(path, cursor = null) {
+  const separator = path.includes('?') ? '&' : '?'
+  const url = cursor ? `${path}${separator}cursor=${encodeURIComponent(cursor)}` : path
+  const response = await fetch(`${API_BASE}${url}`)
+  if (!response.ok) {
+    throw new Error(`Request failed: ${response.status}`)
+  }
+  return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') }
+}
+
+// Follows the X-Next-Cursor header of a keyset-paginated list until the last page.
+export async function apiGetAll(path) {
+  const items = []
+  let cursor = null
+  do {
+    const page = await apiGetPage(path, cursor)
+    items.push(...page.items)
+    cursor = page.nextCursor
+  } while (cursor)
+  return items
+}
+
 export async function apiPost(path, payload) {
   const response = await fetch(`${API_BASE}${path}`, {
     method: 'POST',
@@ -31,3 +54,31 @@ export async function apiPut(path, payload) {
   }
   return response.json()
 }
+
+export async function apiStream(path, payload, onEvent) {
+  const response = await fetch(`${API_BASE}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload)
+  })
+  if (!response.ok) {
+    throw new Error(`Request failed: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) {
+      break
+    }
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    buffer = lines.pop()
+    lines.filter((line) => line.trim()).forEach((line) => onEvent(JSON.parse(line)))
+  }
+  if (buffer.trim()) {
+    onEvent(JSON.parse(buffer))
+  }
+}
@@ -1,35 +1,88 @@
 import { createAsyncThunk, createSlice } from '@reduxjs/toolkit'
 
-import { apiPost } from '../api'
+import { apiPost, apiStream } from '../api'
 
 export const sendChatMessage = createAsyncThunk(
   'chat/send',
-  async ({ message, hcpId, model }) => {
+  async ({ message, hcpId, model }, { getState }) => {
     return apiPost('/agent/chat', {
       message,
       hcp_id: hcpId || null,
-      model: model || null
+      model: model || null,
+      conversation_id: getState().chat.conversationId
     })
   }
 )
 
+export const streamChatMessage = createAsyncThunk(
+  'chat/stream',
+  async ({ message, hcpId, model }, { dispatch, getState }) => {
+    let interactionId = null
+    let conversationId = null
+    await apiStream(
+      '/agent/chat/stream',
+      {
+        message,
+        hcp_id: hcpId || null,
+        model: model || null,
+        conversation_id: getState().chat.conversationId
+      },
+      (event) => {
+        if (event.type === 'error') {
+          throw new Error(event.detail)
+        }
+        if (event.type === 'done') {
+          interactionId = event.interaction_id || null
+          conversationId = event.conversation_id || null
+        }
+        dispatch(chatSlice.actions.streamEvent(event))
+      }
+    )
+    return { interactionId, conversationId }
+  }
+)
+
 const chatSlice = createSlice({
   name: 'chat',
   initialState: {
     messages: [],
     status: 'idle',
     error: null,
-    lastInteractionId: null
+    lastInteractionId: null,
+    conversationId: null
   },
   reducers: {
     addMessage: (state, action) => {
       state.messages.push(action.payload)
     },
+    streamEvent: (state, action) => {
+      const event = action.payload
+      const last = state.messages[state.messages.length - 1]
+      if (event.type === 'token') {
+        if (last && last.role === 'assistant' && last.streaming) {
+          last.content += event.content
+        } else {
+          state.messages.push({ role: 'assistant', content: event.content, toolCalls: null, streaming: true })
+        }
+      } else if (event.type === 'tool_start') {
+        state.messages.push({
+          role: 'assistant',
+          content: '',
+          toolCalls: [{ name: event.name, args: event.input }]
+        })
+      } else if (event.type === 'tool_end') {
+        state.messages.push({ role: 'tool', content: JSON.stringify(event.output), toolCalls: null })
+        if (event.interaction_id) {
+          state.lastInteractionId = event.interaction_id
+        }
+      }
+    },
     resetChat: (state) => {
       state.messages = []
       state.status = 'idle'
       state.error = null
       state.lastInteractionId = null
+      state.conversationId = null
     }
   },
   extraReducers: (builder) => {
@@ -49,11 +102,27 @@ const chatSlice = createSlice({
 
         state.messages.push(...responseMessages)
         state.lastInteractionId = action.payload.interaction_id || null
+        state.conversationId = action.payload.conversation_id || state.conversationId
       })
       .addCase(sendChatMessage.rejected, (state, action) => {
         state.status = 'failed'
         state.error = action.error.message
       })
+      .addCase(streamChatMessage.pending, (state) => {
+        state.status = 'loading'
+      })
+      .addCase(streamChatMessage.fulfilled, (state, action) => {
+        state.status = 'succeeded'
+        state.messages.forEach((message) => {
+          delete message.streaming
+        })
+        state.lastInteractionId = action.payload.interactionId || state.lastInteractionId
+        state.conversationId = action.payload.conversationId || state.conversationId
+      })
+      .addCase(streamChatMessage.rejected, (state, action) => {
+        state.status = 'failed'
+        state.error = action.error.message
+      })
   }
 })
 
@@ -1,9 +1,13 @@
 import { createAsyncThunk, createSlice } from '@reduxjs/toolkit'
 
-import { apiGet, apiPost } from '../api'
+import { apiGetPage, apiPost } from '../api'
 
 export const fetchHcps = createAsyncThunk('hcp/fetchHcps', async () => {
-  return apiGet('/hcps')
+  return apiGetPage('/hcps')
+})
+
+export const fetchMoreHcps = createAsyncThunk('hcp/fetchMoreHcps', async (_, { getState }) => {
+  return apiGetPage('/hcps', getState().hcp.nextCursor)
 })
 
 export const seedHcps = createAsyncThunk('hcp/seedHcps', async () => {
@@ -14,6 +18,7 @@ const hcpSlice = createSlice({
   name: 'hcp',
   initialState: {
     list: [],
+    nextCursor: null,
     status: 'idle',
     error: null
   },
@@ -25,14 +30,20 @@ const hcpSlice = createSlice({
       })
       .addCase(fetchHcps.fulfilled, (state, action) => {
         state.status = 'succeeded'
-        state.list = action.payload
+        state.list = action.payload.items
+        state.nextCursor = action.payload.nextCursor
       })
       .addCase(fetchHcps.rejected, (state, action) => {
         state.status = 'failed'
         state.error = action.error.message
       })
+      .addCase(fetchMoreHcps.fulfilled, (state, action) => {
+        state.list = [...state.list, ...action.payload.items]
+        state.nextCursor = action.payload.nextCursor
+      })
       .addCase(seedHcps.fulfilled, (state, action) => {
         state.list = action.payload
+        state.nextCursor = null
       })
   }
 })
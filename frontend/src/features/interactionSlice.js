@@ -1,10 +1,10 @@
 import { createAsyncThunk, createSlice } from '@reduxjs/toolkit'
 
-import { apiGet, apiPost, apiPut } from '../api'
+import { apiGet, apiGetAll, apiPost, apiPut } from '../api'
 
 export const fetchInteractions = createAsyncThunk(
   'interactions/fetch',
-  async (hcpId) => apiGet(`/interactions?hcp_id=${hcpId}`)
+  async (hcpId) => apiGetAll(`/interactions?hcp_id=${hcpId}&limit=500`)
 )
 
 export const createInteraction = createAsyncThunk(
@@ -12,6 +12,24 @@ export const createInteraction = createAsyncThunk(
   async (payload) => apiPost('/interactions', payload)
 )
 
+const ENRICHMENT_POLL_MS = 1500
+const ENRICHMENT_MAX_POLLS = 40
+
+export const pollInteractionEnrichment = createAsyncThunk(
+  'interactions/pollEnrichment',
+  async (interactionId) => {
+    let interaction = null
+    for (let attempt = 0; attempt < ENRICHMENT_MAX_POLLS; attempt += 1) {
+      await new Promise((resolve) => setTimeout(resolve, ENRICHMENT_POLL_MS))
+      interaction = await apiGet(`/interactions/${interactionId}`)
+      if (!['pending', 'processing'].includes(interaction.enrichment_status)) {
+        break
+      }
+    }
+    return interaction
+  }
+)
+
 export const editInteraction = createAsyncThunk(
   'interactions/edit',
   async ({ interactionId, payload }) => apiPut(`/interactions/${interactionId}`, payload)
@@ -41,6 +59,11 @@ const interactionSlice = createSlice({
       .addCase(createInteraction.fulfilled, (state, action) => {
         state.list = [action.payload, ...state.list]
       })
+      .addCase(pollInteractionEnrichment.fulfilled, (state, action) => {
+        state.list = state.list.map((item) =>
+          item.id === action.payload.id ? action.payload : item
+        )
+      })
       .addCase(editInteraction.fulfilled, (state, action) => {
         state.list = state.list.map((item) =>
           item.id === action.payload.id ? action.payload : item
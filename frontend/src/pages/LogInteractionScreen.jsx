@@ -1,9 +1,13 @@
 ﻿import { useEffect, useMemo, useState } from 'react'
 import { useDispatch, useSelector } from 'react-redux'
 
-import { fetchHcps, seedHcps } from '../features/hcpSlice'
-import { createInteraction, fetchInteractions } from '../features/interactionSlice'
-import { addMessage, resetChat, sendChatMessage } from '../features/chatSlice'
+import { fetchHcps, fetchMoreHcps, seedHcps } from '../features/hcpSlice'
+import {
+  createInteraction,
+  fetchInteractions,
+  pollInteractionEnrichment
+} from '../features/interactionSlice'
+import { addMessage, resetChat, streamChatMessage } from '../features/chatSlice'
 
 const MODEL_OPTIONS = [
   { label: 'Groq Gemma 2 (9B)', value: 'gemma2-9b-it' },
@@ -25,7 +29,7 @@ const INITIAL_FORM = {
 
 export default function LogInteractionScreen() {
   const dispatch = useDispatch()
-  const { list: hcps } = useSelector((state) => state.hcp)
+  const { list: hcps, nextCursor: moreHcps } = useSelector((state) => state.hcp)
   const interactions = useSelector((state) => state.interactions.list)
   const chat = useSelector((state) => state.chat)
 
@@ -87,7 +91,10 @@ export default function LogInteractionScreen() {
     }
 
     try {
-      await dispatch(createInteraction(payload)).unwrap()
+      const interaction = await dispatch(createInteraction(payload)).unwrap()
+      if (interaction.enrichment_status === 'pending') {
+        dispatch(pollInteractionEnrichment(interaction.id))
+      }
       setFormStatus('success')
       setFormState(INITIAL_FORM)
     } catch (error) {
@@ -109,7 +116,7 @@ export default function LogInteractionScreen() {
     const message = chatInput.trim()
     dispatch(addMessage({ role: 'user', content: message }))
     setChatInput('')
-    await dispatch(sendChatMessage({ message, hcpId: selectedHcpId, model: chatModel }))
+    await dispatch(streamChatMessage({ message, hcpId: selectedHcpId, model: chatModel }))
   }
 
   return (
@@ -142,6 +149,11 @@ export default function LogInteractionScreen() {
               </option>
             ))}
           </select>
+          {moreHcps ? (
+            <button className="ghost" type="button" onClick={() => dispatch(fetchMoreHcps())}>
+              Load more HCPs
+            </button>
+          ) : null}
         </div>
         {selectedHcp ? (
           <div className="hcp-summary">
@@ -313,6 +325,10 @@ export default function LogInteractionScreen() {
                   <div className="interaction-meta">
                     <span>{interaction.channel || 'Channel TBD'}</span>
                     <span>{interaction.sentiment || 'Sentiment TBD'}</span>
+                    {['pending', 'processing'].includes(interaction.enrichment_status) && (
+                      <span>AI summary in progress</span>
+                    )}
+                    {interaction.enrichment_status === 'failed' && <span>AI summary failed</span>}
                   </div>
                 </article>
               ))}